@@ -0,0 +1,6 @@
+"""Performance benchmarks for isacbot.
+
+Run any benchmark from the repository root after `make venv i18n-compile`:
+
+    PYTHONPATH=src python -m benchmarks.<name>
+"""
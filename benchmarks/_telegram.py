@@ -0,0 +1,102 @@
+"""Fake Telegram for benchmarks which run updates through the dispatcher."""
+
+import asyncio
+import itertools
+import json
+import time
+from typing import TYPE_CHECKING, Any
+
+from aiogram import Bot, Dispatcher
+from aiogram.client.session.base import BaseSession
+from aiogram.methods import GetMe, SendMessage, SendPoll, StopPoll
+from aiogram.types import Update
+
+
+if TYPE_CHECKING:
+    from collections.abc import AsyncGenerator
+
+    from aiogram.methods import TelegramMethod
+
+
+class TelegramSession(BaseSession):
+    """Answer every method locally, send pinned messages back to the dispatcher."""
+
+    def __init__(self, dp: Dispatcher) -> None:
+        super().__init__()
+        self.dp = dp
+        self.calls: dict[str, int] = {}
+        self._ids = itertools.count(1)
+        self._messages: dict[tuple[int, int], dict[str, Any]] = {}
+        self._tasks: set[asyncio.Task[Any]] = set()
+
+    def message(self, bot: Bot, chat_id: int, **fields: Any) -> dict[str, Any]:
+        message = {
+            'message_id': next(self._ids),
+            'date': int(time.time()),
+            'chat': {'id': chat_id, 'type': 'supergroup', 'title': str(chat_id)},
+            'from': {'id': bot.id, 'is_bot': True, 'first_name': 'bench'},
+            **fields,
+        }
+        self._messages[chat_id, message['message_id']] = message
+        return message
+
+    def _result(self, bot: Bot, method: 'TelegramMethod[Any]') -> Any:
+        if isinstance(method, SendPoll):
+            return self.message(
+                bot,
+                int(method.chat_id),
+                poll={
+                    'id': str(next(self._ids)),
+                    'question': method.question,
+                    'options': [
+                        {'text': str(option), 'voter_count': 0} for option in method.options
+                    ],
+                    'total_voter_count': 0,
+                    'is_closed': False,
+                    'is_anonymous': False,
+                    'type': 'regular',
+                    'allows_multiple_answers': False,
+                },
+            )
+        if isinstance(method, StopPoll):
+            return {
+                **self._messages[int(method.chat_id), method.message_id]['poll'],
+                'is_closed': True,
+            }
+        if isinstance(method, GetMe):
+            return {'id': bot.id, 'is_bot': True, 'first_name': 'bench', 'username': 'bench_bot'}
+        if isinstance(method, SendMessage):
+            return self.message(bot, int(method.chat_id), text=method.text)
+        if method.__api_method__ == 'pinChatMessage':
+            pinned = self._messages[int(method.chat_id), method.message_id]  # type: ignore[attr-defined]
+            service = self.message(bot, pinned['chat']['id'], pinned_message=pinned)
+            self._feed({'update_id': next(self._ids), 'message': service}, bot)
+        return True
+
+    def _feed(self, update: dict[str, Any], bot: Bot) -> None:
+        task = asyncio.create_task(
+            self.dp.feed_update(bot, Update.model_validate(update, context={'bot': bot}))
+        )
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def make_request(
+        self,
+        bot: Bot,
+        method: 'TelegramMethod[Any]',
+        timeout: int | None = None,  # noqa: ARG002, ASYNC109  # signature of the session
+    ) -> Any:
+        self.calls[method.__api_method__] = self.calls.get(method.__api_method__, 0) + 1
+        content = json.dumps({'ok': True, 'result': self._result(bot, method)})
+        return self.check_response(bot=bot, method=method, status_code=200, content=content).result
+
+    async def stream_content(  # type: ignore[override]
+        self,
+        *args: Any,  # noqa: ARG002
+        **kwargs: Any,  # noqa: ARG002
+    ) -> 'AsyncGenerator[bytes]':
+        raise NotImplementedError
+        yield b''  # files are never downloaded
+
+    async def close(self) -> None:
+        pass
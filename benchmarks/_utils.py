@@ -0,0 +1,43 @@
+"""Shared helpers for benchmarks."""
+
+import logging
+import os
+import statistics
+import time
+from contextlib import contextmanager
+from typing import TYPE_CHECKING
+
+
+if TYPE_CHECKING:
+    from collections.abc import Generator, Sequence
+
+
+# `aiogram.Bot` validates only the token format on creation, benchmarks never reach Telegram.
+os.environ.setdefault('BOT_TOKEN', '1:benchmark')
+# Per-operation INFO logs would dominate the measured time.
+logging.disable(logging.INFO)
+
+
+def percentile(samples: 'Sequence[float]', q: float) -> float:
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
+def summary(name: str, samples: 'Sequence[float]') -> str:
+    """Format latency samples given in seconds as a single report line."""
+    return '%-32s n=%-6d mean=%8.3fms p50=%8.3fms p99=%8.3fms' % (
+        name,
+        len(samples),
+        statistics.fmean(samples) * 1000,
+        percentile(samples, 0.5) * 1000,
+        percentile(samples, 0.99) * 1000,
+    )
+
+
+@contextmanager
+def stopwatch(samples: list[float]) -> 'Generator[None]':
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        samples.append(time.perf_counter() - start)
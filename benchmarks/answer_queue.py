@@ -0,0 +1,201 @@
+"""Time an answer holds up the dispatcher when some voters are unregistered and
+Telegram is slow: the previous inline processing of the answer, i.e. the user
+registration, the registration request and the buffered write, versus
+`AnswerQueue` with a different number of workers.
+
+Telegram is replaced by the fake session of `benchmarks._telegram` which
+answers `sendMessage` after a delay. For the queue the time in the dispatcher,
+the lag of the answers from `METRICS` and the time until all answers are
+processed are reported.
+
+    PYTHONPATH=src python -m benchmarks.answer_queue
+"""
+
+import asyncio
+import datetime
+import os
+import random
+import tempfile
+import time
+from pathlib import Path
+from typing import TYPE_CHECKING, Any
+
+import sqlalchemy as sa
+from aiogram import Bot, Dispatcher
+from aiogram.fsm.context import FSMContext
+from aiogram.fsm.storage.base import StorageKey
+from aiogram.fsm.storage.memory import MemoryStorage
+from aiogram.methods import SendMessage
+from aiogram.types import Message, Update, User
+from aiogram.utils.i18n.middleware import FSMI18nMiddleware
+from apscheduler.jobstores.memory import MemoryJobStore
+
+from benchmarks._telegram import TelegramSession
+from benchmarks._utils import stopwatch, summary
+from isacbot.background import answer_queue as answer_queue_module
+from isacbot.background.answer_queue import AnswerQueue, QueuedAnswer
+from isacbot.database import operations
+from isacbot.database.buffer import answer_buffer
+from isacbot.database.database import Database
+from isacbot.database.models import Base, Poll, PollAnswers
+from isacbot.database.models import User as DBUser
+from isacbot.database.utils import PollOptions
+from isacbot.extensions import i18n, scheduler
+from isacbot.handlers import poll
+from isacbot.metrics import Metrics
+from isacbot.middlewares import EventFromUserMiddleware
+from isacbot.states import poll_sessions
+
+
+if TYPE_CHECKING:
+    from aiogram.methods import TelegramMethod
+
+    from isacbot.states import PollSession
+
+
+_VOTERS = 400
+_UNREGISTERED = 0.1  # part of voters without a display name
+_SEND_MESSAGE_DELAY = 0.2  # seconds
+_WORKERS = (1, 4, 16)
+_CHAT_ID = -1000
+_DATE = datetime.date(2024, 1, 1)
+
+
+class _SlowSession(TelegramSession):
+    async def make_request(
+        self,
+        bot: Bot,
+        method: 'TelegramMethod[Any]',
+        timeout: int | None = None,  # noqa: ASYNC109  # signature of the session
+    ) -> Any:
+        if isinstance(method, SendMessage):
+            await asyncio.sleep(_SEND_MESSAGE_DELAY)
+        return await super().make_request(bot, method, timeout)
+
+
+async def _fill(db: Database) -> None:
+    async with db.engine.begin() as connection:
+        await connection.execute(sa.delete(PollAnswers))
+        await connection.execute(sa.delete(Poll))
+        await connection.execute(sa.delete(DBUser))
+        await connection.execute(
+            sa.insert(DBUser),
+            [
+                {
+                    'id': i,
+                    'full_name': f'User {i}',
+                    'displayname': None if random.random() < _UNREGISTERED else f'User {i}',
+                }
+                for i in range(1, _VOTERS + 1)
+            ],
+        )
+
+
+def _user(user_id: int) -> dict[str, Any]:
+    return {'id': user_id, 'is_bot': False, 'first_name': 'User', 'last_name': str(user_id)}
+
+
+async def _vote_inline(
+    queue: AnswerQueue, bot: Bot, session: 'PollSession', user_id: int, samples: list[float]
+) -> None:
+    with stopwatch(samples):
+        await queue._process(  # noqa: SLF001  # the previous processing in the dispatcher
+            QueuedAnswer(
+                bot=bot,
+                session=session,
+                user=User.model_validate(_user(user_id)),
+                answer=random.choice(list(PollOptions)),
+                locale=i18n.default_locale,
+            )
+        )
+
+
+async def _vote(dp: Dispatcher, bot: Bot, poll_id: int, user_id: int, samples: list[float]) -> None:
+    update = Update.model_validate(
+        {
+            'update_id': 0,
+            'poll_answer': {'poll_id': str(poll_id), 'user': _user(user_id), 'option_ids': [0]},
+        },
+        context={'bot': bot},
+    )
+    with stopwatch(samples):
+        await dp.feed_update(bot, update)
+
+
+async def _open_poll(bot: Bot, dp: Dispatcher, session: TelegramSession) -> 'PollSession':
+    await poll.crete_poll_handler(
+        message=Message.model_validate(
+            session.message(bot, _CHAT_ID, text='/create_poll'), context={'bot': bot}
+        ),
+        bot=bot,
+        state=FSMContext(
+            storage=dp.storage,
+            key=StorageKey(bot_id=bot.id, chat_id=_CHAT_ID, user_id=bot.id),
+        ),
+        poll_date=_DATE,
+        poll_close_delay=3600,  # the poll is closed below
+    )
+    return next(iter(poll_sessions))
+
+
+async def main() -> None:
+    dp = Dispatcher(storage=MemoryStorage())
+    dp.update.outer_middleware(FSMI18nMiddleware(i18n=i18n))
+    dp.update.outer_middleware(EventFromUserMiddleware())
+    dp.include_router(poll.router)
+    session = _SlowSession(dp)
+    bot = Bot(token=os.environ['BOT_TOKEN'], session=session)
+    scheduler.configure(jobstores={'default': MemoryJobStore()})
+
+    print(
+        f'{_VOTERS} voters, {_UNREGISTERED:.0%} unregistered, sendMessage takes '
+        f'{_SEND_MESSAGE_DELAY}s'
+    )
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        db = Database(path=Path(tmp_dir) / 'bench.db')
+        operations.db = db  # operations are bound to the application database
+        async with db.connect():
+            await db.create_tables(base=Base)
+            answer_buffer.start()
+            for workers in (0, *_WORKERS):
+                await _fill(db)
+                operations._USER_CACHE.clear()  # noqa: SLF001
+                operations._POLL_DAYS.clear()  # noqa: SLF001
+                queue = poll.answer_queue = AnswerQueue(workers=max(workers, 1), size=100)
+                metrics = answer_queue_module.METRICS = Metrics()
+                queue.start()
+                running = await _open_poll(bot, dp, session)
+
+                samples: list[float] = []
+                start = time.perf_counter()
+                if not workers:
+                    await asyncio.gather(
+                        *(
+                            _vote_inline(queue, bot, running, user_id, samples)
+                            for user_id in range(1, _VOTERS + 1)
+                        )
+                    )
+                else:
+                    await asyncio.gather(
+                        *(
+                            _vote(dp, bot, running.poll_id, user_id, samples)
+                            for user_id in range(1, _VOTERS + 1)
+                        )
+                    )
+                await queue.stop()
+                processed = time.perf_counter() - start
+                await poll.close_poll(bot=bot, session=running)
+
+                name = f'queue, {workers} workers' if workers else 'inline'
+                print(summary(f'{name}: in dispatcher', samples))
+                if workers:
+                    lag = metrics.snapshot(prefix='answer_queue.lag')['answer_queue.lag']
+                    print(
+                        '    lag mean=%.3fms max=%.3fms, all processed in %.3fs'
+                        % (lag['mean'] * 1000, lag['max'] * 1000, processed)
+                    )
+            await answer_buffer.stop()
+
+
+if __name__ == '__main__':
+    asyncio.run(main())
@@ -0,0 +1,146 @@
+"""`getChatMember` calls of the member filters: every private message checked by
+`ChatMemberFilter` and the admin keyboard of a non-admin checked by
+`IsAdminFilter.user_is_administrator`, previously with a call per check, versus
+the cached lookups of `get_chat_member`.
+
+Telegram is replaced by the fake session of `benchmarks._telegram` which
+answers after a delay. Updates arrive in batches handled concurrently, like the
+updates of one `getUpdates` call, few active users send most of them. The
+latency of the checks, the `getChatMember` calls, the hit ratio and the calls
+saved are reported.
+
+    PYTHONPATH=src python -m benchmarks.chat_members
+"""
+
+import asyncio
+import collections
+import os
+import random
+from typing import TYPE_CHECKING, Any
+
+from aiogram import Bot, Dispatcher
+from aiogram.methods import GetChatMember
+from aiogram.types import Message
+from aiogram.utils.chat_member import ADMINS, MEMBERS
+
+from benchmarks import _utils  # noqa: F401  # environment of the benchmarks
+from benchmarks._telegram import TelegramSession
+from benchmarks._utils import stopwatch, summary
+from isacbot import cache, filters
+from isacbot.filters import ChatMemberFilter, IsAdminFilter
+from isacbot.metrics import Metrics
+
+
+if TYPE_CHECKING:
+    from aiogram.methods import TelegramMethod
+
+
+_USERS = 300
+_BATCHES = 40
+_BATCH_SIZE = 100  # updates of one `getUpdates` call
+_REQUEST_DELAY = 0.03  # seconds
+_GROUP_ID = -1000
+
+
+class _MembersSession(TelegramSession):
+    async def make_request(
+        self,
+        bot: Bot,
+        method: 'TelegramMethod[Any]',
+        timeout: int | None = None,  # noqa: ASYNC109  # signature of the session
+    ) -> Any:
+        await asyncio.sleep(_REQUEST_DELAY)
+        return await super().make_request(bot, method, timeout)
+
+    def _result(self, bot: Bot, method: 'TelegramMethod[Any]') -> Any:
+        if isinstance(method, GetChatMember):
+            return {
+                'status': 'member',
+                'user': {'id': method.user_id, 'is_bot': False, 'first_name': 'bench'},
+            }
+        return super()._result(bot, method)
+
+
+class _PreviousFilter(ChatMemberFilter):
+    async def __call__(self, message: 'Message', bot: 'Bot', user_id: int) -> bool:
+        return isinstance((await bot.get_chat_member(message.chat.id, user_id)), MEMBERS)
+
+
+async def _previous_is_admin(
+    bot: 'Bot', chat_id: int, user_id: int, admins: 'collections.defaultdict[int, set[int]]'
+) -> bool:
+    return user_id in admins[chat_id] or isinstance(
+        (await bot.get_chat_member(chat_id=chat_id, user_id=user_id)), ADMINS
+    )
+
+
+async def _update(
+    bot: Bot,
+    telegram: TelegramSession,
+    user_id: int,
+    samples: list[float],
+    *,
+    cached: bool,
+) -> None:
+    message = Message.model_validate(
+        telegram.message(bot, user_id, chat={'id': user_id, 'type': 'private'}),
+        context={'bot': bot},
+    )
+    admins: collections.defaultdict[int, set[int]] = collections.defaultdict(set)
+    with stopwatch(samples):
+        if cached:
+            assert await ChatMemberFilter()(message, bot=bot, user_id=user_id)
+            assert not await IsAdminFilter.user_is_administrator(
+                bot=bot, chat_id=_GROUP_ID, user_id=user_id, admins=admins
+            )
+        else:
+            assert await _PreviousFilter()(message, bot=bot, user_id=user_id)
+            assert not await _previous_is_admin(
+                bot=bot, chat_id=_GROUP_ID, user_id=user_id, admins=admins
+            )
+
+
+async def _measure(name: str, *, cached: bool) -> None:
+    telegram = _MembersSession(Dispatcher())
+    bot = Bot(token=os.environ['BOT_TOKEN'], session=telegram)
+    metrics = cache.METRICS = filters.METRICS = Metrics()
+    filters._CHAT_MEMBERS.clear()  # noqa: SLF001
+    users = random.Random(0)
+    weights = [1 / rank for rank in range(1, _USERS + 1)]  # few users are the most active
+    samples: list[float] = []
+    for _ in range(_BATCHES):
+        await asyncio.gather(
+            *(
+                _update(bot, telegram, user_id, samples, cached=cached)
+                for user_id in users.choices(range(1, _USERS + 1), weights, k=_BATCH_SIZE)
+            )
+        )
+    calls = telegram.calls.get('getChatMember', 0)
+    print(summary(f'{name}: checks', samples))
+    print('    getChatMember calls=%d' % calls)
+    if cached:
+        counters = metrics.snapshot(prefix='chat_members')
+        hits = counters.get('chat_members.hits', 0)
+        shared = counters.get('chat_members.shared', 0)
+        print(
+            '    hit ratio=%.1f%%, shared lookups=%d, calls saved=%d of %d'
+            % (
+                hits / (hits + counters.get('chat_members.misses', 0)) * 100,
+                shared,
+                hits + shared,
+                hits + shared + calls,
+            )
+        )
+
+
+async def main() -> None:
+    print(
+        f'{_BATCHES} batches of {_BATCH_SIZE} private messages from {_USERS} users, '
+        f'every Telegram call takes {_REQUEST_DELAY}s'
+    )
+    await _measure('get_chat_member per check', cached=False)
+    await _measure('cached get_chat_member', cached=True)
+
+
+if __name__ == '__main__':
+    asyncio.run(main())
@@ -0,0 +1,70 @@
+"""Per-operation latency of `database.operations` with `NullPool` versus the
+pooled engine with connect-time PRAGMAs.
+
+    PYTHONPATH=src python -m benchmarks.database_pool
+"""
+
+import asyncio
+import datetime
+import tempfile
+from pathlib import Path
+
+from benchmarks._utils import stopwatch, summary
+from isacbot.database import operations
+from isacbot.database.database import Database
+from isacbot.database.models import Base
+from isacbot.database.utils import PollOptions, PollStatus
+
+
+_ITERATIONS = 500
+_USER_ID = 1
+_CHAT_ID = 1
+_POLL_ID = 1
+
+
+async def _run(*, null_pool: bool) -> None:
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        db = Database(path=Path(tmp_dir) / 'bench.db', null_pool=null_pool)
+        operations.db = db  # operations are bound to the application database
+        operations._USER_CACHE.clear()  # noqa: SLF001  # rows of the previous run
+        async with db.connect():
+            await db.create_tables(base=Base)
+            today = datetime.datetime.now(tz=datetime.UTC).date()
+            await operations.ensure_user(user_id=_USER_ID, username='bench', full_name='Bench')
+            await operations.create_poll(
+                poll_id=_POLL_ID,
+                chat_id=_CHAT_ID,
+                question='bench',
+                date=today,
+                status=PollStatus.STARTED,
+            )
+
+            get_user: list[float] = []
+            add_answer: list[float] = []
+            poll_already_exist: list[float] = []
+            options = list(PollOptions)
+            for i in range(_ITERATIONS):
+                operations._USER_CACHE.clear()  # noqa: SLF001  # measure the database, not the cache
+                with stopwatch(get_user):
+                    await operations.get_user(user_id=_USER_ID)
+                with stopwatch(add_answer):
+                    await operations.add_answer(
+                        user_id=_USER_ID, poll_id=_POLL_ID, answer=options[i % len(options)]
+                    )
+                with stopwatch(poll_already_exist):
+                    await operations.poll_already_exist(chat_id=_CHAT_ID, date=today)
+
+    mode = 'NullPool' if null_pool else f'pool_size={db.pool_size}'
+    print(f'[{mode}]')
+    print(summary('get_user', get_user))
+    print(summary('add_answer', add_answer))
+    print(summary('poll_already_exist', poll_already_exist))
+
+
+async def main() -> None:
+    await _run(null_pool=True)
+    await _run(null_pool=False)
+
+
+if __name__ == '__main__':
+    asyncio.run(main())
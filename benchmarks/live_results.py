@@ -0,0 +1,181 @@
+"""Telegram calls of the live results messages: hundreds of votes per chat, with
+some users changing their answers, arrive through the dispatcher while every
+poll has a live results message.
+
+Telegram is replaced by the fake session of `benchmarks._telegram`. The number
+of votes, the edits of the results messages, which would be one per vote
+without debouncing, and the most edits of a chat within one interval while
+voting are reported. The final results are published by closing the polls.
+
+    PYTHONPATH=src python -m benchmarks.live_results
+"""
+
+import asyncio
+import collections
+import datetime
+import os
+import random
+import tempfile
+import time
+from pathlib import Path
+from typing import TYPE_CHECKING, Any
+
+import sqlalchemy as sa
+from aiogram import Bot, Dispatcher
+from aiogram.fsm.context import FSMContext
+from aiogram.fsm.storage.base import StorageKey
+from aiogram.fsm.storage.memory import MemoryStorage
+from aiogram.methods import EditMessageText
+from aiogram.types import Message, Update
+from aiogram.utils.i18n.middleware import FSMI18nMiddleware
+from apscheduler.jobstores.memory import MemoryJobStore
+
+from benchmarks import _utils  # noqa: F401  # environment of the benchmarks
+from benchmarks._telegram import TelegramSession
+from isacbot.background.answer_queue import answer_queue
+from isacbot.background.live_results import live_results
+from isacbot.database import operations
+from isacbot.database.buffer import answer_buffer
+from isacbot.database.database import Database
+from isacbot.database.migrations import MIGRATIONS
+from isacbot.database.models import Base, User
+from isacbot.extensions import i18n, scheduler
+from isacbot.handlers import poll
+from isacbot.middlewares import EventFromUserMiddleware
+from isacbot.service import poll as poll_service
+from isacbot.states import poll_sessions
+
+
+if TYPE_CHECKING:
+    from aiogram.methods import TelegramMethod
+
+
+_CHATS = 4
+_VOTERS = 150  # per chat
+_REVOTES = 0.2  # part of voters who change their answer
+_DURATION = 10  # seconds, votes are spread over the duration
+_INTERVAL = 2  # seconds between edits of a results message
+_DATE = datetime.date(2024, 1, 1)
+_CHAT_IDS = range(-1000, -1000 - _CHATS, -1)
+
+
+class _EditsSession(TelegramSession):
+    """Record the time of every edit of a results message."""
+
+    def __init__(self, dp: Dispatcher) -> None:
+        super().__init__(dp)
+        self.edits: dict[int, list[float]] = collections.defaultdict(list)
+
+    async def make_request(
+        self,
+        bot: Bot,
+        method: 'TelegramMethod[Any]',
+        timeout: int | None = None,  # noqa: ASYNC109  # signature of the session
+    ) -> Any:
+        if isinstance(method, EditMessageText):
+            self.edits[int(method.chat_id or 0)].append(time.perf_counter())
+        return await super().make_request(bot, method, timeout)
+
+
+async def _fill(db: Database) -> None:
+    async with db.engine.begin() as connection:
+        await connection.execute(
+            sa.insert(User),
+            [
+                {'id': i, 'full_name': f'User {i}', 'displayname': f'User {i}'}
+                for i in range(1, _VOTERS + 1)
+            ],
+        )
+
+
+async def _vote(dp: Dispatcher, bot: Bot, poll_id: int, user_id: int) -> int:
+    votes = 2 if random.random() < _REVOTES else 1
+    for _ in range(votes):
+        await asyncio.sleep(random.uniform(0, _DURATION / votes))
+        update = Update.model_validate(
+            {
+                'update_id': 0,
+                'poll_answer': {
+                    'poll_id': str(poll_id),
+                    'user': {'id': user_id, 'is_bot': False, 'first_name': f'User {user_id}'},
+                    'option_ids': [random.randrange(3)],
+                },
+            },
+            context={'bot': bot},
+        )
+        await dp.feed_update(bot, update)
+    return votes
+
+
+def _most_in_interval(times: list[float], until: float) -> int:
+    times = [time_ for time_ in times if time_ < until]
+    return max(
+        (sum(1 for other in times if start <= other < start + _INTERVAL) for start in times),
+        default=0,
+    )
+
+
+async def main() -> None:
+    dp = Dispatcher(storage=MemoryStorage())
+    dp.update.outer_middleware(FSMI18nMiddleware(i18n=i18n))
+    dp.update.outer_middleware(EventFromUserMiddleware())
+    dp.include_router(poll.router)
+    session = _EditsSession(dp)
+    bot = Bot(token=os.environ['BOT_TOKEN'], session=session)
+    scheduler.configure(jobstores={'default': MemoryJobStore()})
+    live_results.interval = _INTERVAL
+    poll_service.POLL_LIVE_RESULTS = True  # the results message is opt-in
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        db = Database(path=Path(tmp_dir) / 'bench.db')
+        operations.db = db  # operations are bound to the application database
+        async with db.connect():
+            await db.create_tables(base=Base)
+            await db.migrate(migrations=MIGRATIONS)  # triggers of the poll tally
+            await _fill(db)
+            answer_buffer.start()
+            answer_queue.start()
+            live_results.start()
+            for chat_id in _CHAT_IDS:
+                await poll.crete_poll_handler(
+                    message=Message.model_validate(
+                        session.message(bot, chat_id, text='/create_poll'),
+                        context={'bot': bot},
+                    ),
+                    bot=bot,
+                    state=FSMContext(
+                        storage=dp.storage,
+                        key=StorageKey(bot_id=bot.id, chat_id=chat_id, user_id=bot.id),
+                    ),
+                    poll_date=_DATE,
+                    poll_close_delay=3600,  # polls are closed below
+                )
+            votes = await asyncio.gather(
+                *(
+                    _vote(dp, bot, running.poll_id, user_id)
+                    for running in poll_sessions
+                    for user_id in range(1, _VOTERS + 1)
+                )
+            )
+            voted = time.perf_counter()
+            await live_results.stop()
+            for running in poll_sessions:
+                await poll.close_poll(bot=bot, session=running)
+            await answer_queue.stop()
+            await answer_buffer.stop()
+
+    edits = sum(len(times) for times in session.edits.values())
+    print(f'{_CHATS} polls, {_VOTERS} voters per chat, votes in {_DURATION}s')
+    print('votes=%d results edits=%d (one per vote without debouncing)' % (sum(votes), edits))
+    print(
+        'most edits of a chat within %ds while voting: %d'
+        % (
+            _INTERVAL,
+            max((_most_in_interval(times, voted) for times in session.edits.values()), default=0),
+        )
+    )
+    print('telegram calls: %s' % session.calls)
+
+
+if __name__ == '__main__':
+    asyncio.run(main())
@@ -0,0 +1,189 @@
+"""Interactive replies while a background fan-out of private messages runs:
+requests sent directly, retried after `TelegramRetryAfter` like the reminders
+did, versus requests scheduled by `OutboundScheduler`.
+
+Telegram is replaced by the fake session of `benchmarks._telegram` which
+answers after a delay and enforces its limits: 30 messages per second in total
+and 1 message per second to the same chat, above them it answers 429. The
+number of 429 answers, the latency of the replies and the time of the fan-out
+are reported. Then a fan-out into a group, where the replies of the group wait
+for the same bucket of the chat as the fan-out.
+
+    PYTHONPATH=src python -m benchmarks.outbound
+"""
+
+import asyncio
+import collections
+import json
+import logging
+import os
+import time
+from typing import TYPE_CHECKING, Any
+
+from aiogram import Bot, Dispatcher
+
+from benchmarks import _utils  # noqa: F401  # environment of the benchmarks
+from benchmarks._telegram import TelegramSession
+from benchmarks._utils import stopwatch, summary
+from isacbot.config import TELEGRAM_RATE
+from isacbot.errors import TelegramRetryAfter
+from isacbot.metrics import Metrics
+from isacbot.middlewares import outbound
+from isacbot.middlewares.outbound import OutboundScheduler, background_requests
+
+
+if TYPE_CHECKING:
+    from aiogram.methods import TelegramMethod
+
+
+_FAN_OUT = 300  # background messages to different private chats
+_REPLIES = 30  # interactive replies, one every `_REPLY_INTERVAL`
+_REPLY_INTERVAL = 0.2  # seconds
+_REQUEST_DELAY = 0.02  # seconds
+_RATE = 30  # messages per second in total, the limit of Telegram
+_RETRY_AFTER = 1  # seconds
+_GROUP_ID = -1000
+_GROUP_FAN_OUT = 10  # background messages to the group, like asking users to register
+_GROUP_REPLIES = 3
+
+
+class _LimitedSession(TelegramSession):
+    """Answer 429 above the global rate or above 1 message per second to a chat."""
+
+    def __init__(self, dp: Dispatcher) -> None:
+        super().__init__(dp)
+        self.sent: collections.deque[float] = collections.deque()
+        self.chats: dict[int, float] = {}
+        self.limited = 0
+
+    def _allowed(self, chat_id: int) -> bool:
+        now = time.perf_counter()
+        while self.sent and self.sent[0] < now - 1:
+            self.sent.popleft()
+        if len(self.sent) >= _RATE or now - self.chats.get(chat_id, -1) < 1:
+            return False
+        self.sent.append(now)
+        self.chats[chat_id] = now
+        return True
+
+    async def make_request(
+        self,
+        bot: Bot,
+        method: 'TelegramMethod[Any]',
+        timeout: int | None = None,  # noqa: ASYNC109  # signature of the session
+    ) -> Any:
+        await asyncio.sleep(_REQUEST_DELAY)
+        if not self._allowed(int(getattr(method, 'chat_id', 0))):
+            self.limited += 1
+            content = json.dumps(
+                {
+                    'ok': False,
+                    'error_code': 429,
+                    'description': f'Too Many Requests: retry after {_RETRY_AFTER}',
+                    'parameters': {'retry_after': _RETRY_AFTER},
+                }
+            )
+            self.check_response(bot=bot, method=method, status_code=429, content=content)
+        return await super().make_request(bot, method, timeout)
+
+
+async def _send(bot: Bot, chat_id: int, *, retry: bool) -> None:
+    while True:
+        try:
+            await bot.send_message(chat_id=chat_id, text='bench')
+        except TelegramRetryAfter as e:
+            if not retry:
+                raise
+            await asyncio.sleep(e.retry_after)
+        else:
+            return
+
+
+async def _fan_out(bot: Bot, *, retry: bool) -> float:
+    start = time.perf_counter()
+    with background_requests():
+        await asyncio.gather(
+            *(_send(bot, chat_id, retry=retry) for chat_id in range(1, _FAN_OUT + 1))
+        )
+    return time.perf_counter() - start
+
+
+async def _replies(bot: Bot, samples: list[float], *, retry: bool) -> None:
+    for chat_id in range(100_001, 100_001 + _REPLIES):
+        await asyncio.sleep(_REPLY_INTERVAL)
+        with stopwatch(samples):
+            await _send(bot, chat_id, retry=retry)
+
+
+async def _measure(name: str, *, scheduled: bool) -> None:
+    dp = Dispatcher()
+    telegram = _LimitedSession(dp)
+    bot = Bot(token=os.environ['BOT_TOKEN'], session=telegram)
+    metrics = outbound.METRICS = Metrics()
+    if scheduled:
+        telegram.middleware(
+            OutboundScheduler(rate=TELEGRAM_RATE, chat_rate=1, group_rate=20, burst=1)
+        )
+    samples: list[float] = []
+    fan_out, _ = await asyncio.gather(
+        _fan_out(bot, retry=not scheduled), _replies(bot, samples, retry=not scheduled)
+    )
+    print(summary(f'{name}: reply', samples))
+    print(
+        '    fan-out of %d messages in %.2fs, 429 answers=%d'
+        % (_FAN_OUT, fan_out, telegram.limited)
+    )
+    if scheduled:
+        waits = metrics.snapshot(prefix='outbound.wait')
+        print(
+            '    wait: %s'
+            % ', '.join(
+                f'{name.rsplit(".", 1)[-1]} mean={wait["mean"] * 1000:.1f}ms'
+                for name, wait in sorted(waits.items())
+            )
+        )
+
+
+async def _measure_group() -> None:
+    """Measure replies in a group while a background fan-out into the same group
+    waits for its bucket, a little below 1 message per second of the fake Telegram.
+    """
+    dp = Dispatcher()
+    telegram = _LimitedSession(dp)
+    telegram.middleware(OutboundScheduler(rate=TELEGRAM_RATE, chat_rate=1, group_rate=50, burst=1))
+    bot = Bot(token=os.environ['BOT_TOKEN'], session=telegram)
+    samples: list[float] = []
+
+    async def fan_out() -> None:
+        with background_requests():
+            await asyncio.gather(
+                *(_send(bot, _GROUP_ID, retry=False) for _ in range(_GROUP_FAN_OUT))
+            )
+
+    async def replies() -> None:
+        await asyncio.sleep(_REPLY_INTERVAL)  # the fan-out is waiting already
+        for _ in range(_GROUP_REPLIES):
+            with stopwatch(samples):
+                await _send(bot, _GROUP_ID, retry=False)
+
+    await asyncio.gather(fan_out(), replies())
+    print(summary('OutboundScheduler: group reply', samples))
+    print(
+        '    after a fan-out of %d messages into the group, 429 answers=%d'
+        % (_GROUP_FAN_OUT, telegram.limited)
+    )
+
+
+async def main() -> None:
+    logging.disable(logging.WARNING)  # every 429 is logged
+    print(
+        f'{_FAN_OUT} background messages and {_REPLIES} replies, limit {_RATE}/s, '
+        f'1/s per chat, Telegram calls take {_REQUEST_DELAY}s'
+    )
+    await _measure('direct with retries', scheduled=False)
+    await _measure('OutboundScheduler', scheduled=True)
+    await _measure_group()
+
+
+if __name__ == '__main__':
+    asyncio.run(main())
@@ -0,0 +1,147 @@
+"""Time per vote in `PollAnswerOuterMiddleware`: the previous lookup of the poll,
+two reads of the poll FSM context under a lock and a parse of the stored poll
+message, versus the active poll index of `poll_sessions`.
+
+The FSM storage is in memory, set `BENCH_REDIS_URL` to read the previous
+context from Redis, which adds two round trips per vote.
+
+    PYTHONPATH=src python -m benchmarks.poll_answer_middleware
+"""
+
+import asyncio
+import os
+import tempfile
+import time
+from pathlib import Path
+from typing import Any
+
+from aiogram import Bot
+from aiogram.fsm.context import FSMContext
+from aiogram.fsm.storage.base import BaseStorage, StorageKey
+from aiogram.fsm.storage.memory import MemoryStorage
+from aiogram.fsm.storage.redis import RedisStorage
+from aiogram.types import Message, PollAnswer
+
+from benchmarks._utils import stopwatch, summary
+from isacbot.database import operations
+from isacbot.database.database import Database
+from isacbot.database.models import Base
+from isacbot.database.utils import PollOptions
+from isacbot.middlewares import PollAnswerOuterMiddleware
+from isacbot.states import poll_sessions
+
+
+_ITERATIONS = 5000
+_CHAT_ID = -1000
+_POLL_ID = 5_377_000_000_000_000_000  # Telegram poll ids are 64-bit numbers
+_USER_ID = 1
+# States of the previous poll FSM context.
+_STARTED = 'PollState:STARTED'
+_STARTED_AND_PINNED = 'PollState:STARTED_AND_PINNED'
+
+
+def _poll_message(bot: Bot) -> Message:
+    return Message.model_validate(
+        {
+            'message_id': 1,
+            'date': int(time.time()),
+            'chat': {'id': _CHAT_ID, 'type': 'supergroup', 'title': 'bench'},
+            'from': {'id': bot.id, 'is_bot': True, 'first_name': 'bench'},
+            'poll': {
+                'id': str(_POLL_ID),
+                'question': 'bench',
+                'options': [{'text': option.value, 'voter_count': 0} for option in PollOptions],
+                'total_voter_count': 0,
+                'is_closed': False,
+                'is_anonymous': False,
+                'type': 'regular',
+                'allows_multiple_answers': False,
+            },
+        },
+        context={'bot': bot},
+    )
+
+
+async def _old_lookup(context: FSMContext, lock: asyncio.Lock, event: PollAnswer) -> bool:
+    """Lookup of the poll in the previous `PollAnswerOuterMiddleware`."""
+    async with lock:
+        state = await context.get_state()
+    if state not in (_STARTED, _STARTED_AND_PINNED):
+        return False
+    async with lock:
+        data = await context.get_data()
+    if not (poll_message_json := data.get('poll_message')):
+        return False
+    poll_message = Message.model_validate_json(poll_message_json)
+    return bool(poll_message.poll and event.poll_id == poll_message.poll.id)
+
+
+def _new_lookup(event: PollAnswer) -> bool:
+    return bool((session := poll_sessions.active(poll_id=int(event.poll_id))) and session.message)
+
+
+async def _handler(event: PollAnswer, data: dict[str, Any]) -> None:
+    pass
+
+
+def _storage() -> BaseStorage:
+    if url := os.environ.get('BENCH_REDIS_URL'):
+        return RedisStorage.from_url(url)
+    return MemoryStorage()
+
+
+async def main() -> None:
+    bot = Bot(token=os.environ['BOT_TOKEN'])
+    storage = _storage()
+    poll_message = _poll_message(bot)
+    event = PollAnswer.model_validate(
+        {
+            'poll_id': str(_POLL_ID),
+            'user': {'id': _USER_ID, 'is_bot': False, 'first_name': 'Bench'},
+            'option_ids': [0],
+        },
+        context={'bot': bot},
+    )
+
+    # The previous single poll context.
+    context = FSMContext(
+        storage=storage, key=StorageKey(bot_id=bot.id, chat_id=_CHAT_ID, user_id=bot.id)
+    )
+    await context.set_state(_STARTED_AND_PINNED)
+    await context.update_data(poll_message=poll_message.model_dump_json())
+    lock = asyncio.Lock()
+
+    session = poll_sessions.open(storage=storage, bot_id=bot.id, chat_id=_CHAT_ID, poll_id=_POLL_ID)
+    poll_sessions.activate(session, message=poll_message)
+
+    answer_middleware = PollAnswerOuterMiddleware()
+    before: list[float] = []
+    after: list[float] = []
+    middleware: list[float] = []
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        db = Database(path=Path(tmp_dir) / 'bench.db')
+        operations.db = db  # operations are bound to the application database
+        async with db.connect():
+            await db.create_tables(base=Base)
+            await operations.ensure_user(user_id=_USER_ID, username=None, full_name='Bench')
+            await operations.update_user(user_id=_USER_ID, displayname='Bench')
+            for _ in range(_ITERATIONS):
+                with stopwatch(before):
+                    assert await _old_lookup(context, lock, event)
+                with stopwatch(after):
+                    assert _new_lookup(event)
+                with stopwatch(middleware):
+                    await answer_middleware(_handler, event, {})
+    await poll_sessions.close(session)
+    await context.clear()
+    await storage.close()
+    await bot.session.close()
+
+    print(f'[{type(storage).__name__}]')
+    print(summary('lookup: FSM context + parse', before))
+    print(summary('lookup: active poll index', after))
+    print(summary('whole middleware per vote', middleware))
+
+
+if __name__ == '__main__':
+    asyncio.run(main())
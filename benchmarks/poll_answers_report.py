@@ -0,0 +1,145 @@
+"""Report query of `get_poll_answers` filtered by the computed
+`DATE(created_at, offset)` expression versus the stored `answered_local_date`
+column covered by the composite index.
+
+    PYTHONPATH=src python -m benchmarks.poll_answers_report
+"""
+
+import asyncio
+import datetime
+import random
+import tempfile
+from pathlib import Path
+
+import sqlalchemy as sa
+
+from benchmarks._utils import stopwatch, summary
+from isacbot.database import operations
+from isacbot.database.database import Database
+from isacbot.database.models import Base, Poll, PollAnswers, User
+from isacbot.database.utils import PollOptions, PollStatus
+
+
+_USERS = 250
+_CHAT_ID = 1
+_POLLS = 500  # _USERS * _POLLS answers in total
+_ITERATIONS = 50
+_OFFSET = '+10800 seconds'  # what the removed `get_timezone_aware_date` produced for MSK
+
+
+def _old_report_statement(poll_id: int, date: datetime.date) -> sa.Select:
+    answered_at = sa.func.DATE(PollAnswers.created_at, _OFFSET).label('aswered_at')
+    return (
+        sa.select(
+            Poll.date,
+            Poll.question,
+            User.username,
+            User.full_name,
+            User.displayname,
+            PollAnswers.answer,
+            answered_at,
+        )
+        .distinct()
+        .select_from(PollAnswers)
+        .where(sa.and_(PollAnswers.poll_id == poll_id, answered_at == date))
+        .join(User, User.id == PollAnswers.user_id)
+        .join(Poll, Poll.id == PollAnswers.poll_id)
+        .order_by(User.username, User.full_name)
+    )
+
+
+async def _fill(db: Database) -> list[tuple[int, datetime.date]]:
+    monday = datetime.date(2020, 1, 6)
+    polls = [(poll_id, monday + datetime.timedelta(weeks=poll_id)) for poll_id in range(_POLLS)]
+    options = list(PollOptions)
+    async with db.engine.begin() as connection:
+        await connection.execute(
+            sa.insert(User),
+            [{'id': i, 'username': f'user{i}', 'full_name': f'User {i}'} for i in range(_USERS)],
+        )
+        await connection.execute(
+            sa.insert(Poll),
+            [
+                {
+                    'id': poll_id,
+                    'chat_id': _CHAT_ID,
+                    'question': 'bench',
+                    'date': date,
+                    'status': PollStatus.COMPLETED,
+                }
+                for poll_id, date in polls
+            ],
+        )
+        await connection.execute(
+            sa.insert(PollAnswers),
+            [
+                {
+                    'user_id': user_id,
+                    'poll_id': poll_id,
+                    'answer': random.choice(options),
+                    'created_at': datetime.datetime.combine(date, datetime.time(6)),
+                    'answered_local_date': date,
+                }
+                for poll_id, date in polls
+                for user_id in range(_USERS)
+            ],
+        )
+    return polls
+
+
+async def _explain(db: Database, statement: sa.Select) -> str:
+    async with db.engine.connect() as connection:
+        compiled = statement.compile(
+            dialect=connection.dialect, compile_kwargs={'literal_binds': True}
+        )
+        plan = await connection.execute(sa.text(f'EXPLAIN QUERY PLAN {compiled}'))
+        return '\n'.join(f'    {row[-1]}' for row in plan)
+
+
+async def main() -> None:
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        db = Database(path=Path(tmp_dir) / 'bench.db')
+        operations.db = db  # operations are bound to the application database
+        async with db.connect():
+            await db.create_tables(base=Base)
+            polls = await _fill(db)
+            print(f'{_USERS * _POLLS} answers in {_POLLS} polls')
+
+            index = next(iter(PollAnswers.__table__.indexes))  # type: ignore[attr-defined]
+            sample = random.sample(polls, _ITERATIONS)
+
+            # Before: the schema without the stored local date index.
+            async with db.engine.begin() as connection:
+                await connection.run_sync(index.drop)
+            before: list[float] = []
+            for poll_id, date in sample:
+                with stopwatch(before):
+                    async with db.session.begin() as session:
+                        (await session.execute(_old_report_statement(poll_id, date))).all()
+            print('DATE(created_at) plan:')
+            print(await _explain(db, _old_report_statement(poll_id, date)))
+
+            async with db.engine.begin() as connection:
+                await connection.run_sync(index.create)
+            after: list[float] = []
+            for poll_id, date in sample:
+                with stopwatch(after):
+                    async with operations.get_poll_answers(
+                        chat_id=_CHAT_ID, poll_id=poll_id, date=date
+                    ) as answers:
+                        await answers.all()
+            print('answered_local_date plan:')
+            print(
+                await _explain(
+                    db,
+                    sa.select(PollAnswers.user_id, PollAnswers.answer).where(
+                        PollAnswers.poll_id == poll_id, PollAnswers.answered_local_date == date
+                    ),
+                )
+            )
+    print(summary('DATE(created_at, offset)', before))
+    print(summary('answered_local_date', after))
+
+
+if __name__ == '__main__':
+    asyncio.run(main())
@@ -0,0 +1,158 @@
+"""Concurrent and repeated `/create_poll` commands of a chat: the previous check
+of `PollCreationMessageInnerMiddleware`, which looked up the poll in the
+database for every command, versus the reservation of `reserve_poll`.
+
+Telegram is replaced by the fake session of `benchmarks._telegram`. Commands
+arrive in bursts, the database lookups, the sent and created polls and the time of a
+rejected command are reported. Exactly one poll per chat must be created.
+
+    PYTHONPATH=src python -m benchmarks.poll_creation
+"""
+
+import asyncio
+import datetime
+import logging
+import os
+import tempfile
+from pathlib import Path
+from typing import TYPE_CHECKING, Any
+
+from aiogram import Bot, Dispatcher
+from aiogram.fsm.context import FSMContext
+from aiogram.fsm.storage.base import StorageKey
+from aiogram.fsm.storage.memory import MemoryStorage
+from aiogram.types import Message
+from apscheduler.jobstores.memory import MemoryJobStore
+
+from benchmarks import _utils  # noqa: F401  # environment of the benchmarks
+from benchmarks._telegram import TelegramSession
+from benchmarks._utils import stopwatch, summary
+from isacbot.config import BOT_TIMEZONE
+from isacbot.database import operations
+from isacbot.database.database import Database
+from isacbot.database.models import Base
+from isacbot.extensions import scheduler
+from isacbot.handlers import poll
+from isacbot.middlewares import PollCreationMessageInnerMiddleware
+from isacbot.states import poll_sessions
+
+
+if TYPE_CHECKING:
+    from collections.abc import Awaitable, Callable
+
+
+_CHATS = 20
+_BURSTS = 5  # bursts of commands per chat, the first one creates the poll
+_BURST = 10  # concurrent commands of a chat
+
+
+class _Middleware(PollCreationMessageInnerMiddleware):
+    is_pool_day = True  # type: ignore[assignment]  # the benchmark runs on any day
+
+
+class _PreviousMiddleware(_Middleware):
+    """The previous check, the poll is looked up in the database for every command."""
+
+    async def __call__(  # type: ignore[override]
+        self,
+        handler: 'Callable[[Message, dict[str, Any]], Awaitable[Any]]',
+        event: Message,
+        data: dict[str, Any],
+    ) -> Any:
+        poll_date = event.date.astimezone(tz=BOT_TIMEZONE).date()
+        if await operations.poll_already_exist(chat_id=event.chat.id, date=poll_date):
+            await event.answer(text='exists')
+            return None
+        data['poll_close_delay'] = self.poll_close_delay
+        data['poll_date'] = poll_date
+        return await handler(event, data)
+
+
+async def _handle(message: Message, data: dict[str, Any]) -> None:
+    await poll.crete_poll_handler(
+        message=message,
+        bot=data['bot'],
+        state=data['state'],
+        poll_date=data['poll_date'],
+        poll_close_delay=data['poll_close_delay'],
+    )
+
+
+async def _command(
+    middleware: PollCreationMessageInnerMiddleware,
+    bot: Bot,
+    telegram: TelegramSession,
+    chat_id: int,
+    samples: list[float],
+) -> None:
+    message = Message.model_validate(
+        telegram.message(bot, chat_id, text='/create_poll'), context={'bot': bot}
+    )
+    state = FSMContext(
+        storage=telegram.dp.storage, key=StorageKey(bot_id=bot.id, chat_id=chat_id, user_id=bot.id)
+    )
+    with stopwatch(samples):
+        await middleware(_handle, message, {'bot': bot, 'state': state})
+
+
+async def _measure(name: str, middleware: PollCreationMessageInnerMiddleware, bot: Bot) -> None:
+    telegram: TelegramSession = bot.session  # type: ignore[assignment]
+    lookups = 0
+    poll_already_exist = operations.poll_already_exist
+
+    async def counted(chat_id: int, date: datetime.date) -> bool:
+        nonlocal lookups
+        lookups += 1
+        return await poll_already_exist(chat_id=chat_id, date=date)
+
+    operations.poll_already_exist = counted  # type: ignore[assignment]
+    telegram.calls.clear()
+    first: list[float] = []
+    repeated: list[float] = []
+    try:
+        for burst in range(_BURSTS):
+            await asyncio.gather(
+                *(
+                    _command(
+                        middleware,
+                        bot,
+                        telegram,
+                        chat_id,
+                        repeated if burst else first,
+                    )
+                    for chat_id in range(-1000, -1000 - _CHATS, -1)
+                    for _ in range(_BURST)
+                )
+            )
+    finally:
+        operations.poll_already_exist = poll_already_exist  # type: ignore[assignment]
+    created = len(poll_sessions)
+    for running in list(poll_sessions):
+        await poll.close_poll(bot=bot, session=running)
+    print(
+        '%s: database lookups=%d, polls sent=%d, polls created=%d'
+        % (name, lookups, telegram.calls.get('sendPoll', 0), created)
+    )
+    print(summary(f'{name}: first burst', first))
+    print(summary(f'{name}: repeated bursts', repeated))
+
+
+async def main() -> None:
+    dp = Dispatcher(storage=MemoryStorage())
+    telegram = TelegramSession(dp)
+    bot = Bot(token=os.environ['BOT_TOKEN'], session=telegram)
+    scheduler.configure(jobstores={'default': MemoryJobStore()})
+    logging.disable(logging.ERROR)  # duplicate polls of the previous check fail to be created
+    print(f'{_CHATS} chats, {_BURSTS} bursts of {_BURST} concurrent commands per chat')
+    for name, middleware in (('previous', _PreviousMiddleware()), ('reserve_poll', _Middleware())):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            db = Database(path=Path(tmp_dir) / 'bench.db')
+            operations.db = db  # operations are bound to the application database
+            operations._POLL_DAYS.clear()  # noqa: SLF001
+            async with db.connect():
+                await db.create_tables(base=Base)
+                await _measure(name, middleware, bot)
+
+
+if __name__ == '__main__':
+    asyncio.run(main())
@@ -0,0 +1,136 @@
+"""Storage calls of the poll lifecycle: the previous FSM state and data of the
+poll context, which were written separately and read back when the poll was
+closed, versus the transitions of `PollSession`, each saved with one write.
+
+The FSM storage is in memory, set `BENCH_REDIS_URL` to use Redis, where every
+call is a round trip. The storage calls per poll, the time of the lifecycle and
+the time to check that a poll accepts answers are reported.
+
+    PYTHONPATH=src python -m benchmarks.poll_lifecycle
+"""
+
+import asyncio
+import collections
+import os
+from typing import Any
+
+from aiogram.fsm.context import FSMContext
+from aiogram.fsm.storage.base import BaseStorage, StorageKey
+from aiogram.fsm.storage.memory import MemoryStorage
+from aiogram.fsm.storage.redis import RedisStorage
+
+from benchmarks import _utils  # noqa: F401  # environment of the benchmarks
+from benchmarks._utils import stopwatch, summary
+from isacbot.states import PollSession, PollState
+
+
+_POLLS = 500
+_BOT_ID = 1
+_CHAT_ID = -1000
+_POLL_MESSAGE = '{"message_id": 1}'  # the size of the message doesn't matter here
+# States of the previous poll FSM context.
+_STARTED = 'PollState:STARTED'
+_STARTED_AND_PINNED = 'PollState:STARTED_AND_PINNED'
+
+
+class _CountingStorage(BaseStorage):
+    """Count calls of the wrapped storage."""
+
+    def __init__(self, storage: BaseStorage) -> None:
+        self.storage = storage
+        self.calls: collections.Counter[str] = collections.Counter()
+
+    async def set_state(self, key: StorageKey, state: Any = None) -> None:
+        self.calls['set_state'] += 1
+        await self.storage.set_state(key, state)
+
+    async def get_state(self, key: StorageKey) -> str | None:
+        self.calls['get_state'] += 1
+        return await self.storage.get_state(key)
+
+    async def set_data(self, key: StorageKey, data: Any) -> None:
+        self.calls['set_data'] += 1
+        await self.storage.set_data(key, data)
+
+    async def get_data(self, key: StorageKey) -> dict[str, Any]:
+        self.calls['get_data'] += 1
+        return await self.storage.get_data(key)
+
+    async def close(self) -> None:
+        await self.storage.close()
+
+
+async def _previous(storage: BaseStorage, poll_id: int) -> None:
+    context = FSMContext(
+        storage=storage,
+        key=StorageKey(bot_id=_BOT_ID, chat_id=_CHAT_ID, user_id=_BOT_ID, thread_id=poll_id),
+    )
+    await context.set_state(_STARTED)
+    await context.update_data(poll_message=_POLL_MESSAGE, close_at='2024-01-01T00:00:00')
+    await context.set_state(_STARTED_AND_PINNED)
+    pinned = await context.get_state() == _STARTED_AND_PINNED  # read when the poll is closed
+    assert pinned
+    await context.clear()
+
+
+async def _transitions(storage: BaseStorage, poll_id: int) -> None:
+    session = PollSession(storage=storage, bot_id=_BOT_ID, chat_id=_CHAT_ID, poll_id=poll_id)
+    await session.transition(
+        PollState.CREATED, poll_message=_POLL_MESSAGE, close_at='2024-01-01T00:00:00'
+    )
+    await session.transition(PollState.PINNED, pinned=True)
+    await session.transition(PollState.CLOSING)
+    await session.transition(PollState.CLOSED)
+    assert session.pinned
+    await session.transition(PollState.UNPINNED)
+    await session.context.clear()
+
+
+async def _accepts_answers_previous(context: FSMContext) -> bool:
+    return await context.get_state() in {_STARTED, _STARTED_AND_PINNED}
+
+
+def _storage() -> BaseStorage:
+    if url := os.environ.get('BENCH_REDIS_URL'):
+        return RedisStorage.from_url(url)
+    return MemoryStorage()
+
+
+async def main() -> None:
+    storage = _CountingStorage(_storage())
+    print(f'[{type(storage.storage).__name__}] {_POLLS} polls')
+    for name, lifecycle in (('previous context', _previous), ('transitions', _transitions)):
+        storage.calls.clear()
+        samples: list[float] = []
+        for poll_id in range(1, _POLLS + 1):
+            with stopwatch(samples):
+                await lifecycle(storage, poll_id)
+        print(summary(f'lifecycle: {name}', samples))
+        print(
+            '    storage calls per poll: %s'
+            % ', '.join(
+                f'{call}={count / _POLLS:g}' for call, count in sorted(storage.calls.items())
+            )
+        )
+
+    context = FSMContext(
+        storage=storage, key=StorageKey(bot_id=_BOT_ID, chat_id=_CHAT_ID, user_id=_BOT_ID)
+    )
+    await context.set_state(_STARTED_AND_PINNED)
+    session = PollSession(storage=storage, bot_id=_BOT_ID, chat_id=_CHAT_ID, poll_id=0)
+    session.state = PollState.PINNED
+    previous: list[float] = []
+    snapshot: list[float] = []
+    for _ in range(_POLLS):
+        with stopwatch(previous):
+            assert await _accepts_answers_previous(context)
+        with stopwatch(snapshot):
+            assert session.accepts_answers
+    await context.clear()
+    await storage.close()
+    print(summary('accepts answers: FSM state', previous))
+    print(summary('accepts answers: snapshot', snapshot))
+
+
+if __name__ == '__main__':
+    asyncio.run(main())
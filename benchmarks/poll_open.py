@@ -0,0 +1,135 @@
+"""End-to-end latency of a scheduled poll: the previous job, which sent the
+`/create_poll` command to the chat and ran it through
+`PollCreationMessageInnerMiddleware` and the handler, versus
+`PollService.open_poll`.
+
+Telegram is replaced by the fake session of `benchmarks._telegram` which
+answers after a delay. The time until the poll is running and the Telegram
+calls per poll are reported.
+
+    PYTHONPATH=src python -m benchmarks.poll_open
+"""
+
+import asyncio
+import datetime
+import os
+import tempfile
+from pathlib import Path
+from typing import TYPE_CHECKING, Any
+
+from aiogram import Bot, Dispatcher
+from aiogram.fsm.storage.memory import MemoryStorage
+from aiogram.types import Message
+from apscheduler.jobstores.memory import MemoryJobStore
+
+from benchmarks import _utils  # noqa: F401  # environment of the benchmarks
+from benchmarks._telegram import TelegramSession
+from benchmarks._utils import stopwatch, summary
+from isacbot.commands import ISACBotCommand
+from isacbot.config import BOT_TIMEZONE, POLL_DEFAULT_CLOSE_DELAY
+from isacbot.database import operations
+from isacbot.database.database import Database
+from isacbot.database.models import Base
+from isacbot.extensions import scheduler
+from isacbot.handlers import poll
+from isacbot.middlewares import PollCreationMessageInnerMiddleware
+from isacbot.service.poll import PollService
+from isacbot.states import get_fsm_context, poll_sessions
+
+
+if TYPE_CHECKING:
+    from aiogram.methods import TelegramMethod
+
+
+_CHATS = 50
+_REQUEST_DELAY = 0.05  # seconds
+
+
+class _SlowSession(TelegramSession):
+    async def make_request(
+        self,
+        bot: Bot,
+        method: 'TelegramMethod[Any]',
+        timeout: int | None = None,  # noqa: ASYNC109  # signature of the session
+    ) -> Any:
+        await asyncio.sleep(_REQUEST_DELAY)
+        return await super().make_request(bot, method, timeout)
+
+
+class _Middleware(PollCreationMessageInnerMiddleware):
+    is_pool_day = True  # type: ignore[assignment]  # the benchmark runs on any day
+
+
+async def _previous_job(bot: Bot, dp: Dispatcher, chat_id: int) -> None:
+    """Run the previous `create_poll_in_chat`, which emulated a user by the bot."""
+
+    async def handler(message: Message, data: dict[str, Any]) -> None:
+        await poll.crete_poll_handler(message, **data)
+
+    message = await bot.send_message(chat_id=chat_id, text=f'/{ISACBotCommand.CREATE_POLL}')
+    await _Middleware()(
+        handler,
+        message,
+        {
+            'bot': bot,
+            'state': get_fsm_context(
+                storage=dp.storage, bot_id=bot.id, chat_id=chat_id, user_id=bot.id
+            ),
+        },
+    )
+
+
+async def _open_poll(bot: Bot, dp: Dispatcher, chat_id: int) -> None:
+    await PollService(bot=bot, storage=dp.storage).open_poll(
+        chat_id=chat_id,
+        date=datetime.datetime.now(tz=BOT_TIMEZONE).date(),
+        close_delay=POLL_DEFAULT_CLOSE_DELAY,
+    )
+
+
+async def _timed(job: Any, bot: Bot, dp: Dispatcher, chat_id: int, samples: list[float]) -> None:
+    with stopwatch(samples):
+        await job(bot, dp, chat_id)
+
+
+async def main() -> None:
+    dp = Dispatcher(storage=MemoryStorage())
+    dp.include_router(poll.router)
+    telegram = _SlowSession(dp)
+    bot = Bot(token=os.environ['BOT_TOKEN'], session=telegram)
+    scheduler.configure(jobstores={'default': MemoryJobStore()})
+    await bot.me()  # cached by the bot, not a call of the job
+
+    print(f'{_CHATS} chats, every Telegram call takes {_REQUEST_DELAY}s')
+    for name, job in (('previous job', _previous_job), ('PollService.open_poll', _open_poll)):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            db = Database(path=Path(tmp_dir) / 'bench.db')
+            operations.db = db  # operations are bound to the application database
+            operations._POLL_DAYS.clear()  # noqa: SLF001
+            async with db.connect():
+                await db.create_tables(base=Base)
+                telegram.calls.clear()
+                samples: list[float] = []
+                await asyncio.gather(
+                    *(
+                        _timed(job, bot, dp, chat_id, samples)
+                        for chat_id in range(-1000, -1000 - _CHATS, -1)
+                    )
+                )
+                created = len(poll_sessions)
+                for running in list(poll_sessions):
+                    await poll.close_poll(bot=bot, session=running)
+        print(summary(name, samples))
+        print(
+            '    polls=%d, telegram calls per poll: %s'
+            % (
+                created,
+                ', '.join(
+                    f'{method}={count / _CHATS:g}' for method, count in telegram.calls.items()
+                ),
+            )
+        )
+
+
+if __name__ == '__main__':
+    asyncio.run(main())
@@ -0,0 +1,172 @@
+"""Load test of concurrent polls: dozens of polls are opened at once, every chat
+votes through the dispatcher, then all polls are closed by their scheduler jobs.
+
+Telegram is replaced by a session which answers every method locally and sends
+the pinned service message back to the dispatcher like Telegram does, the FSM
+storage and the job store are in memory. The time to open all polls, the
+per-vote latency through `PollAnswerOuterMiddleware` and the time to close and
+unpin all polls after the close delay are reported, then every poll is checked
+to be completed with all answers saved.
+
+    PYTHONPATH=src python -m benchmarks.poll_sessions
+"""
+
+import asyncio
+import datetime
+import os
+import tempfile
+import time
+from pathlib import Path
+
+import sqlalchemy as sa
+from aiogram import Bot, Dispatcher
+from aiogram.fsm.context import FSMContext
+from aiogram.fsm.storage.base import StorageKey
+from aiogram.fsm.storage.memory import MemoryStorage
+from aiogram.types import Message, Update
+from aiogram.utils.i18n.middleware import FSMI18nMiddleware
+from apscheduler.jobstores.memory import MemoryJobStore
+
+from benchmarks._telegram import TelegramSession
+from benchmarks._utils import stopwatch, summary
+from isacbot.background import tasks
+from isacbot.background.answer_queue import answer_queue
+from isacbot.database import operations
+from isacbot.database.buffer import answer_buffer
+from isacbot.database.database import Database
+from isacbot.database.models import Base, Poll, PollAnswers, User
+from isacbot.database.utils import PollStatus
+from isacbot.extensions import i18n, scheduler
+from isacbot.handlers import poll
+from isacbot.middlewares import EventFromUserMiddleware
+from isacbot.states import PollState, poll_sessions
+
+
+_CHATS = 48
+_VOTERS = 20  # per chat
+_CLOSE_DELAY = 15  # seconds, all votes must arrive before the end
+_DATE = datetime.date(2024, 1, 1)
+_CHAT_IDS = range(-1000, -1000 - _CHATS, -1)
+
+
+async def _fill(db: Database) -> None:
+    async with db.engine.begin() as connection:
+        await connection.execute(
+            sa.insert(User),
+            [
+                {'id': i, 'full_name': f'User {i}', 'displayname': f'User {i}'}
+                for i in range(1, _VOTERS + 1)
+            ],
+        )
+
+
+async def _started() -> bool:
+    """Check that all polls are pinned, i.e. accept answers."""
+    return len(poll_sessions) == _CHATS and all(
+        session.state is PollState.PINNED for session in poll_sessions
+    )
+
+
+async def _vote(dp: Dispatcher, bot: Bot, poll_id: int, user_id: int, samples: list[float]) -> None:
+    update = Update.model_validate(
+        {
+            'update_id': 0,
+            'poll_answer': {
+                'poll_id': str(poll_id),
+                'user': {'id': user_id, 'is_bot': False, 'first_name': f'User {user_id}'},
+                'option_ids': [user_id % 3],
+            },
+        },
+        context={'bot': bot},
+    )
+    with stopwatch(samples):
+        await dp.feed_update(bot, update)
+
+
+async def main() -> None:
+    dp = Dispatcher(storage=MemoryStorage())
+    dp.update.outer_middleware(FSMI18nMiddleware(i18n=i18n))
+    dp.update.outer_middleware(EventFromUserMiddleware())
+    dp.include_router(poll.router)
+    session = TelegramSession(dp)
+    bot = Bot(token=os.environ['BOT_TOKEN'], session=session)
+    tasks.bot = bot  # close jobs use the application bot
+    scheduler.configure(jobstores={'default': MemoryJobStore()})
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        db = Database(path=Path(tmp_dir) / 'bench.db')
+        operations.db = db  # operations are bound to the application database
+        async with db.connect():
+            await db.create_tables(base=Base)
+            await _fill(db)
+            answer_buffer.start()
+            answer_queue.start()
+            scheduler.start()
+
+            start = time.perf_counter()
+            await asyncio.gather(
+                *(
+                    poll.crete_poll_handler(
+                        message=Message.model_validate(
+                            session.message(bot, chat_id, text='/create_poll'),
+                            context={'bot': bot},
+                        ),
+                        bot=bot,
+                        state=FSMContext(
+                            storage=dp.storage,
+                            key=StorageKey(bot_id=bot.id, chat_id=chat_id, user_id=bot.id),
+                        ),
+                        poll_date=_DATE,
+                        poll_close_delay=_CLOSE_DELAY,
+                    )
+                    for chat_id in _CHAT_IDS
+                )
+            )
+            while not await _started():  # noqa: ASYNC110
+                await asyncio.sleep(0)
+            opened = time.perf_counter() - start
+            running_sessions = list(poll_sessions)
+
+            votes: list[float] = []
+            await asyncio.gather(
+                *(
+                    _vote(dp, bot, running.poll_id, user_id, votes)
+                    for running in running_sessions
+                    for user_id in range(1, _VOTERS + 1)
+                )
+            )
+            voted = time.perf_counter() - start
+
+            while any(running.accepts_answers for running in running_sessions):  # noqa: ASYNC110
+                await asyncio.sleep(0.001)
+            ended = time.perf_counter()
+            while poll_sessions:  # noqa: ASYNC110  # sessions are closed by the jobs
+                await asyncio.sleep(0.01)
+            closed = time.perf_counter() - ended
+            scheduler.shutdown()
+            await answer_queue.stop()
+            await answer_buffer.stop()
+
+            async with db.session() as db_session:
+                completed = await db_session.scalar(
+                    sa.select(sa.func.count()).where(Poll.status == PollStatus.COMPLETED)
+                )
+                answers = await db_session.scalar(
+                    sa.select(sa.func.count()).select_from(PollAnswers)
+                )
+
+    print(f'{_CHATS} polls, {_VOTERS} voters per chat')
+    print(
+        'opened in %.3fs, all votes in %.3fs, stopped and unpinned in %.3fs after the end'
+        % (opened, voted, closed)
+    )
+    print(summary('vote', votes))
+    print(
+        'completed polls=%d answers=%d running sessions=%d'
+        % (completed or 0, answers or 0, len(poll_sessions))
+    )
+    print('telegram calls: %s' % session.calls)
+
+
+if __name__ == '__main__':
+    asyncio.run(main())
@@ -0,0 +1,186 @@
+"""Hot statements of `database.operations` built on every call, as before,
+versus statements built once with bound parameters.
+
+For every statement the per-call overhead of building it and generating its
+cache key (what SQLAlchemy does before the compiled cache lookup) and the
+statements per second of the whole operation are reported.
+
+    PYTHONPATH=src python -m benchmarks.prebuilt_statements
+"""
+
+import asyncio
+import datetime
+import random
+import tempfile
+import time
+from pathlib import Path
+from typing import TYPE_CHECKING, Any
+
+import sqlalchemy as sa
+from sqlalchemy.dialects import sqlite
+
+from benchmarks._utils import stopwatch
+from isacbot.database import operations
+from isacbot.database.database import Database
+from isacbot.database.models import Base, Poll, PollAnswers, User
+from isacbot.database.utils import PollOptions, PollStatus
+
+
+if TYPE_CHECKING:
+    from collections.abc import Awaitable, Callable
+
+
+_ITERATIONS = 2000
+_USERS = 500
+_CHAT_ID = 1
+_POLL_ID = 1
+_DATE = datetime.date(2024, 1, 1)
+
+
+def _old_upsert(values: list[dict[str, Any]]) -> sa.Insert:
+    ins_stmt = sqlite.insert(table=PollAnswers).values(values)
+    return ins_stmt.on_conflict_do_update(
+        index_elements=[PollAnswers.user_id.key, PollAnswers.poll_id.key],
+        set_={
+            PollAnswers.answer.key: ins_stmt.excluded.answer,
+            PollAnswers.updated_at.key: datetime.datetime.now(tz=datetime.UTC),
+        },
+    )
+
+
+def _answer() -> dict[str, Any]:
+    return {
+        'user_id': random.randrange(_USERS),
+        'poll_id': _POLL_ID,
+        'answer': random.choice(list(PollOptions)),
+        'answered_local_date': _DATE,
+    }
+
+
+async def _old_get_user(db: Database) -> None:
+    async with db.session.begin() as session:
+        await session.get(User, random.randrange(_USERS))
+
+
+async def _old_poll_already_exist(db: Database) -> None:
+    async with db.session.begin() as session:
+        await session.scalar(sa.select(Poll).where(Poll.chat_id == _CHAT_ID, Poll.date == _DATE))
+
+
+async def _old_update_poll_status(db: Database) -> None:
+    async with db.session.begin() as session:
+        await session.execute(
+            sa.update(Poll).where(Poll.id == _POLL_ID).values(status=PollStatus.STARTED.name)
+        )
+
+
+async def _old_add_answer(db: Database) -> None:
+    async with db.session.begin() as session:
+        await session.execute(_old_upsert([_answer()]))
+
+
+async def _old_add_answers(db: Database) -> None:
+    answers = {(a['user_id'], a['poll_id']): a for a in (_answer() for _ in range(100))}
+    async with db.session.begin() as session:
+        await session.execute(_old_upsert(list(answers.values())))
+
+
+async def _new_get_user(db: Database) -> None:  # noqa: ARG001
+    operations._USER_CACHE.clear()  # noqa: SLF001  # measure the database, not the cache
+    await operations.get_user(user_id=random.randrange(_USERS))
+
+
+async def _new_poll_already_exist(db: Database) -> None:  # noqa: ARG001
+    await operations.poll_already_exist(chat_id=_CHAT_ID, date=_DATE)
+
+
+async def _new_update_poll_status(db: Database) -> None:  # noqa: ARG001
+    await operations.update_poll_status(poll_id=_POLL_ID, status=PollStatus.STARTED)
+
+
+async def _new_add_answer(db: Database) -> None:  # noqa: ARG001
+    await operations.add_answer(**_answer())
+
+
+async def _new_add_answers(db: Database) -> None:  # noqa: ARG001
+    answers = {(a['user_id'], a['poll_id']): a for a in (_answer() for _ in range(100))}
+    await operations.add_answers(answers=list(answers.values()))
+
+
+_BUILDERS: dict[str, tuple['Callable[[], sa.Executable]', sa.Executable]] = {
+    'get_user': (
+        lambda: sa.select(User).where(User.id == random.randrange(_USERS)),
+        operations._SELECT_USER,  # noqa: SLF001
+    ),
+    'poll_already_exist': (
+        lambda: sa.select(Poll).where(Poll.chat_id == _CHAT_ID, Poll.date == _DATE),
+        operations._SELECT_POLL_EXIST,  # noqa: SLF001
+    ),
+    'update_poll_status': (
+        lambda: sa.update(Poll).where(Poll.id == _POLL_ID).values(status=PollStatus.STARTED.name),
+        operations._UPDATE_POLL_STATUS,  # noqa: SLF001
+    ),
+    'add_answer': (lambda: _old_upsert([_answer()]), operations._UPSERT_ANSWER),  # noqa: SLF001
+}
+_OPERATIONS: dict[
+    str, tuple['Callable[[Database], Awaitable[None]]', 'Callable[[Database], Awaitable[None]]']
+] = {
+    'get_user': (_old_get_user, _new_get_user),
+    'poll_already_exist': (_old_poll_already_exist, _new_poll_already_exist),
+    'update_poll_status': (_old_update_poll_status, _new_update_poll_status),
+    'add_answer': (_old_add_answer, _new_add_answer),
+    'add_answers (100)': (_old_add_answers, _new_add_answers),
+}
+
+
+def _build_overhead(build: 'Callable[[], sa.Executable]') -> float:
+    start = time.perf_counter()
+    for _ in range(_ITERATIONS):
+        build()._generate_cache_key()  # noqa: SLF001
+    return (time.perf_counter() - start) / _ITERATIONS
+
+
+async def _fill(db: Database) -> None:
+    async with db.engine.begin() as connection:
+        await connection.execute(
+            sa.insert(User), [{'id': i, 'full_name': f'User {i}'} for i in range(_USERS)]
+        )
+        await connection.execute(
+            sa.insert(Poll),
+            {
+                'id': _POLL_ID,
+                'chat_id': _CHAT_ID,
+                'question': 'bench',
+                'date': _DATE,
+                'status': PollStatus.STARTED,
+            },
+        )
+
+
+async def main() -> None:
+    print('per-call build + cache key:')
+    for name, (build, statement) in _BUILDERS.items():
+        before = _build_overhead(build)
+        after = _build_overhead(lambda statement=statement: statement)
+        print('    %-20s %8.2fus -> %6.2fus' % (name, before * 1e6, after * 1e6))
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        db = Database(path=Path(tmp_dir) / 'bench.db')
+        operations.db = db  # operations are bound to the application database
+        async with db.connect():
+            await db.create_tables(base=Base)
+            await _fill(db)
+            print('statements per second:')
+            for name, (old, new) in _OPERATIONS.items():
+                rates = []
+                for run in (old, new):
+                    samples: list[float] = []
+                    for _ in range(_ITERATIONS // 4 if 'answers' in name else _ITERATIONS):
+                        with stopwatch(samples):
+                            await run(db)
+                    rates.append(len(samples) / sum(samples))
+                print('    %-20s %8.0f/s -> %8.0f/s' % (name, *rates))
+
+
+if __name__ == '__main__':
+    asyncio.run(main())
@@ -0,0 +1,226 @@
+"""Reminders of a poll to users who haven't answered: every non-responder is
+loaded and all reminders are gathered at once, versus `remind_non_responders`
+which reads users page by page and keeps a bounded number of reminders in
+flight.
+
+Telegram is replaced by the fake session of `benchmarks._telegram` which answers
+after a delay, requests go through `OutboundScheduler`. Non-responders are the
+registered users, most of them have answered the previous poll of the chat and
+newcomers have never answered. The peak of traced memory, the most requests in
+flight and the achieved rate of reminders, which must not exceed the rate of the
+scheduler, are reported. Every newcomer with a private chat must be reminded.
+
+    PYTHONPATH=src python -m benchmarks.reminders
+"""
+
+import asyncio
+import datetime
+import os
+import random
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+from typing import TYPE_CHECKING, Any
+
+import sqlalchemy as sa
+from aiogram import Bot, Dispatcher
+from aiogram.methods import SendMessage
+from aiogram.types import Message
+
+from benchmarks import _utils  # noqa: F401  # environment of the benchmarks
+from benchmarks._telegram import TelegramSession
+from isacbot.background import reminders
+from isacbot.database import operations
+from isacbot.database.database import Database
+from isacbot.database.models import Base, Poll, PollAnswers, User
+from isacbot.database.utils import PollOptions, PollStatus
+from isacbot.handlers.private import PRIVATE_USERS
+from isacbot.middlewares import OutboundScheduler
+from isacbot.states import PollSession
+
+
+if TYPE_CHECKING:
+    from collections.abc import Awaitable, Callable
+
+    from aiogram.methods import TelegramMethod
+
+
+_USERS = 20_000
+_NEWCOMERS = range(_USERS + 1, _USERS + 101)  # users without answers, e.g. new members
+_ANSWERED = 0.5
+_PRIVATE = 0.8  # part of users with a private chat with the bot
+_RATE = 2000  # reminders per second, the production rate is `TELEGRAM_RATE`
+_CONCURRENCY = 128  # reminders in flight, enough to reach the rate with the delay
+_REQUEST_DELAY = 0.05  # seconds
+_CHAT_ID = -1000
+_POLL_ID = 2
+_PREVIOUS_POLL_ID = 1  # answered by every user but newcomers
+_DATE = datetime.date(2024, 1, 1)
+
+
+class _SlowSession(TelegramSession):
+    """Answer after a delay and count requests in flight."""
+
+    def __init__(self, dp: Dispatcher) -> None:
+        super().__init__(dp)
+        self.in_flight = self.max_in_flight = 0
+        self.sent: list[float] = []
+        self.recipients: set[int] = set()
+
+    async def make_request(
+        self,
+        bot: Bot,
+        method: 'TelegramMethod[Any]',
+        timeout: int | None = None,  # noqa: ASYNC109  # signature of the session
+    ) -> Any:
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        self.sent.append(time.perf_counter())
+        if isinstance(method, SendMessage):
+            self.recipients.add(int(method.chat_id))
+        try:
+            await asyncio.sleep(_REQUEST_DELAY)
+            return await super().make_request(bot, method, timeout)
+        finally:
+            self.in_flight -= 1
+
+
+async def _fill(db: Database) -> None:
+    options = list(PollOptions)
+    async with db.engine.begin() as connection:
+        await connection.execute(
+            sa.insert(User),
+            [
+                {'id': i, 'full_name': f'User {i}', 'displayname': f'User {i}'}
+                for i in range(1, _NEWCOMERS.stop)
+            ],
+        )
+        await connection.execute(
+            sa.insert(Poll),
+            [
+                {
+                    'id': poll_id,
+                    'chat_id': _CHAT_ID,
+                    'question': 'bench',
+                    'date': date,
+                    'status': status,
+                }
+                for poll_id, date, status in (
+                    (_PREVIOUS_POLL_ID, _DATE - datetime.timedelta(days=1), PollStatus.COMPLETED),
+                    (_POLL_ID, _DATE, PollStatus.STARTED),
+                )
+            ],
+        )
+        await connection.execute(
+            sa.insert(PollAnswers),
+            [
+                {
+                    'user_id': i,
+                    'poll_id': poll_id,
+                    'answer': random.choice(options),
+                    'answered_local_date': _DATE,
+                }
+                for i in range(1, _USERS + 1)
+                for poll_id in (_PREVIOUS_POLL_ID, _POLL_ID)
+                if poll_id == _PREVIOUS_POLL_ID or random.random() < _ANSWERED
+            ],
+        )
+    PRIVATE_USERS.update(i for i in range(1, _USERS + 1) if random.random() < _PRIVATE)
+    PRIVATE_USERS.update(_NEWCOMERS)
+
+
+async def _gather_all(bot: Bot, session: PollSession) -> int:
+    """Load every non-responder and gather all reminders at once."""
+    async with operations.db.session() as db_session:
+        user_ids = (
+            await db_session.scalars(
+                sa.select(User.id).except_(
+                    sa.select(PollAnswers.user_id).where(PollAnswers.poll_id == session.poll_id)
+                )
+            )
+        ).all()
+    recipients = [user_id for user_id in user_ids if user_id in PRIVATE_USERS]
+    send = reminders._send_reminder  # noqa: SLF001
+    await asyncio.gather(
+        *(
+            send(bot=bot, chat_id=session.chat_id, user_id=user_id, text='bench')
+            for user_id in recipients
+        )
+    )
+    return len(recipients)
+
+
+async def _measure(
+    name: str,
+    remind: 'Callable[[Bot, PollSession], Awaitable[int]]',
+    bot: Bot,
+    session: PollSession,
+) -> None:
+    telegram: _SlowSession = bot.session  # type: ignore[assignment]
+    telegram.in_flight = telegram.max_in_flight = 0
+    telegram.sent.clear()
+    telegram.recipients.clear()
+    reminders.POLL_REMINDER_CONCURRENCY = _CONCURRENCY
+    tracemalloc.start()
+    start = time.perf_counter()
+    reminded = await remind(bot, session)
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print(
+        '%-24s reminders=%d in %.2fs (%.0f/s), peak memory=%.1fMiB, most in flight=%d'
+        % (name, reminded, elapsed, reminded / elapsed, peak / 2**20, telegram.max_in_flight)
+    )
+    missed = set(_NEWCOMERS) - telegram.recipients
+    assert not missed, f'{len(missed)} newcomers without answers are not reminded'
+
+
+async def main() -> None:
+    dp = Dispatcher()
+    telegram = _SlowSession(dp)
+    telegram.middleware(OutboundScheduler(rate=_RATE, chat_rate=1, group_rate=20, burst=1))
+    bot = Bot(token=os.environ['BOT_TOKEN'], session=telegram)
+    print(
+        f'{_USERS} users and {len(_NEWCOMERS)} newcomers, {_ANSWERED:.0%} answered, {_PRIVATE:.0%} with private chats, '
+        f'limit {_RATE}/s, {_CONCURRENCY} reminders in flight'
+    )
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        db = Database(path=Path(tmp_dir) / 'bench.db')
+        operations.db = db  # operations are bound to the application database
+        async with db.connect():
+            await db.create_tables(base=Base)
+            await _fill(db)
+            session = PollSession(
+                storage=dp.storage, bot_id=bot.id, chat_id=_CHAT_ID, poll_id=_POLL_ID
+            )
+            session.message = Message.model_validate(
+                telegram.message(
+                    bot,
+                    _CHAT_ID,
+                    poll={
+                        'id': str(_POLL_ID),
+                        'question': 'bench',
+                        'options': [
+                            {'text': option.value, 'voter_count': 0} for option in PollOptions
+                        ],
+                        'total_voter_count': 0,
+                        'is_closed': False,
+                        'is_anonymous': False,
+                        'type': 'regular',
+                        'allows_multiple_answers': False,
+                    },
+                ),
+                context={'bot': bot},
+            )
+            await _measure('gather all', _gather_all, bot, session)
+            await _measure(
+                'remind_non_responders',
+                lambda bot, session: reminders.remind_non_responders(bot=bot, session=session),
+                bot,
+                session,
+            )
+
+
+if __name__ == '__main__':
+    asyncio.run(main())
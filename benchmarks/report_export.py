@@ -0,0 +1,139 @@
+"""Peak RSS of the report export versus the number of answers: the previous
+`Result.all()` -> `DataFrame` -> `pd.ExcelWriter` pipeline against rows streamed
+from `get_poll_answers` into the `service.export` writers.
+
+The peak RSS is `VmHWM` of a process (Linux only), so every export runs in a
+fresh process and the growth over the peak after imports is reported. The
+streamed export is bounded: the writers keep a constant Python heap and SQLite
+caches pages and sorts rows within `cache_size` of the connection, so the growth
+must stay within `_EXPORT_LIMIT_MIB` for any number of rows. The attachment of
+the message is read whole and reported apart, its size is the size of the file.
+
+    PYTHONPATH=src python -m benchmarks.report_export
+"""
+
+import asyncio
+import datetime
+import multiprocessing
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+import pandas as pd
+import sqlalchemy as sa
+
+from benchmarks import _utils  # noqa: F401  # environment of the spawned processes
+from isacbot.database import operations
+from isacbot.database.database import Database
+from isacbot.database.models import Base, Poll, PollAnswers, User
+from isacbot.database.utils import PollOptions, PollStatus
+from isacbot.service.export import write_csv, write_xlsx
+
+
+_ROWS = (10_000, 100_000, 400_000)
+_DATAFRAME_ROWS = 100_000  # the previous pipeline needs GiBs above
+# Page cache and sorter of SQLite, each is capped by `cache_size` (16 MiB) of the
+# connection, over the growth of an export of a few rows (about 7 MiB).
+_EXPORT_LIMIT_MIB = 2 * 16 + 12
+_CHAT_ID = 1
+_POLL_ID = 1
+_DATE = datetime.date(2024, 1, 1)
+_METHODS = ('dataframe', 'xlsx', 'csv')
+
+
+def _peak_rss_mib() -> float:
+    # Unlike `ru_maxrss`, `VmHWM` isn't inherited from the parent process.
+    status = Path('/proc/self/status').read_text()
+    return int(status.split('VmHWM:', maxsplit=1)[1].split()[0]) / 1024  # value in KiB
+
+
+async def _fill(path: Path, rows: int) -> None:
+    db = Database(path=path)
+    options = list(PollOptions)
+    async with db.connect():
+        await db.create_tables(base=Base)
+        async with db.engine.begin() as connection:
+            await connection.execute(
+                sa.insert(User),
+                [{'id': i, 'username': f'user{i}', 'full_name': f'User {i}'} for i in range(rows)],
+            )
+            await connection.execute(
+                sa.insert(Poll),
+                {
+                    'id': _POLL_ID,
+                    'chat_id': _CHAT_ID,
+                    'question': 'bench',
+                    'date': _DATE,
+                    'status': PollStatus.COMPLETED,
+                },
+            )
+            await connection.execute(
+                sa.insert(PollAnswers),
+                [
+                    {
+                        'user_id': i,
+                        'poll_id': _POLL_ID,
+                        'answer': options[i % len(options)],
+                        'answered_local_date': _DATE,
+                    }
+                    for i in range(rows)
+                ],
+            )
+
+
+async def _export(path: str, method: str, report: Path) -> None:
+    db = Database(path=path)
+    operations.db = db  # operations are bound to the application database
+    async with (
+        db.connect(),
+        operations.get_poll_answers(chat_id=_CHAT_ID, poll_id=_POLL_ID, date=_DATE) as answers,
+    ):
+        if method == 'dataframe':
+            frame = pd.DataFrame(await answers.all(), columns=[*answers.keys()])
+            with pd.ExcelWriter(path=report, mode='w') as writer:
+                frame.to_excel(excel_writer=writer, index=False)
+        elif method == 'xlsx':
+            await write_xlsx(path=report, result=answers)
+        else:
+            await write_csv(path=report, result=answers)
+
+
+def _measure(path: str, method: str) -> tuple[float, float, float, int]:
+    """Return the peak RSS after imports, after the export and after the
+    attachment is read, and the size of the attachment.
+    """
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        report = Path(tmp_dir) / f'report.{"csv" if method == "csv" else "xlsx"}'
+        before = _peak_rss_mib()
+        asyncio.run(_export(path, method, report))
+        exported = _peak_rss_mib()
+        attachment = len(report.read_bytes())  # the attachment of the message
+        return before, exported, _peak_rss_mib(), attachment
+
+
+def main() -> None:
+    context = multiprocessing.get_context('spawn')
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        for rows in _ROWS:
+            path = Path(tmp_dir) / f'bench_{rows}.db'
+            asyncio.run(_fill(path, rows))
+            for method in _METHODS:
+                if method == 'dataframe' and rows > _DATAFRAME_ROWS:
+                    continue
+                with ProcessPoolExecutor(max_workers=1, mp_context=context) as executor:
+                    before, exported, peak, attachment = executor.submit(
+                        _measure, str(path), method
+                    ).result()
+                print(
+                    '%-10s rows=%-8d peak RSS=%7.1fMiB export growth=%6.1fMiB '
+                    'attachment=%5.1fMiB growth=%6.1fMiB'
+                    % (method, rows, peak, exported - before, attachment / 2**20, peak - before)
+                )
+                if method != 'dataframe':
+                    assert exported - before <= _EXPORT_LIMIT_MIB, (
+                        f"{method} export of {rows} rows isn't bounded"
+                    )
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,143 @@
+"""Latency of messages of well-behaved users while another user floods the bot:
+the previous `DelayMiddleware(delay=1)` versus `ThrottlingMiddleware` with the
+default limits.
+
+Updates are fed into the dispatcher as tasks, like long polling does. The
+latency of the messages of the well-behaved users and the messages of the
+flood which reached the handler are reported. The buckets are in memory, set
+`BENCH_REDIS_URL` to measure the Redis backend too.
+
+    PYTHONPATH=src python -m benchmarks.throttling
+"""
+
+import asyncio
+import itertools
+import os
+import time
+from typing import TYPE_CHECKING, Any
+
+from aiogram import BaseMiddleware, Bot, Dispatcher, Router
+from aiogram.types import Update
+from redis.asyncio.client import Redis
+
+from benchmarks import _utils  # noqa: F401  # environment of the benchmarks
+from benchmarks._telegram import TelegramSession
+from benchmarks._utils import summary
+from isacbot.config import (
+    THROTTLING_CHAT_BURST,
+    THROTTLING_CHAT_RATE,
+    THROTTLING_USER_BURST,
+    THROTTLING_USER_RATE,
+)
+from isacbot.middlewares import DelayMiddleware, ThrottlingMiddleware
+from isacbot.middlewares.throttling import MemoryThrottlingBackend, RedisThrottlingBackend
+
+
+if TYPE_CHECKING:
+    from aiogram.types import Message
+
+
+_USERS = 50  # well-behaved users
+_USER_INTERVAL = 1.5  # seconds between messages of a well-behaved user
+_FLOOD_RATE = 20  # messages per second of the flooding user
+_DURATION = 6  # seconds
+_HANDLER_TIME = 0.005  # seconds
+_FLOODER_ID = 100_000
+
+
+class _Handled:
+    def __init__(self) -> None:
+        self.samples: list[float] = []
+        self.flood = 0
+
+    def router(self, middleware: BaseMiddleware) -> Router:
+        router = Router()
+        router.message.middleware(middleware)
+
+        @router.message()
+        async def handler(message: 'Message') -> None:
+            await asyncio.sleep(_HANDLER_TIME)
+            if message.chat.id == _FLOODER_ID:
+                self.flood += 1
+            else:
+                self.samples.append(time.perf_counter() - float(message.text or 0))
+
+        return router
+
+
+def _update(bot: Bot, update_id: int, user_id: int) -> Update:
+    user = {'id': user_id, 'is_bot': False, 'first_name': 'bench'}
+    return Update.model_validate(
+        {
+            'update_id': update_id,
+            'message': {
+                'message_id': update_id,
+                'date': int(time.time()),
+                'chat': {**user, 'type': 'private'},
+                'from': user,
+                'text': repr(time.perf_counter()),
+            },
+        },
+        context={'bot': bot},
+    )
+
+
+class _Feeder:
+    """Feed updates into the dispatcher as tasks, like long polling does."""
+
+    def __init__(self, dp: Dispatcher, bot: Bot) -> None:
+        self.dp = dp
+        self.bot = bot
+        self.tasks: set[asyncio.Task[Any]] = set()
+        self._ids = itertools.count(1)
+
+    async def send(self, user_id: int, interval: float) -> None:
+        await asyncio.sleep(interval * user_id / _USERS % interval)  # spread the users
+        start = time.perf_counter()
+        while time.perf_counter() - start < _DURATION:
+            update = _update(self.bot, next(self._ids), user_id)
+            task = asyncio.create_task(self.dp.feed_update(self.bot, update))
+            self.tasks.add(task)
+            task.add_done_callback(self.tasks.discard)
+            await asyncio.sleep(interval)
+
+
+async def _measure(name: str, middleware: BaseMiddleware) -> None:
+    handled = _Handled()
+    dp = Dispatcher()
+    dp.include_router(handled.router(middleware))
+    feeder = _Feeder(dp, Bot(token=os.environ['BOT_TOKEN'], session=TelegramSession(dp)))
+    await asyncio.gather(
+        feeder.send(_FLOODER_ID, 1 / _FLOOD_RATE),
+        *(feeder.send(user_id, _USER_INTERVAL) for user_id in range(1, _USERS + 1)),
+    )
+    await asyncio.gather(*feeder.tasks)
+    print(summary(f'{name}: message', handled.samples))
+    print('    flood messages handled=%d of %d' % (handled.flood, _FLOOD_RATE * _DURATION))
+
+
+def _throttling(backend: MemoryThrottlingBackend | RedisThrottlingBackend) -> BaseMiddleware:
+    return ThrottlingMiddleware(
+        backend=backend,
+        user_rate=THROTTLING_USER_RATE,
+        user_burst=THROTTLING_USER_BURST,
+        chat_rate=THROTTLING_CHAT_RATE,
+        chat_burst=THROTTLING_CHAT_BURST,
+    )
+
+
+async def main() -> None:
+    print(
+        f'{_USERS} users send a message every {_USER_INTERVAL}s, one user sends '
+        f'{_FLOOD_RATE} messages per second, {_DURATION}s'
+    )
+    await _measure('DelayMiddleware', DelayMiddleware(delay=1))
+    await _measure('ThrottlingMiddleware', _throttling(MemoryThrottlingBackend()))
+    if url := os.environ.get('BENCH_REDIS_URL'):
+        redis = Redis.from_url(url)
+        await _measure('ThrottlingMiddleware, Redis', _throttling(RedisThrottlingBackend(redis)))
+        await redis.aclose()
+
+
+if __name__ == '__main__':
+    asyncio.run(main())
@@ -0,0 +1,119 @@
+"""Updates fed through `dp.feed_update` as tasks, like long polling does:
+aiogram's default handling, where every update runs at once, versus the serial
+lanes of `UpdateLanesMiddleware`.
+
+Every user sends a burst of updates, the handler reads a counter from the FSM
+data of the user, waits for the storage round trip and writes it back. The
+throughput, the latency of the updates, the concurrent handlers and the FSM
+writes lost by interleaved updates of the same user are reported.
+
+    PYTHONPATH=src python -m benchmarks.update_lanes
+"""
+
+import asyncio
+import os
+import time
+from typing import TYPE_CHECKING
+
+from aiogram import Bot, Dispatcher, Router
+from aiogram.fsm.storage.memory import MemoryStorage
+from aiogram.types import Update
+
+from benchmarks import _utils  # noqa: F401  # environment of the benchmarks
+from benchmarks._telegram import TelegramSession
+from benchmarks._utils import stopwatch, summary
+from isacbot.config import UPDATES_CONCURRENCY
+from isacbot.middlewares import UpdateLanesMiddleware
+
+
+if TYPE_CHECKING:
+    from aiogram.fsm.context import FSMContext
+    from aiogram.types import Message
+
+
+_USERS = 500
+_BURST = 4  # updates of a user at once, e.g. repeated taps
+_STORAGE_DELAY = 0.002  # seconds, a round trip to the FSM storage
+
+
+class _Handled:
+    def __init__(self) -> None:
+        self.running = 0
+        self.max_running = 0
+
+    def router(self) -> Router:
+        router = Router()
+
+        @router.message()
+        async def handler(message: 'Message', state: 'FSMContext') -> None:  # noqa: ARG001
+            self.running += 1
+            self.max_running = max(self.max_running, self.running)
+            count = await state.get_value('count', 0)
+            await asyncio.sleep(_STORAGE_DELAY)
+            await state.update_data(count=count + 1)
+            self.running -= 1
+
+        return router
+
+
+def _update(bot: Bot, update_id: int, user_id: int) -> Update:
+    user = {'id': user_id, 'is_bot': False, 'first_name': 'bench'}
+    return Update.model_validate(
+        {
+            'update_id': update_id,
+            'message': {
+                'message_id': update_id,
+                'date': int(time.time()),
+                'chat': {**user, 'type': 'private'},
+                'from': user,
+                'text': 'bench',
+            },
+        },
+        context={'bot': bot},
+    )
+
+
+async def _feed(dp: Dispatcher, bot: Bot, update: Update, samples: list[float]) -> None:
+    with stopwatch(samples):
+        await dp.feed_update(bot, update)
+
+
+async def _measure(name: str, lanes: UpdateLanesMiddleware | None) -> None:
+    storage = MemoryStorage()
+    dp = Dispatcher(storage=storage)
+    if lanes:
+        dp.update.outer_middleware(lanes)
+    handled = _Handled()
+    dp.include_router(handled.router())
+    bot = Bot(token=os.environ['BOT_TOKEN'], session=TelegramSession(dp))
+    updates = [
+        _update(bot, update_id, update_id % _USERS + 1) for update_id in range(_USERS * _BURST)
+    ]
+    samples: list[float] = []
+    start = time.perf_counter()
+    await asyncio.gather(*(_feed(dp, bot, update, samples) for update in updates))
+    elapsed = time.perf_counter() - start
+    written = sum(
+        [
+            (await storage.get_data(key)).get('count', 0)
+            for key in [*storage.storage]  # keys of the memory storage
+        ]
+    )
+    print(summary(f'{name}: update', samples))
+    print(
+        '    updates/s=%.0f, max concurrent handlers=%d, lost FSM writes=%d of %d'
+        % (len(updates) / elapsed, handled.max_running, len(updates) - written, len(updates))
+    )
+
+
+async def main() -> None:
+    print(
+        f'{_USERS} users send {_BURST} updates at once, FSM storage round trip '
+        f'{_STORAGE_DELAY}s, concurrency of lanes {UPDATES_CONCURRENCY}'
+    )
+    await _measure('aiogram tasks', lanes=None)
+    await _measure('UpdateLanesMiddleware', lanes=UpdateLanesMiddleware(UPDATES_CONCURRENCY))
+
+
+if __name__ == '__main__':
+    asyncio.run(main())
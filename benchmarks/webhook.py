@@ -0,0 +1,191 @@
+"""Load generator of the webhook: synthetic updates posted to the application of
+`isacbot.webhook` at a constant rate, versus the same updates fetched by long
+polling.
+
+Updates are posted over at most `_CONNECTIONS` connections, like Telegram does
+by default. For long polling `getUpdates` is answered by the fake session of
+`benchmarks._telegram` after the round trip to Telegram. The handler of the
+updates takes `_HANDLER_TIME`. The requests per second, the latency of the
+webhook answers and the latency from the update to the end of its handler are
+reported. Set `BENCH_RATE` to change the rate of the updates.
+
+    PYTHONPATH=src python -m benchmarks.webhook
+"""
+
+import asyncio
+import json
+import os
+import time
+from typing import TYPE_CHECKING, Any
+
+import aiohttp
+from aiogram import Bot, Dispatcher, Router
+from aiogram.methods import GetUpdates
+from aiohttp import web
+
+from benchmarks import _utils  # noqa: F401  # environment of the benchmarks
+from benchmarks._telegram import TelegramSession
+from benchmarks._utils import stopwatch, summary
+from isacbot.webhook import create_app
+
+
+if TYPE_CHECKING:
+    from collections.abc import AsyncGenerator
+
+    from aiogram.methods import TelegramMethod
+    from aiogram.types import Message
+
+
+_RATE = float(os.environ.get('BENCH_RATE') or 500)  # updates per second
+_DURATION = 5  # seconds
+_CONNECTIONS = 40  # default `max_connections` of `setWebhook`
+_MAX_IN_FLIGHT = 100
+_HANDLER_TIME = 0.01  # seconds
+_ROUND_TRIP = 0.05  # seconds, to Telegram and back
+_PATH = '/webhook'
+_SECRET = 'bench'  # noqa: S105  # the server is local
+
+
+class _Handled:
+    """Latency from the update to the end of its handler."""
+
+    def __init__(self, updates: int) -> None:
+        self.samples: list[float] = []
+        self.updates = updates
+        self.done = asyncio.Event()
+
+    def router(self) -> Router:
+        router = Router()
+
+        @router.message()
+        async def handler(message: 'Message') -> None:
+            await asyncio.sleep(_HANDLER_TIME)
+            self.samples.append(time.perf_counter() - float(message.text or 0))
+            if len(self.samples) == self.updates:
+                self.done.set()
+
+        return router
+
+
+class _PollingSession(TelegramSession):
+    """Answer `getUpdates` with the pending updates after the round trip."""
+
+    def __init__(self, dp: Dispatcher) -> None:
+        super().__init__(dp)
+        self.pending: list[dict[str, Any]] = []
+        self.posted = asyncio.Event()
+
+    async def make_request(
+        self,
+        bot: Bot,
+        method: 'TelegramMethod[Any]',
+        timeout: int | None = None,  # noqa: ASYNC109  # signature of the session
+    ) -> Any:
+        if not isinstance(method, GetUpdates):
+            return await super().make_request(bot, method, timeout)
+        self.calls['getUpdates'] = self.calls.get('getUpdates', 0) + 1
+        await asyncio.sleep(_ROUND_TRIP / 2)
+        await self.posted.wait()
+        limit = method.limit or 100
+        updates, self.pending = self.pending[:limit], self.pending[limit:]
+        if not self.pending:
+            self.posted.clear()
+        await asyncio.sleep(_ROUND_TRIP / 2)
+        content = json.dumps({'ok': True, 'result': updates})
+        return self.check_response(bot=bot, method=method, status_code=200, content=content).result
+
+
+def _update(update_id: int) -> dict[str, Any]:
+    user = {'id': update_id % 1000 + 1, 'is_bot': False, 'first_name': 'bench'}
+    return {
+        'update_id': update_id,
+        'message': {
+            'message_id': update_id,
+            'date': int(time.time()),
+            'chat': {**user, 'type': 'private'},
+            'from': user,
+            'text': repr(time.perf_counter()),
+        },
+    }
+
+
+async def _at_rate(updates: int) -> 'AsyncGenerator[int]':
+    """Yield numbers of the updates at `_RATE` per second."""
+    start = time.perf_counter()
+    for update_id in range(1, updates + 1):
+        await asyncio.sleep(max(0.0, start + update_id / _RATE - time.perf_counter()))
+        yield update_id
+
+
+async def _webhook(updates: int) -> None:
+    handled = _Handled(updates)
+    dp = Dispatcher()
+    dp.include_router(handled.router())
+    bot = Bot(token=os.environ['BOT_TOKEN'], session=TelegramSession(dp))
+    runner = web.AppRunner(
+        create_app(dp, bot, path=_PATH, secret_token=_SECRET, max_in_flight=_MAX_IN_FLIGHT)
+    )
+    await runner.setup()
+    site = web.TCPSite(runner, host='127.0.0.1', port=0)
+    await site.start()
+    url = f'http://127.0.0.1:{runner.addresses[0][1]}{_PATH}'
+    answers: list[float] = []
+    async with aiohttp.ClientSession(
+        connector=aiohttp.TCPConnector(limit=_CONNECTIONS),
+        headers={'X-Telegram-Bot-Api-Secret-Token': _SECRET},
+    ) as client:
+
+        async def post(update_id: int) -> None:
+            with stopwatch(answers):
+                async with client.post(url, json=_update(update_id)) as response:
+                    response.raise_for_status()
+
+        start = time.perf_counter()
+        tasks = [asyncio.create_task(post(update_id)) async for update_id in _at_rate(updates)]
+        await asyncio.gather(*tasks)
+        elapsed = time.perf_counter() - start
+        async with client.get(url.replace(_PATH, '/ready')) as response:
+            ready = response.status
+    await handled.done.wait()
+    await runner.cleanup()
+    print(summary('webhook: answer', answers))
+    print(summary('webhook: update handled', handled.samples))
+    print('    requests/s=%.0f, /ready=%d' % (updates / elapsed, ready))
+
+
+async def _polling(updates: int) -> None:
+    handled = _Handled(updates)
+    dp = Dispatcher()
+    dp.include_router(handled.router())
+    telegram = _PollingSession(dp)
+    bot = Bot(token=os.environ['BOT_TOKEN'], session=telegram)
+    polling = asyncio.create_task(
+        dp.start_polling(bot, handle_signals=False, close_bot_session=False)
+    )
+    start = time.perf_counter()
+    async for update_id in _at_rate(updates):
+        telegram.pending.append(_update(update_id))
+        telegram.posted.set()
+    await handled.done.wait()
+    elapsed = time.perf_counter() - start
+    await dp.stop_polling()
+    await polling
+    print(summary('polling: update handled', handled.samples))
+    print(
+        '    updates/s=%.0f, getUpdates calls=%d'
+        % (updates / elapsed, telegram.calls.get('getUpdates', 0))
+    )
+
+
+async def main() -> None:
+    updates = int(_RATE * _DURATION)
+    print(
+        f'{updates} updates at {_RATE:g}/s, handler takes {_HANDLER_TIME}s, '
+        f'round trip to Telegram {_ROUND_TRIP}s'
+    )
+    await _webhook(updates)
+    await _polling(updates)
+
+
+if __name__ == '__main__':
+    asyncio.run(main())
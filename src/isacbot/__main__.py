@@ -4,14 +4,20 @@ from aiogram.utils.i18n.middleware import (
     FSMI18nMiddleware,
 )
 
-from isacbot.background.tasks import create_poll_in_chat
+from isacbot.background.answer_queue import answer_queue
+from isacbot.background.live_results import live_results
+from isacbot.background.tasks import create_polls_in_chats, restore_polls
 from isacbot.commands import get_commands
 from isacbot.config import (
     BOT_ADMINS,
     BOT_MAIN_CHAT_ID,
     BOT_OWNER_ID,
+    BOT_POLL_CHAT_IDS,
     BOT_TIMEZONE,
+    BOT_WEBHOOK_URL,
 )
+from isacbot.database.buffer import answer_buffer
+from isacbot.database.migrations import MIGRATIONS
 from isacbot.database.models import Base
 from isacbot.extensions import (
     CronTrigger,
@@ -25,12 +31,15 @@ from isacbot.extensions import (
 from isacbot.handlers import admin, group, poll, private, road_map, settings, start
 from isacbot.middlewares import (
     BlockCallbackFromOldMessageMiddleware,
-    DelayMiddleware,
     EventFromUserMiddleware,
+    ForgetChatMemberOuterMiddleware,
     UnhandledUpdatesLoggerMiddleware,
 )
-from isacbot.states import PollContext
+from isacbot.middlewares.lanes import update_lanes
+from isacbot.middlewares.outbound import outbound_scheduler
+from isacbot.middlewares.throttling import throttling_middleware
 from isacbot.utils import N_, send_message
+from isacbot.webhook import run_webhook
 
 
 async def set_commands() -> None:
@@ -51,13 +60,13 @@ async def add_admins_from_main_chat() -> None:
 
 async def start_scheduler() -> None:
     scheduler.start()
-    scheduler.add_job(  # Add poll creation on every Monday an 8:00
+    scheduler.add_job(  # Add poll creation in all poll chats on every Monday an 8:00
         id='main_chat_poll_every_monday_id',
         name='main_chat_poll_every_monday',
         replace_existing=True,
         misfire_grace_time=None,
-        func=create_poll_in_chat,
-        kwargs={'chat_id': BOT_MAIN_CHAT_ID},
+        func=create_polls_in_chats,
+        kwargs={'chat_ids': list(BOT_POLL_CHAT_IDS)},
         trigger=CronTrigger(day_of_week='mon', hour='8', minute='00', timezone=BOT_TIMEZONE),
     )
 
@@ -65,6 +74,10 @@ async def start_scheduler() -> None:
 async def start_bot() -> None:
     await set_commands()
     await add_admins_from_main_chat()
+    answer_buffer.start()
+    answer_queue.start()
+    live_results.start()
+    await restore_polls()  # before the scheduler runs jobs which close the polls
     await start_scheduler()
     await send_message(
         bot=bot,
@@ -74,6 +87,9 @@ async def start_bot() -> None:
 
 
 async def stop_bot() -> None:
+    await answer_queue.stop()
+    await live_results.stop()
+    await answer_buffer.stop()
     await send_message(
         bot=bot,
         chat_id=BOT_OWNER_ID,
@@ -88,11 +104,15 @@ async def main() -> None:
         # Perform database preparation.
         await db.create_database()
         await db.create_tables(base=Base)
+        await db.migrate(migrations=MIGRATIONS)
         # Register middleware.
-        group.router.message.middleware(DelayMiddleware(delay=1))
-        poll.router.message.middleware(DelayMiddleware(delay=1))
-        private.router.message.middleware(DelayMiddleware(delay=1))
+        bot.session.middleware(outbound_scheduler)  # keep requests within Telegram limits
+        # Drop floods of messages, the buckets are shared by the routers.
+        group.router.message.middleware(throttling_middleware)
+        poll.router.message.middleware(throttling_middleware)
+        private.router.message.middleware(throttling_middleware)
         # message.router.chat_member.filter(F.chat.id == config.main_chat_id)  # set default router to main chat only
+        dp.update.outer_middleware(update_lanes)  # first, updates of a user are handled one by one
         dp.update.outer_middleware(
             FSMI18nMiddleware(i18n=i18n)
         )  # include internationalization middleware
@@ -101,6 +121,8 @@ async def main() -> None:
         )  # provide user_id and language_code into handlers
         dp.update.outer_middleware(UnhandledUpdatesLoggerMiddleware())  # log all unhandled events
         dp.callback_query.outer_middleware(BlockCallbackFromOldMessageMiddleware())
+        dp.chat_member.outer_middleware(ForgetChatMemberOuterMiddleware())  # drop stale members
+        dp.my_chat_member.outer_middleware(ForgetChatMemberOuterMiddleware())
         # Register routers and their handlers. Order matters.
         dp.include_routers(
             start.router,
@@ -119,6 +141,10 @@ async def main() -> None:
         dp.startup.register(callback=start_bot)
         dp.shutdown.register(callback=stop_bot)
 
+        if BOT_WEBHOOK_URL:  # updates are posted by Telegram, pending updates are dropped
+            async with bot.session:
+                await run_webhook(dp, bot, admins=BOT_ADMINS)
+            return
         async with bot.session:  # clear all updates that were made during the moments of inactivity
             await bot.delete_webhook(drop_pending_updates=True)
             await dp.start_polling(
@@ -126,7 +152,6 @@ async def main() -> None:
                 allowed_updates=dp.resolve_used_update_types(),
                 close_bot_session=True,
                 admins=BOT_ADMINS,
-                poll_context=PollContext,
             )
 
 
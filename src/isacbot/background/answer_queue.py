@@ -0,0 +1,162 @@
+import asyncio
+import collections
+import logging
+import time
+from typing import TYPE_CHECKING
+
+from aiogram import html
+from aiogram.utils.i18n import gettext as _
+
+from isacbot.background.live_results import live_results
+from isacbot.config import POLL_ANSWER_QUEUE_SIZE, POLL_ANSWER_WORKERS
+from isacbot.database.buffer import answer_buffer
+from isacbot.database.operations import ensure_user
+from isacbot.extensions import i18n
+from isacbot.metrics import METRICS, SIZE_BUCKETS
+from isacbot.middlewares.outbound import background_requests
+
+
+if TYPE_CHECKING:
+    from asyncio import Queue, Task
+
+    from aiogram import Bot
+    from aiogram.types import User
+
+    from isacbot.database.utils import PollOptions
+    from isacbot.states import PollSession
+
+
+logger = logging.getLogger(__name__)
+
+
+class QueuedAnswer:
+    """Validated answer of the user to the running poll."""
+
+    __slots__ = ('answer', 'bot', 'locale', 'queued_at', 'session', 'user')
+
+    def __init__(
+        self, bot: 'Bot', session: 'PollSession', user: 'User', answer: 'PollOptions', locale: str
+    ) -> None:
+        self.bot = bot
+        self.session = session
+        self.user = user
+        self.answer = answer
+        self.locale = locale  # the locale of the update, workers have no i18n context
+        self.queued_at = time.perf_counter()
+
+
+class AnswerQueue:
+    """Bounded ingestion stage of poll answers.
+
+    Every worker consumes its own bounded queue and the queue of an answer is
+    chosen by the user, so answers of a user are processed in order and the
+    last vote wins. A worker registers the user, asks unregistered users to
+    register and adds the answer to `answer_buffer`, so slow Telegram calls
+    don't hold up the dispatcher. When a queue is full `put` waits, which holds
+    up the update instead of growing the queue.
+    """
+
+    def __init__(self, *, workers: int, size: int) -> None:
+        self._queues: tuple[Queue[QueuedAnswer], ...] = tuple(
+            asyncio.Queue(maxsize=size) for _ in range(workers)
+        )
+        self._pending: collections.Counter[PollSession] = collections.Counter()
+        self._processed = asyncio.Condition()
+        self._tasks: list[Task] = []
+
+    def __len__(self) -> int:
+        return sum(queue.qsize() for queue in self._queues)
+
+    async def put(
+        self, bot: 'Bot', session: 'PollSession', user: 'User', answer: 'PollOptions'
+    ) -> None:
+        queue = self._queues[user.id % len(self._queues)]
+        if queue.full():
+            METRICS.inc('answer_queue.full')
+        self._pending[session] += 1
+        await queue.put(
+            QueuedAnswer(
+                bot=bot, session=session, user=user, answer=answer, locale=i18n.current_locale
+            )
+        )
+        METRICS.observe('answer_queue.depth', len(self), buckets=SIZE_BUCKETS)
+
+    async def wait(self, session: 'PollSession') -> None:
+        """Wait until all queued answers of the poll are processed."""
+        async with self._processed:
+            await self._processed.wait_for(lambda: not self._pending[session])
+
+    async def _process(self, item: QueuedAnswer) -> None:
+        # Register the user even though the user is anonymous, or refresh the
+        # registered user names.
+        db_user, created = await ensure_user(
+            user_id=item.user.id,
+            username=item.user.username,
+            full_name=item.user.full_name,
+        )
+        if created:
+            logger.debug('User is not registered in the database.')
+        if not db_user or not db_user.displayname:
+            await self._ask_to_register(item)
+        await answer_buffer.add(
+            user_id=item.user.id, poll_id=item.session.poll_id, answer=item.answer
+        )
+        live_results.mark(item.session)
+
+    async def _ask_to_register(self, item: QueuedAnswer) -> None:
+        if not (poll_message := item.session.message):
+            return
+        try:
+            with i18n.context(), i18n.use_locale(item.locale):
+                text = _(
+                    '⚠️ Уважаемый(ая) {full_name}, для регистрации воспользуйтесь командой {command} в приватном чате со мной.'
+                ).format(
+                    full_name=html.bold(item.user.full_name),
+                    command=html.link(
+                        value='/start',
+                        link=f'https://t.me/{(await item.bot.get_me()).username}?start=start',
+                    ),
+                )
+            await item.bot.send_message(
+                chat_id=poll_message.chat.id,
+                message_thread_id=poll_message.message_thread_id,
+                message_effect_id=poll_message.effect_id,
+                text=text,
+            )
+        except Exception:
+            logger.exception("Can't ask user %d to register." % item.user.id)
+
+    async def _work(self, queue: 'Queue[QueuedAnswer]') -> None:
+        with background_requests():
+            await self._consume(queue)
+
+    async def _consume(self, queue: 'Queue[QueuedAnswer]') -> None:
+        while True:
+            item = await queue.get()
+            try:
+                await self._process(item)
+            except Exception:
+                logger.exception('Error while processing the answer of user %d.' % item.user.id)
+            finally:
+                queue.task_done()
+                METRICS.observe('answer_queue.lag', time.perf_counter() - item.queued_at)
+                async with self._processed:
+                    self._pending[item.session] -= 1
+                    if not self._pending[item.session]:
+                        del self._pending[item.session]
+                        self._processed.notify_all()
+
+    def start(self) -> None:
+        if not self._tasks:
+            self._tasks = [asyncio.create_task(self._work(queue)) for queue in self._queues]
+
+    async def stop(self) -> None:
+        """Process the queued answers and stop the workers."""
+        await asyncio.gather(*(queue.join() for queue in self._queues))
+        for task in self._tasks:
+            task.cancel()
+        self._tasks = []
+        logger.info('Answer queue stopped.')
+
+
+answer_queue = AnswerQueue(workers=POLL_ANSWER_WORKERS, size=POLL_ANSWER_QUEUE_SIZE)
@@ -0,0 +1,142 @@
+import asyncio
+import contextlib
+import logging
+from typing import TYPE_CHECKING
+
+from isacbot.config import POLL_LIVE_RESULTS_INTERVAL
+from isacbot.database.buffer import answer_buffer
+from isacbot.database.operations import get_poll_tally
+from isacbot.errors import TelegramBadRequest, TelegramRetryAfter
+from isacbot.extensions import i18n
+from isacbot.metrics import METRICS
+from isacbot.middlewares.outbound import background_requests
+from isacbot.utils import N_, format_poll_tally
+
+
+if TYPE_CHECKING:
+    from asyncio import Task
+
+    from isacbot.states import PollSession
+
+
+logger = logging.getLogger(__name__)
+
+
+class LiveResults:
+    """Debounced live results messages of running polls.
+
+    An answer only marks its poll as changed. Every `interval` seconds the
+    results of the changed polls are rendered from the poll tally and their
+    messages are edited, so a chat gets at most one edit per interval however
+    many answers arrive, and no edit at all when the text is the same.
+    """
+
+    def __init__(self, *, interval: float) -> None:
+        self.interval = interval
+        self._changed: set[PollSession] = set()
+        self._texts: dict[PollSession, str] = {}  # last published text of every poll
+        self._lock = asyncio.Lock()  # edits of a message are never reordered
+        self._task: Task | None = None
+
+    async def open(self, session: 'PollSession') -> None:
+        """Send and pin the results message next to the poll message."""
+        if not session.message:
+            return
+        text = await self._render(session)
+        session.results_message = await session.message.answer(
+            text=text, parse_mode=None, disable_notification=True
+        )
+        self._texts[session] = text
+        self._changed.add(session)  # answers may arrive while the message is sent
+        await session.save(results_message=session.results_message.model_dump_json())
+        try:
+            await session.results_message.pin(disable_notification=True)
+        except TelegramBadRequest as e:
+            logger.warning('Results of %r are not pinned: %s' % (session, e))
+
+    def mark(self, session: 'PollSession') -> None:
+        """Mark the results of the poll as changed by a new answer."""
+        if session.results_message:
+            self._changed.add(session)
+
+    async def publish(self) -> None:
+        """Edit results messages of all changed polls."""
+        async with self._lock:
+            if not self._changed:
+                return
+            changed, self._changed = self._changed, set()
+            try:
+                await answer_buffer.flush()  # results include answers which are not saved yet
+                await asyncio.gather(*(self._publish(session) for session in changed))
+            except asyncio.CancelledError:
+                self._changed |= changed  # published again, unchanged texts are skipped
+                raise
+
+    async def close(self, session: 'PollSession') -> None:
+        """Publish the final results of the poll and unpin its results message.
+        Answers must be flushed by the caller.
+        """
+        async with self._lock:
+            if session.results_message:
+                await self._publish(session, final=True)
+                try:
+                    await session.results_message.unpin()
+                except TelegramBadRequest as e:
+                    logger.warning('Results of %r are not unpinned: %s' % (session, e))
+            self._changed.discard(session)
+            self._texts.pop(session, None)
+
+    async def _render(self, session: 'PollSession', *, final: bool = False) -> str:
+        tally = await get_poll_tally(poll_id=session.poll_id)
+        question = session.message.poll.question if session.message and session.message.poll else ''
+        with i18n.context():  # outside of handlers there is no i18n context
+            header = i18n.gettext(N_('📊 Итоги опроса') if final else N_('📊 Промежуточные итоги'))
+            return f'{header}\n{question}\n\n{format_poll_tally(tally)}'
+
+    async def _publish(self, session: 'PollSession', *, final: bool = False) -> None:
+        if not session.results_message:
+            return
+        text = await self._render(session, final=final)
+        if text == self._texts.get(session):
+            METRICS.inc('live_results.skipped')
+            return
+        try:
+            await session.results_message.edit_text(text=text, parse_mode=None)
+        except TelegramRetryAfter as e:
+            logger.warning(
+                'Results of %r are not edited, retry after %ds.' % (session, e.retry_after)
+            )
+            self._changed.add(session)  # edited by one of the next publications
+            return
+        except TelegramBadRequest as e:
+            if 'message is not modified' not in e.message:  # e.g. first edit after a restart
+                logger.warning('Results of %r are not edited: %s' % (session, e))
+                return
+        self._texts[session] = text
+        METRICS.inc('live_results.edits')
+
+    async def _publish_periodically(self) -> None:
+        while True:
+            await asyncio.sleep(self.interval)
+            try:
+                with background_requests():
+                    await self.publish()
+            except Exception:
+                logger.exception('Error while publishing live results of polls.')
+
+    def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.create_task(self._publish_periodically())
+
+    async def stop(self) -> None:
+        """Stop periodic publishing and publish the remaining changes."""
+        if self._task is not None:
+            self._task.cancel()
+            with contextlib.suppress(asyncio.CancelledError):
+                await self._task  # a publication in progress keeps its changes
+            self._task = None
+        await self.publish()
+        logger.info('Live results stopped.')
+
+
+live_results = LiveResults(interval=POLL_LIVE_RESULTS_INTERVAL)
@@ -0,0 +1,103 @@
+import asyncio
+import logging
+from typing import TYPE_CHECKING
+
+from aiogram.utils.chat_member import MEMBERS
+
+from isacbot.config import BOT_REPORT_CHAT_IDS, POLL_REMINDER_CONCURRENCY
+from isacbot.database.buffer import answer_buffer
+from isacbot.database.operations import get_non_responders
+from isacbot.errors import TelegramBadRequest, TelegramForbiddenError
+from isacbot.extensions import i18n
+from isacbot.filters import get_chat_member
+from isacbot.handlers.private import PRIVATE_USERS
+from isacbot.metrics import METRICS
+from isacbot.middlewares.outbound import background_requests
+from isacbot.utils import N_
+
+
+if TYPE_CHECKING:
+    from collections.abc import AsyncIterator
+
+    from aiogram import Bot
+
+    from isacbot.states import PollSession
+
+
+logger = logging.getLogger(__name__)
+
+
+async def iter_non_responders(poll_id: int, page_size: int = 500) -> 'AsyncIterator[int]':
+    """Iterate over registered users who haven't answered the poll, one page at a time."""
+    after = 0
+    while page := await get_non_responders(poll_id=poll_id, after=after, limit=page_size):
+        for user_id in page:
+            yield user_id
+        after = page[-1]
+
+
+async def _is_member(bot: 'Bot', chat_id: int, user_id: int) -> bool:
+    """Check the user is a member of the poll chat, registered users are members
+    of any chat with polls. Members are cached, see `get_chat_member`.
+    """
+    if len(BOT_REPORT_CHAT_IDS) == 1:
+        return True
+    try:
+        return isinstance(await get_chat_member(bot=bot, chat_id=chat_id, user_id=user_id), MEMBERS)
+    except TelegramBadRequest:  # e.g. the user was never in the chat
+        return False
+
+
+async def _send_reminder(bot: 'Bot', chat_id: int, user_id: int, text: str) -> None:
+    """Send the reminder to a member of the poll chat, the rate limits of Telegram
+    are kept by `OutboundScheduler`.
+    """
+    try:
+        if not await _is_member(bot=bot, chat_id=chat_id, user_id=user_id):
+            METRICS.inc('reminders.not_member')
+            return
+        await bot.send_message(chat_id=user_id, text=text, parse_mode=None)
+    except TelegramForbiddenError:
+        PRIVATE_USERS.discard(user_id)  # the user has blocked the bot
+        METRICS.inc('reminders.forbidden')
+    except Exception:
+        logger.exception("Can't send reminder to %d." % user_id)
+        METRICS.inc('reminders.failed')
+    else:
+        METRICS.inc('reminders.sent')
+
+
+async def remind_non_responders(bot: 'Bot', session: 'PollSession') -> int:
+    """Send a private reminder to every registered member of the poll chat who
+    hasn't answered the poll and has a private chat with the bot. Users are read
+    page by page and at most `POLL_REMINDER_CONCURRENCY` reminders are sent at
+    once, so the memory doesn't depend on the number of users. Return the number
+    of reminders.
+    """
+    if not session.message or not session.message.poll:
+        return 0
+    await answer_buffer.flush()  # users who have just answered aren't reminded
+    with i18n.context():  # outside of handlers there is no i18n context
+        text = i18n.gettext(
+            N_('⏰ Вы ещё не ответили на опрос «{question}» в чате {chat}.')
+        ).format(question=session.message.poll.question, chat=session.message.chat.full_name)
+
+    slots = asyncio.Semaphore(POLL_REMINDER_CONCURRENCY)
+    tasks: set[asyncio.Task[None]] = set()
+    reminded = 0
+    with background_requests():  # reminders yield to replies of handlers
+        async for user_id in iter_non_responders(poll_id=session.poll_id):
+            if user_id not in PRIVATE_USERS:
+                METRICS.inc('reminders.skipped')
+                continue
+            await slots.acquire()
+            task = asyncio.create_task(
+                _send_reminder(bot=bot, chat_id=session.chat_id, user_id=user_id, text=text)
+            )
+            tasks.add(task)
+            task.add_done_callback(tasks.discard)
+            task.add_done_callback(lambda _: slots.release())
+            reminded += 1
+        await asyncio.gather(*tasks)
+    logger.info('%d users are reminded of %r.' % (reminded, session))
+    return reminded
@@ -1,41 +1,95 @@
-from typing import TYPE_CHECKING, Any
+import asyncio
+import datetime
+import logging
+from typing import TYPE_CHECKING
 
-from isacbot.commands import ISACBotCommand
+from aiogram.types import Message
+
+from isacbot.background.reminders import remind_non_responders
+from isacbot.config import BOT_TIMEZONE, POLL_DEFAULT_CLOSE_DELAY
+from isacbot.database.operations import get_polls, update_poll_status
+from isacbot.database.utils import PollStatus
+from isacbot.errors import PollAlreadyExistError
 from isacbot.extensions import bot, dp
 from isacbot.handlers import poll
-from isacbot.middlewares.poll import PollCreationMessageInnerMiddleware
-from isacbot.states import PollContext, get_fsm_context
+from isacbot.service.poll import poll_service, schedule_poll_close
+from isacbot.states import poll_sessions
 
 
 if TYPE_CHECKING:
-    from aiogram.types import Message
+    from collections.abc import Iterable
+
+
+logger = logging.getLogger(__name__)
 
 
 async def create_poll_in_chat(chat_id: int) -> None:
-    """Create a poll in the chat using bot.
+    """Open the poll of today in the chat, the same poll as `/create_poll` does."""
+    date = datetime.datetime.now(tz=BOT_TIMEZONE).date()
+    try:
+        await poll_service.open_poll(
+            chat_id=chat_id, date=date, close_delay=POLL_DEFAULT_CLOSE_DELAY
+        )
+    except PollAlreadyExistError:
+        logger.warning('Poll on the %s already exists in chat %d.' % (f'{date:%d.%m.%Y}', chat_id))
+
+
+async def create_polls_in_chats(chat_ids: 'Iterable[int]') -> None:
+    """Create polls in all chats at once, every poll runs in its own session."""
+    await asyncio.gather(*(create_poll_in_chat(chat_id=chat_id) for chat_id in chat_ids))
 
-    Fully emulate the creation of a poll by a user using bot.
+
+async def close_poll_in_chat(chat_id: int, poll_id: int) -> None:
+    """Close the poll, the job is scheduled by `schedule_poll_close`."""
+    if not (session := poll_sessions.get(chat_id=chat_id, poll_id=poll_id)):
+        logger.warning('Poll %d in chat %d is not running.' % (poll_id, chat_id))
+        return
+    await poll.close_poll(bot=bot, session=session)
+
+
+async def remind_poll_in_chat(chat_id: int, poll_id: int) -> None:
+    """Remind users who haven't answered the poll, the job is scheduled by
+    `schedule_poll_close`.
     """
+    if (
+        not (session := poll_sessions.get(chat_id=chat_id, poll_id=poll_id))
+        or not session.accepts_answers
+    ):
+        logger.warning('Poll %d in chat %d is not running.' % (poll_id, chat_id))
+        return
+    await remind_non_responders(bot=bot, session=session)
 
-    async def _crete_poll_handler_coro(message: 'Message', data: dict[str, Any]) -> None:
-        """Async function to provide `crete_poll_handler` as the callabale coroutine."""
-        await poll.crete_poll_handler(message, **data)
-
-    message: Message = await bot.send_message(
-        chat_id=chat_id,
-        text=f'/{ISACBotCommand.CREATE_POLL}',
-    )
-    await PollCreationMessageInnerMiddleware().__call__(
-        handler=_crete_poll_handler_coro,
-        event=message,
-        data={
-            'bot': bot,
-            'poll_context': PollContext,
-            'state': get_fsm_context(
-                storage=dp.storage,
-                bot_id=bot.id,
-                chat_id=message.chat.id,
-                user_id=bot.id,
-            ),
-        },
-    )
+
+async def restore_polls() -> None:
+    """Restore sessions of polls which were running before the restart from the
+    `PollStatus.STARTED` polls and their FSM contexts, and reschedule closing of
+    the polls. Polls which should have been closed during the downtime are closed
+    as soon as the scheduler is started.
+    """
+    for started_poll in await get_polls(status=PollStatus.STARTED):
+        session = poll_sessions.open(
+            storage=dp.storage,
+            bot_id=bot.id,
+            chat_id=started_poll.chat_id,
+            poll_id=started_poll.id,
+        )
+        data = await session.load()
+        if not (poll_message_json := data.get('poll_message')):
+            # The poll can't be stopped and unpinned without its message.
+            logger.warning('Poll message of %r is lost, poll is completed.' % session)
+            await update_poll_status(poll_id=started_poll.id, status=PollStatus.COMPLETED)
+            await poll_sessions.close(session)
+            continue
+        session.restore(data)
+        poll_sessions.activate(
+            session, message=Message.model_validate_json(poll_message_json).as_(bot)
+        )
+        if results_message_json := data.get('results_message'):
+            session.results_message = Message.model_validate_json(results_message_json).as_(bot)
+        close_at = (
+            datetime.datetime.fromisoformat(data['close_at'])
+            if 'close_at' in data
+            else datetime.datetime.now(tz=datetime.UTC)  # created before close time was stored
+        )
+        schedule_poll_close(session=session, close_at=close_at)
+        logger.info('%r restored, closes at %s.' % (session, close_at.isoformat()))
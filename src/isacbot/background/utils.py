@@ -28,11 +28,11 @@ async def _delay_task(
 
 async def create_delayed_background_task(
     *, task: 'Callable[[], Awaitable[Any]]', delay: int, **kwargs: Any
-) -> 'Awaitable[Any]':
+) -> 'Task[Any]':
     """Create delayed background task using `asyncio.sleep` and don't block
     current event loop.
     """
-    background_task: Task = asyncio.create_task(_delay_task(task=task, delay=delay, **kwargs))
+    background_task: Task[Any] = asyncio.create_task(_delay_task(task=task, delay=delay, **kwargs))
     # The log message not only means that the task has been scheduled,
     # but also that it can be completed because it is already running.
     logger.debug('%s scheduled for %d seconds.' % (background_task.get_name(), delay))
@@ -0,0 +1,52 @@
+import enum
+import time
+from collections import OrderedDict
+from typing import Final
+
+from isacbot.metrics import METRICS
+
+
+class _Missing(enum.Enum):
+    MISSING = enum.auto()
+
+
+MISSING: Final = _Missing.MISSING  # allows to cache `None` values
+
+
+class TTLCache[K, V]:
+    """In-process LRU cache where every entry expires after `ttl` seconds.
+
+    Hits and misses are counted in `METRICS` as `<name>.hits` and `<name>.misses`.
+    """
+
+    __slots__ = ('_data', 'maxsize', 'name', 'ttl')
+
+    def __init__(self, *, name: str, maxsize: int, ttl: float) -> None:
+        self.name = name
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data: OrderedDict[K, tuple[float, V]] = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def get(self, key: K) -> V | _Missing:
+        if (item := self._data.get(key)) is None or item[0] < time.monotonic():
+            self._data.pop(key, None)
+            METRICS.inc(f'{self.name}.misses')
+            return MISSING
+        self._data.move_to_end(key)
+        METRICS.inc(f'{self.name}.hits')
+        return item[1]
+
+    def set(self, key: K, value: V) -> None:
+        self._data[key] = (time.monotonic() + self.ttl, value)
+        self._data.move_to_end(key)
+        if len(self._data) > self.maxsize:
+            self._data.popitem(last=False)  # least recently used
+
+    def pop(self, key: K) -> None:
+        self._data.pop(key, None)
+
+    def clear(self) -> None:
+        self._data.clear()
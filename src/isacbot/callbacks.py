@@ -28,9 +28,27 @@ class SettingsAction(enum.StrEnum):
     CHANGE_EMAIL = N_('📧 [Изменить email]')
 
 
+class SendPollAction(enum.StrEnum):
+    CHOOSE = enum.auto()
+    NEWER = enum.auto()  # values are short to fit the callback data limit of 64 bytes
+    OLDER = enum.auto()
+
+
+class SendPollChatCallback(CallbackData, prefix='send-poll-chat'):
+    """Chosen chat which polls are listed."""
+
+    chat_id: int
+
+
 class SendPollCallback(CallbackData, prefix='send-poll'):
+    """Chosen poll of the chat or the page cursor, which is the first (`NEWER`) or
+    the last (`OLDER`) poll of the current page.
+    """
+
+    action: SendPollAction = SendPollAction.CHOOSE
     poll_id: int
     date: str
+    chat_id: int
 
 
 class StartCallback(CallbackData, prefix='start'):
@@ -36,6 +36,9 @@ class ISACBotCommand(enum.StrEnum):
     CREATE_POLL = 'create_poll'
     FETCH_ADMINS = 'fetch_admins'
     ROAD_MAP = 'road_map'
+    METRICS = 'metrics'
+    METRICS_DUMP = 'metrics_dump'
+    POLL_TALLY = 'poll_tally'
 
 
 # About commands scope [see](https://core.telegram.org/bots/api#determining-list-of-commands).
@@ -47,15 +50,28 @@ def get_commands(i18n: 'I18n') -> '_ScopedBotCommands':
     ROAD_MAP = BotCommand(  # noqa: N806
         command=ISACBotCommand.ROAD_MAP, description=i18n.gettext(N_('🛣️ [Дорожная карта]'))
     )
+    POLL_TALLY = BotCommand(  # noqa: N806
+        command=ISACBotCommand.POLL_TALLY,
+        description=i18n.gettext(N_('Показать итоги последнего опроса')),
+    )
     return (
         (
             [
                 START,
                 CREATE_POLL,
+                POLL_TALLY,
                 BotCommand(
                     command=ISACBotCommand.ADMINS,
                     description=i18n.gettext(N_('Показать администраторов')),
                 ),
+                BotCommand(
+                    command=ISACBotCommand.METRICS,
+                    description=i18n.gettext(N_('Показать метрики')),
+                ),
+                BotCommand(
+                    command=ISACBotCommand.METRICS_DUMP,
+                    description=i18n.gettext(N_('Выгрузить метрики в файл')),
+                ),
             ],
             BotCommandScopeChat(chat_id=BOT_OWNER_ID),  # owner chat
         ),
@@ -67,6 +83,7 @@ def get_commands(i18n: 'I18n') -> '_ScopedBotCommands':
                     description=i18n.gettext(N_('Обновить администраторов')),
                 ),
                 CREATE_POLL,
+                POLL_TALLY,
                 ROAD_MAP,
             ],
             BotCommandScopeAllChatAdministrators(),
@@ -5,16 +5,50 @@ from .config import (
     BOT_LANG_LOCALES_PATH,
     BOT_MAIN_CHAT_ID,
     BOT_OWNER_ID,
+    BOT_POLL_CHAT_IDS,
+    BOT_REPORT_CHAT_IDS,
     BOT_TIMEZONE,
     BOT_TOKEN,
     BOT_USERNAME,
+    BOT_WEBHOOK_HOST,
+    BOT_WEBHOOK_MAX_IN_FLIGHT,
+    BOT_WEBHOOK_PORT,
+    BOT_WEBHOOK_SECRET,
+    BOT_WEBHOOK_URL,
+    CHAT_MEMBER_CACHE_SIZE,
+    CHAT_MEMBER_CACHE_TTL,
+    DB_INSTRUMENTATION,
+    DB_NULL_POOL,
     DB_PATH,
+    DB_POOL_SIZE,
     DB_SCHEDULER_PATH,
+    DB_SLOW_QUERY_THRESHOLD,
+    DB_USER_CACHE_SIZE,
+    DB_USER_CACHE_TTL,
+    METRICS_DUMP_PATH,
+    POLL_ANSWER_QUEUE_SIZE,
+    POLL_ANSWER_WORKERS,
+    POLL_ANSWERS_BATCH_SIZE,
+    POLL_ANSWERS_FLUSH_INTERVAL,
     POLL_DEFAULT_CLOSE_DELAY,
+    POLL_LIVE_RESULTS,
+    POLL_LIVE_RESULTS_INTERVAL,
+    POLL_REMINDER_BEFORE,
+    POLL_REMINDER_CONCURRENCY,
     REDIS_PASSWORD,
     SMTP_HOSTNAME,
     SMTP_MAIL,
     SMTP_PASSWORD,
+    TELEGRAM_CHAT_BURST,
+    TELEGRAM_CHAT_RATE,
+    TELEGRAM_GROUP_RATE,
+    TELEGRAM_RATE,
+    THROTTLING_CHAT_BURST,
+    THROTTLING_CHAT_RATE,
+    THROTTLING_REDIS,
+    THROTTLING_USER_BURST,
+    THROTTLING_USER_RATE,
+    UPDATES_CONCURRENCY,
 )
 
 
@@ -25,14 +59,48 @@ __all__ = (
     'BOT_LANG_LOCAL_DEFUALT',
     'BOT_MAIN_CHAT_ID',
     'BOT_OWNER_ID',
+    'BOT_POLL_CHAT_IDS',
+    'BOT_REPORT_CHAT_IDS',
     'BOT_TIMEZONE',
     'BOT_TOKEN',
     'BOT_USERNAME',
+    'BOT_WEBHOOK_HOST',
+    'BOT_WEBHOOK_MAX_IN_FLIGHT',
+    'BOT_WEBHOOK_PORT',
+    'BOT_WEBHOOK_SECRET',
+    'BOT_WEBHOOK_URL',
+    'CHAT_MEMBER_CACHE_SIZE',
+    'CHAT_MEMBER_CACHE_TTL',
+    'DB_INSTRUMENTATION',
+    'DB_NULL_POOL',
     'DB_PATH',
+    'DB_POOL_SIZE',
     'DB_SCHEDULER_PATH',
+    'DB_SLOW_QUERY_THRESHOLD',
+    'DB_USER_CACHE_SIZE',
+    'DB_USER_CACHE_TTL',
+    'METRICS_DUMP_PATH',
+    'POLL_ANSWERS_BATCH_SIZE',
+    'POLL_ANSWERS_FLUSH_INTERVAL',
+    'POLL_ANSWER_QUEUE_SIZE',
+    'POLL_ANSWER_WORKERS',
     'POLL_DEFAULT_CLOSE_DELAY',
+    'POLL_LIVE_RESULTS',
+    'POLL_LIVE_RESULTS_INTERVAL',
+    'POLL_REMINDER_BEFORE',
+    'POLL_REMINDER_CONCURRENCY',
     'REDIS_PASSWORD',
     'SMTP_HOSTNAME',
     'SMTP_MAIL',
     'SMTP_PASSWORD',
+    'TELEGRAM_CHAT_BURST',
+    'TELEGRAM_CHAT_RATE',
+    'TELEGRAM_GROUP_RATE',
+    'TELEGRAM_RATE',
+    'THROTTLING_CHAT_BURST',
+    'THROTTLING_CHAT_RATE',
+    'THROTTLING_REDIS',
+    'THROTTLING_USER_BURST',
+    'THROTTLING_USER_RATE',
+    'UPDATES_CONCURRENCY',
 )
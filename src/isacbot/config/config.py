@@ -84,16 +84,87 @@ DB_SCHEDULER_PATH: Final[Path] = (
     / 'instance'
     / getenv('DB_SCHEDULER_NAME', 'apscheduler.db')
 )
+DB_POOL_SIZE: Final[int] = int(getenv('DB_POOL_SIZE') or 5)
+DB_NULL_POOL: Final[bool] = getenv('DB_NULL_POOL', '').lower() in {'1', 'true', 'yes'}
+DB_USER_CACHE_SIZE: Final[int] = int(getenv('DB_USER_CACHE_SIZE') or 1024)
+DB_USER_CACHE_TTL: Final[int] = int(getenv('DB_USER_CACHE_TTL') or 300)  # in seconds
+CHAT_MEMBER_CACHE_SIZE: Final[int] = int(getenv('CHAT_MEMBER_CACHE_SIZE') or 1024)
+CHAT_MEMBER_CACHE_TTL: Final[int] = int(getenv('CHAT_MEMBER_CACHE_TTL') or 60)  # in seconds
+DB_INSTRUMENTATION: Final[bool] = getenv('DB_INSTRUMENTATION', '').lower() in {'1', 'true', 'yes'}
+DB_SLOW_QUERY_THRESHOLD: Final[float] = float(
+    getenv('DB_SLOW_QUERY_THRESHOLD') or 0.1
+)  # in seconds
+METRICS_DUMP_PATH: Final[Path] = (
+    Path(__file__).absolute().parent.parent
+    / 'instance'
+    / getenv('METRICS_DUMP_NAME', 'metrics.json')
+)
 BOT_ID: Final[int] = int(getenv('BOT_ID') or 0)
 BOT_OWNER_ID: Final[int] = int(getenv('BOT_OWNER_ID') or 0)
 BOT_MAIN_CHAT_ID: Final[int] = (
     int(main_chat_id) if (main_chat_id := getenv('BOT_MAIN_CHAT_ID')) else BOT_OWNER_ID
 )  # can be 0 when no main chat provided
+BOT_POLL_CHAT_IDS: Final[tuple[int, ...]] = tuple(
+    int(chat_id) for chat_id in getenv('BOT_POLL_CHAT_IDS', '').split(',') if chat_id.strip()
+) or (BOT_MAIN_CHAT_ID,)  # chats with scheduled polls, comma separated
+BOT_REPORT_CHAT_IDS: Final[tuple[int, ...]] = tuple(
+    dict.fromkeys((BOT_MAIN_CHAT_ID, *BOT_POLL_CHAT_IDS))
+)  # chats which polls are reported, polls of old versions are in the main chat
 BOT_ADMINS: 'AdminsSetType' = defaultdict(
     set, {BOT_OWNER_ID: {BOT_OWNER_ID}}
 )  # owner personal chat is always added as admin
 BOT_TIMEZONE: Final[ZoneInfo] = ZoneInfo(getenv('TZ', 'Europe/Moscow'))
+BOT_WEBHOOK_URL: Final[str] = getenv(
+    'BOT_WEBHOOK_URL', ''
+)  # public HTTPS URL of the webhook, long polling is used when empty
+BOT_WEBHOOK_SECRET: Final[str] = getenv(
+    'BOT_WEBHOOK_SECRET', ''
+)  # checked in every webhook request, generated on start when empty
+BOT_WEBHOOK_HOST: Final[str] = getenv('BOT_WEBHOOK_HOST', '127.0.0.1')
+BOT_WEBHOOK_PORT: Final[int] = int(getenv('BOT_WEBHOOK_PORT') or 8080)
+BOT_WEBHOOK_MAX_IN_FLIGHT: Final[int] = int(
+    getenv('BOT_WEBHOOK_MAX_IN_FLIGHT') or 100
+)  # updates handled at once, further webhook requests wait
+UPDATES_CONCURRENCY: Final[int] = int(
+    getenv('UPDATES_CONCURRENCY') or 64
+)  # updates handled at once, updates of the same user are handled one by one
 POLL_DEFAULT_CLOSE_DELAY: Final[int] = int(getenv('POLL_DEFAULT_CLOSE_DELAY') or 3600)
+POLL_ANSWERS_FLUSH_INTERVAL: Final[float] = float(getenv('POLL_ANSWERS_FLUSH_INTERVAL') or 1)
+POLL_ANSWERS_BATCH_SIZE: Final[int] = int(getenv('POLL_ANSWERS_BATCH_SIZE') or 100)
+POLL_ANSWER_WORKERS: Final[int] = int(getenv('POLL_ANSWER_WORKERS') or 4)
+POLL_ANSWER_QUEUE_SIZE: Final[int] = int(getenv('POLL_ANSWER_QUEUE_SIZE') or 1000)  # per worker
+POLL_REMINDER_BEFORE: Final[int] = int(
+    getenv('POLL_REMINDER_BEFORE') or 0
+)  # in seconds before the poll close, 0 disables reminders
+POLL_REMINDER_CONCURRENCY: Final[int] = int(getenv('POLL_REMINDER_CONCURRENCY') or 8)
+POLL_LIVE_RESULTS: Final[bool] = getenv('POLL_LIVE_RESULTS', '').lower() in {'1', 'true', 'yes'}
+POLL_LIVE_RESULTS_INTERVAL: Final[float] = float(
+    getenv('POLL_LIVE_RESULTS_INTERVAL') or 5
+)  # in seconds, at most one edit of the results message per interval
+TELEGRAM_RATE: Final[float] = float(
+    getenv('TELEGRAM_RATE') or 25
+)  # requests per second in total, below the limit of Telegram
+TELEGRAM_CHAT_RATE: Final[float] = float(
+    getenv('TELEGRAM_CHAT_RATE') or 1
+)  # messages per second to the same private chat
+TELEGRAM_GROUP_RATE: Final[float] = float(
+    getenv('TELEGRAM_GROUP_RATE') or 20
+)  # messages per minute to the same group
+TELEGRAM_CHAT_BURST: Final[int] = int(
+    getenv('TELEGRAM_CHAT_BURST') or 3
+)  # messages sent to a chat at once before its rate applies
+THROTTLING_USER_RATE: Final[float] = float(
+    getenv('THROTTLING_USER_RATE') or 1
+)  # messages per second of a user handled by the bot
+THROTTLING_USER_BURST: Final[int] = int(
+    getenv('THROTTLING_USER_BURST') or 5
+)  # messages of a user handled at once before the rate applies
+THROTTLING_CHAT_RATE: Final[float] = float(
+    getenv('THROTTLING_CHAT_RATE') or 5
+)  # messages per second of a group handled by the bot
+THROTTLING_CHAT_BURST: Final[int] = int(getenv('THROTTLING_CHAT_BURST') or 20)
+# Keep the buckets of throttling in Redis to share the limits between replicas of the bot.
+THROTTLING_REDIS: Final[bool] = getenv('THROTTLING_REDIS', '').lower() in {'1', 'true', 'yes'}
 SMTP_MAIL: Final[str] = getenv('SMTP_MAIL', '')
 SMTP_PASSWORD: Final[str] = getenv('SMTP_PASSWORD', '')
 SMTP_HOSTNAME: Final[str] = getenv('SMTP_HOSTNAME', '')
@@ -0,0 +1,104 @@
+import asyncio
+import contextlib
+import logging
+import time
+from typing import TYPE_CHECKING
+
+from isacbot.config import POLL_ANSWERS_BATCH_SIZE, POLL_ANSWERS_FLUSH_INTERVAL
+from isacbot.database.operations import add_answers
+from isacbot.database.utils import get_local_date
+from isacbot.errors import SQLAlchemyError
+from isacbot.metrics import METRICS, SIZE_BUCKETS
+
+
+if TYPE_CHECKING:
+    from asyncio import Task
+
+    from isacbot.database.operations import PollAnswerMapping
+    from isacbot.database.utils import BigIntpk, PollOptionsType
+
+
+logger = logging.getLogger(__name__)
+
+
+class AnswerBuffer:
+    """Write-behind buffer of poll answers.
+
+    Answers are collected in memory, where repeated answers of the same user
+    are coalesced to the last one, and flushed with a single `executemany` upsert
+    every `flush_interval` seconds or as soon as `batch_size` answers are
+    collected. Call `flush` to save all collected answers immediately. A batch
+    which is not saved is kept for the next flush.
+    """
+
+    def __init__(self, *, flush_interval: float, batch_size: int) -> None:
+        self.flush_interval = flush_interval
+        self.batch_size = batch_size
+        self._answers: dict[tuple[BigIntpk, BigIntpk], PollAnswerMapping] = {}
+        self._lock = asyncio.Lock()  # only one flush at a time
+        self._task: Task | None = None
+
+    def __len__(self) -> int:
+        return len(self._answers)
+
+    async def add(
+        self, user_id: 'BigIntpk', poll_id: 'BigIntpk', answer: 'PollOptionsType'
+    ) -> None:
+        self._answers[(poll_id, user_id)] = {
+            'user_id': user_id,
+            'poll_id': poll_id,
+            'answer': answer,
+            'answered_local_date': get_local_date(),  # the vote date, not the flush date
+        }
+        if len(self._answers) >= self.batch_size:
+            await self.flush()
+
+    async def flush(self) -> None:
+        async with self._lock:
+            if not self._answers:
+                return
+            answers, self._answers = self._answers, {}  # new answers are collected while flushing
+            start = time.perf_counter()
+            try:
+                await add_answers(answers=answers.values())
+            except SQLAlchemyError:
+                self._keep(answers)
+                logger.exception('Error while flushing %d poll answers.' % len(answers))
+                return
+            except asyncio.CancelledError:
+                self._keep(answers)
+                raise
+            METRICS.observe('answer_buffer.flush_latency', time.perf_counter() - start)
+            METRICS.observe('answer_buffer.batch_size', len(answers), buckets=SIZE_BUCKETS)
+
+    def _keep(self, answers: dict[tuple['BigIntpk', 'BigIntpk'], 'PollAnswerMapping']) -> None:
+        """Return answers of a failed flush, answers collected since are newer."""
+        self._answers = answers | self._answers
+
+    async def _flush_periodically(self) -> None:
+        while True:
+            await asyncio.sleep(self.flush_interval)
+            try:
+                await self.flush()
+            except Exception:
+                logger.exception('Error while flushing poll answers.')
+
+    def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.create_task(self._flush_periodically())
+
+    async def stop(self) -> None:
+        """Stop periodic flushing and save the remaining answers."""
+        if self._task is not None:
+            self._task.cancel()
+            with contextlib.suppress(asyncio.CancelledError):
+                await self._task  # a flush in progress keeps its batch
+            self._task = None
+        await self.flush()
+        logger.info('Answer buffer stopped.')
+
+
+answer_buffer = AnswerBuffer(
+    flush_interval=POLL_ANSWERS_FLUSH_INTERVAL,
+    batch_size=POLL_ANSWERS_BATCH_SIZE,
+)
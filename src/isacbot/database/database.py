@@ -1,32 +1,91 @@
 import logging
 from contextlib import asynccontextmanager
-from typing import TYPE_CHECKING
+from typing import TYPE_CHECKING, Any, Final
 
 import sqlalchemy as sa
 import sqlalchemy_utils as su
 from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
 
+from isacbot.database.instrumentation import instrument
 from isacbot.database.utils import sync_call
 
 
 if TYPE_CHECKING:
-    from collections.abc import AsyncGenerator
+    from collections.abc import AsyncGenerator, Callable, Iterable
     from pathlib import Path
 
+    from sqlalchemy import Connection
+    from sqlalchemy.engine.interfaces import DBAPIConnection
     from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession
     from sqlalchemy.orm import DeclarativeBase
+    from sqlalchemy.pool import ConnectionPoolEntry
 
 
 logger = logging.getLogger(__name__)
 
 
+# Executed once for every new DBAPI connection, so pooled connections don't
+# pay for this setup on each checkout.
+_SQLITE_PRAGMAS: Final = (
+    'PRAGMA journal_mode = WAL;',  # readers don't block the writer
+    'PRAGMA synchronous = NORMAL;',  # safe in WAL mode and avoids fsync on every commit
+    'PRAGMA foreign_keys = ON;',  # by default sqlite foreign keys dosen't work
+    'PRAGMA busy_timeout = 5000;',  # wait for the write lock instead of failing immediately
+    'PRAGMA cache_size = -16000;',  # negative value is the page cache size in KiB
+)
+
+
+def _set_sqlite_pragmas(
+    dbapi_connection: 'DBAPIConnection',
+    connection_record: 'ConnectionPoolEntry',  # noqa: ARG001
+) -> None:
+    cursor = dbapi_connection.cursor()
+    try:
+        for pragma in _SQLITE_PRAGMAS:
+            cursor.execute(pragma)
+    finally:
+        cursor.close()
+
+
 class Database:
     url: sa.URL
     engine: 'AsyncEngine'
     session: async_sessionmaker['AsyncSession']
+    pool_size: int
+    null_pool: bool
+    instrumentation: bool
+    slow_query_threshold: float
 
-    def __init__(self, path: 'Path | str') -> None:
+    def __init__(
+        self,
+        path: 'Path | str',
+        *,
+        pool_size: int = 5,
+        null_pool: bool = False,
+        instrumentation: bool = False,
+        slow_query_threshold: float = 0.1,
+    ) -> None:
+        """Database with a small pool of long-lived aiosqlite connections.
+
+        `null_pool=True` is a fallback which opens a new connection (and a new
+        aiosqlite worker thread) for every session. `instrumentation=True` records
+        latency of every statement, see `database.instrumentation`.
+        """
         self.url = sa.engine.make_url(f'sqlite+aiosqlite:///{path}')
+        self.pool_size = pool_size
+        self.null_pool = null_pool
+        self.instrumentation = instrumentation
+        self.slow_query_threshold = slow_query_threshold
+
+    @property
+    def _pool_options(self) -> dict[str, Any]:
+        if self.null_pool:
+            return {'poolclass': sa.NullPool}
+        return {
+            'poolclass': sa.AsyncAdaptedQueuePool,
+            'pool_size': self.pool_size,
+            'max_overflow': 0,  # sqlite has a single writer, extra connections only add contention
+        }
 
     @asynccontextmanager
     async def connect(self) -> 'AsyncGenerator[Database]':
@@ -34,9 +93,12 @@ class Database:
             url=self.url,
             echo=False,
             echo_pool=False,
-            poolclass=sa.NullPool,
             isolation_level='SERIALIZABLE',
+            **self._pool_options,
         )
+        sa.event.listen(self.engine.sync_engine, 'connect', _set_sqlite_pragmas)
+        if self.instrumentation:
+            instrument(self.engine, slow_query_threshold=self.slow_query_threshold)
         try:
             self.session = async_sessionmaker(
                 bind=self.engine,
@@ -71,3 +133,9 @@ class Database:
     async def drop_tables(self, base: type['DeclarativeBase']) -> None:
         async with self.engine.begin() as connection:
             await connection.run_sync(base.metadata.drop_all)
+
+    async def migrate(self, migrations: 'Iterable[Callable[[Connection], None]]') -> None:
+        """Apply migrations one by one, each in its own transaction."""
+        for migration in migrations:
+            async with self.engine.begin() as connection:
+                await connection.run_sync(migration)
@@ -0,0 +1,149 @@
+"""Opt-in latency instrumentation of the database engine.
+
+Every statement is observed in the `db.query.<operation>` histogram of `METRICS`,
+where the operation is the name of the `database.operations` function which
+executed the statement. Statements slower than the threshold are logged by the
+`isacbot.database.slow_query` logger with the shapes of their parameters, values
+are never logged.
+"""
+
+import functools
+import logging
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import TYPE_CHECKING, Any
+
+import sqlalchemy as sa
+
+from isacbot.metrics import METRICS
+
+
+if TYPE_CHECKING:
+    from collections.abc import Awaitable, Callable, Generator
+
+    from sqlalchemy import Connection
+    from sqlalchemy.engine import ExecutionContext
+    from sqlalchemy.engine.interfaces import DBAPIConnection, DBAPICursor
+    from sqlalchemy.ext.asyncio import AsyncEngine
+    from sqlalchemy.pool import ConnectionPoolEntry, PoolProxiedConnection
+
+
+logger = logging.getLogger(__name__)
+slow_query_logger = logging.getLogger('isacbot.database.slow_query')
+
+
+_OPERATION: ContextVar[str] = ContextVar('operation', default='unknown')
+
+
+@contextmanager
+def operation(name: str) -> 'Generator[None]':
+    """Attribute statements executed inside the context to the operation `name`."""
+    token = _OPERATION.set(name)
+    try:
+        yield
+    finally:
+        _OPERATION.reset(token)
+
+
+def instrumented[**P, R](
+    func: 'Callable[P, Awaitable[R]]',
+) -> 'Callable[P, Awaitable[R]]':
+    """Attribute statements executed by the coroutine function to its name."""
+
+    @functools.wraps(func)
+    async def wrapper(*args: P.args, **kwargs: P.kwargs) -> R:
+        with operation(func.__name__):
+            return await func(*args, **kwargs)
+
+    return wrapper
+
+
+def _parameters_shape(parameters: Any, *, executemany: bool) -> str:
+    """Describe parameters by their types, e.g. `100 x (int, int, str)`."""
+    if executemany:
+        return f'{len(parameters)} x {_parameters_shape(parameters[0], executemany=False)}'
+    if isinstance(parameters, dict):
+        return '{%s}' % ', '.join(
+            f'{key}: {type(value).__name__}' for key, value in parameters.items()
+        )
+    return '(%s)' % ', '.join(type(value).__name__ for value in parameters or ())
+
+
+class EngineInstrumentation:
+    """Listeners of engine and pool events, see `instrument`."""
+
+    __slots__ = ('slow_query_threshold',)
+
+    def __init__(self, *, slow_query_threshold: float) -> None:
+        self.slow_query_threshold = slow_query_threshold
+
+    def before_cursor_execute(  # noqa: PLR0913, PLR0917  # signature of the event
+        self,
+        conn: 'Connection',
+        cursor: 'DBAPICursor',  # noqa: ARG002
+        statement: str,  # noqa: ARG002
+        parameters: Any,  # noqa: ARG002
+        context: 'ExecutionContext | None',  # noqa: ARG002
+        executemany: bool,  # noqa: ARG002, FBT001
+    ) -> None:
+        conn.info.setdefault('query_start', []).append(time.perf_counter())
+
+    def after_cursor_execute(  # noqa: PLR0913, PLR0917
+        self,
+        conn: 'Connection',
+        cursor: 'DBAPICursor',  # noqa: ARG002
+        statement: str,
+        parameters: Any,
+        context: 'ExecutionContext | None',  # noqa: ARG002
+        executemany: bool,  # noqa: FBT001
+    ) -> None:
+        elapsed = time.perf_counter() - conn.info['query_start'].pop()
+        name = _OPERATION.get()
+        METRICS.observe(f'db.query.{name}', elapsed)
+        if elapsed >= self.slow_query_threshold:
+            METRICS.inc(f'db.slow_query.{name}')
+            slow_query_logger.warning(
+                'Slow query in %s took %.3fs: %s; parameters: %s'
+                % (
+                    name,
+                    elapsed,
+                    ' '.join(statement.split()),
+                    _parameters_shape(parameters, executemany=executemany),
+                )
+            )
+
+    def checkout(
+        self,
+        dbapi_connection: 'DBAPIConnection',  # noqa: ARG002
+        connection_record: 'ConnectionPoolEntry',
+        connection_proxy: 'PoolProxiedConnection',  # noqa: ARG002
+    ) -> None:
+        connection_record.info['checkout_start'] = time.perf_counter()
+        METRICS.inc('db.pool.checked_out')
+
+    def checkin(
+        self,
+        dbapi_connection: 'DBAPIConnection | None',  # noqa: ARG002
+        connection_record: 'ConnectionPoolEntry',
+    ) -> None:
+        if (start := connection_record.info.pop('checkout_start', None)) is None:
+            return  # connection was invalidated before it was checked out
+        METRICS.inc('db.pool.checked_out', -1)
+        METRICS.observe('db.pool.hold', time.perf_counter() - start)
+
+
+def instrument(engine: 'AsyncEngine', *, slow_query_threshold: float) -> None:
+    """Listen to statements and pool checkouts of the engine."""
+    instrumentation = EngineInstrumentation(slow_query_threshold=slow_query_threshold)
+    sa.event.listen(
+        engine.sync_engine, 'before_cursor_execute', instrumentation.before_cursor_execute
+    )
+    sa.event.listen(
+        engine.sync_engine, 'after_cursor_execute', instrumentation.after_cursor_execute
+    )
+    sa.event.listen(engine.sync_engine.pool, 'checkout', instrumentation.checkout)
+    sa.event.listen(engine.sync_engine.pool, 'checkin', instrumentation.checkin)
+    logger.info(
+        'Database instrumentation enabled, slow query threshold %.3fs.' % slow_query_threshold
+    )
@@ -0,0 +1,159 @@
+"""One-shot migrations of databases created by previous versions of the bot.
+
+`create_all` creates only missing tables, so new columns and indexes of the
+existing tables are created here. Every migration must be idempotent because
+all of them are applied on each start.
+"""
+
+import datetime
+import logging
+from typing import TYPE_CHECKING, Any
+
+import sqlalchemy as sa
+
+from isacbot.config import BOT_MAIN_CHAT_ID, BOT_TIMEZONE
+from isacbot.database.models import POLL_TALLY_TRIGGERS, Base, Poll, PollAnswers, PollTally
+
+
+if TYPE_CHECKING:
+    from collections.abc import Callable
+
+    from sqlalchemy import Connection
+
+
+logger = logging.getLogger(__name__)
+
+
+def _column_exists(connection: 'Connection', table: sa.Table, column: sa.Column) -> bool:
+    return column.name in {
+        column_info['name'] for column_info in sa.inspect(connection).get_columns(table.name)
+    }
+
+
+def add_poll_answers_answered_local_date(connection: 'Connection') -> None:
+    """Add `poll_answers.answered_local_date` and backfill it from `created_at`.
+
+    A NOT NULL column without default can't be added in sqlite, so `poll_answers`
+    is rebuilt. The answers are copied with their timestamps. The triggers of
+    `poll_tally` are created with the table and count the copied answers again.
+
+    The offset is calculated for every answer separately, so answers given
+    before and after a DST change get the correct local date.
+    """
+    table: sa.Table = PollAnswers.__table__  # type: ignore[assignment]
+    if _column_exists(connection, table, table.c.answered_local_date):
+        return
+    with connection.begin_nested():  # the table is rebuilt or left as it was
+        columns = [
+            table.c[column['name']]
+            for column in sa.inspect(connection).get_columns(table.name)
+            if column['name'] in table.c
+        ]
+        answers = connection.execute(sa.select(*columns)).mappings().all()
+        table.drop(connection)
+        table.create(connection)  # with indexes and triggers of the current models
+        connection.execute(sa.delete(PollTally))
+        if answers:
+            connection.execute(
+                sa.insert(table),
+                [
+                    {
+                        **answer,
+                        'answered_local_date': answer['created_at']
+                        .replace(tzinfo=datetime.UTC)
+                        .astimezone(BOT_TIMEZONE)
+                        .date(),  # `created_at` is stored as UTC time without timezone
+                    }
+                    for answer in answers
+                ],
+            )
+    logger.info('poll_answers.answered_local_date added for %d answers.' % len(answers))
+
+
+def add_polls_chat_id(connection: 'Connection') -> None:
+    """Add `polls.chat_id`, set to `BOT_MAIN_CHAT_ID` for existing polls, and make
+    the poll date unique per chat instead of the whole table.
+
+    The old unique constraint of `polls.date` can't be dropped in sqlite, so
+    `polls` is rebuilt. Dropping it would cascade to the tables which reference
+    it, so they are rebuilt as well. The triggers of `poll_tally` are created with
+    `poll_answers` and count the copied answers again.
+    """
+    polls: sa.Table = Poll.__table__  # type: ignore[assignment]
+    if _column_exists(connection, polls, polls.c.chat_id):
+        return
+    answers: sa.Table = PollAnswers.__table__  # type: ignore[assignment]
+    tally: sa.Table = PollTally.__table__  # type: ignore[assignment]
+    tables = (polls, answers, tally)  # parents first
+    with connection.begin_nested():  # all tables are rebuilt or none
+        old_columns = {
+            table: [column['name'] for column in sa.inspect(connection).get_columns(table.name)]
+            for table in tables
+        }
+        for table in tables:
+            connection.execute(
+                sa.text(f'CREATE TEMPORARY TABLE old_{table.name} AS SELECT * FROM {table.name}')  # noqa: S608
+            )
+        for table in reversed(tables):
+            table.drop(connection)
+        for table in tables:
+            table.create(connection)  # with indexes and triggers of the current models
+        for table in (polls, answers):
+            columns = [column for column in table.c if column.name in old_columns[table]]
+            values: list[sa.ColumnElement[Any]] = [sa.column(column.name) for column in columns]
+            if table is polls:
+                columns.append(polls.c.chat_id)
+                values.append(sa.literal(BOT_MAIN_CHAT_ID, polls.c.chat_id.type))
+            connection.execute(
+                sa.insert(table).from_select(
+                    columns, sa.select(*values).select_from(sa.table(f'old_{table.name}'))
+                )
+            )
+        for table in tables:
+            connection.execute(sa.text(f'DROP TABLE old_{table.name}'))
+    logger.info('polls.chat_id added, polls are unique per chat and date.')
+
+
+def create_poll_tally_triggers(connection: 'Connection') -> None:
+    """Backfill `poll_tally` from `poll_answers` and create triggers which maintain
+    it in databases where `poll_answers` was created before the triggers.
+    """
+    triggers = set(
+        connection.execute(
+            sa.text("SELECT name FROM sqlite_master WHERE type = 'trigger'")
+        ).scalars()
+    )
+    if triggers.issuperset(POLL_TALLY_TRIGGERS):
+        return
+    for name in POLL_TALLY_TRIGGERS:
+        connection.execute(sa.text(f'DROP TRIGGER IF EXISTS {name}'))
+    connection.execute(sa.delete(PollTally))
+    connection.execute(
+        sa.insert(PollTally).from_select(
+            [PollTally.poll_id, PollTally.answer, PollTally.count],
+            sa.select(PollAnswers.poll_id, PollAnswers.answer, sa.func.count()).group_by(
+                PollAnswers.poll_id, PollAnswers.answer
+            ),
+        )
+    )
+    for ddl in POLL_TALLY_TRIGGERS.values():
+        connection.execute(sa.text(ddl))
+    logger.info('poll_tally backfilled and its triggers created.')
+
+
+def create_missing_indexes(connection: 'Connection') -> None:
+    """Create indexes declared in models but missing in existing tables."""
+    for table in Base.metadata.sorted_tables:
+        for index in table.indexes:
+            index.create(connection, checkfirst=True)
+
+
+# Order matters: `polls` is rebuilt with all columns of `poll_answers`, `poll_tally`
+# is restored after the rebuild and indexes are created after all columns have
+# been added.
+MIGRATIONS: tuple['Callable[[Connection], None]', ...] = (
+    add_poll_answers_answered_local_date,
+    add_polls_chat_id,
+    create_poll_tally_triggers,
+    create_missing_indexes,
+)
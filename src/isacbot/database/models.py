@@ -1,4 +1,4 @@
-import datetime
+from typing import TYPE_CHECKING, Any
 
 import sqlalchemy as sa
 from sqlalchemy.dialects import sqlite
@@ -8,6 +8,7 @@ from sqlalchemy.orm import DeclarativeBase, Mapped, mapped_column
 from isacbot.database.utils import (
     BigIntpk,
     Datestamp,
+    LocalDatestamp,
     PollOptionsType,
     PollStatusType,
     Timestamp,
@@ -15,6 +16,10 @@ from isacbot.database.utils import (
 )
 
 
+if TYPE_CHECKING:
+    from collections.abc import Mapping, Sequence
+
+
 class Base(AsyncAttrs, DeclarativeBase):
     pass
 
@@ -32,17 +37,52 @@ class User(BaseMixin, Base):
     displayname: Mapped[str_255 | None]  # usually different from full_name
     email: Mapped[str_255 | None]
 
+    @classmethod
+    def insert_missing(cls, values: 'Sequence[Mapping[str, Any]]') -> sa.Insert:
+        """Register users which aren't registered yet, registered ones are skipped."""
+        return sqlite.insert(table=cls).values(values).on_conflict_do_nothing()
+
+    @classmethod
+    def upsert_many(cls, values: 'Sequence[Mapping[str, Any]]') -> sa.Insert:
+        """Register users or refresh `username` and `full_name` of registered ones."""
+        ins_stmt = sqlite.insert(table=cls).values(values)
+        return ins_stmt.on_conflict_do_update(
+            index_elements=[cls.id.key],
+            set_={
+                cls.username.key: ins_stmt.excluded.username,
+                cls.full_name.key: ins_stmt.excluded.full_name,
+                cls.updated_at.key: sa.func.now(),  # `onupdate` isn't applied on conflict
+            },
+        )
+
 
 class Poll(BaseMixin, Base):
     __tablename__ = 'polls'
+    __table_args__ = (
+        # A single poll per chat and date.
+        sa.Index('ux_polls_chat_id_date', 'chat_id', 'date', unique=True),
+        # Serve keyset pagination of chat polls by `(date, id)` from the index only.
+        sa.Index('ix_polls_chat_id_date_id', 'chat_id', 'date', 'id'),
+    )
     id: Mapped[BigIntpk]
+    chat_id: Mapped[int] = mapped_column(sa.BigInteger)
     question: Mapped[str_255]
     status: Mapped[PollStatusType]
-    date: Mapped[Datestamp] = mapped_column(unique=True)
+    date: Mapped[Datestamp]
 
 
 class PollAnswers(BaseMixin, Base):
     __tablename__ = 'poll_answers'
+    __table_args__ = (
+        # Serve report queries by poll and local date from the index only.
+        sa.Index(
+            'ix_poll_answers_poll_id_answered_local_date_user_id',
+            'poll_id',
+            'answered_local_date',
+            'user_id',
+            'answer',
+        ),
+    )
     user_id: Mapped[BigIntpk] = mapped_column(
         sa.ForeignKey(User.id, ondelete='CASCADE', onupdate='CASCADE')
     )
@@ -50,19 +90,52 @@ class PollAnswers(BaseMixin, Base):
         sa.ForeignKey(Poll.id, ondelete='CASCADE', onupdate='CASCADE')
     )
     answer: Mapped[PollOptionsType]
+    answered_local_date: Mapped[LocalDatestamp]  # set once on the first answer
 
-    @classmethod
-    def upsert(cls, user_id: BigIntpk, poll_id: BigIntpk, answer: PollOptionsType) -> sa.Insert:
-        """Upsert answer if user already answer for this poll."""
-        ins_stmt = sqlite.insert(table=cls).values(
-            user_id=user_id,
-            poll_id=poll_id,
-            answer=answer,
-        )
-        return ins_stmt.on_conflict_do_update(
-            index_elements=[cls.user_id.key, cls.poll_id.key],
-            set_={
-                cls.answer.key: ins_stmt.excluded.answer,
-                cls.updated_at.key: datetime.datetime.now(tz=datetime.UTC),
-            },  # if we don't define this key it will not trigger onupdate function for `updated_at` column
-        )
+
+class PollTally(Base):
+    """Number of answers for every poll option.
+
+    The table is a read model of `PollAnswers` maintained by sqlite triggers (see
+    `POLL_TALLY_TRIGGERS`), so every upsert of answers changes both tables in the
+    same transaction.
+    """
+
+    __tablename__ = 'poll_tally'
+    poll_id: Mapped[BigIntpk] = mapped_column(
+        sa.ForeignKey(Poll.id, ondelete='CASCADE', onupdate='CASCADE')
+    )
+    answer: Mapped[PollOptionsType] = mapped_column(primary_key=True)
+    count: Mapped[int] = mapped_column(default=0, server_default='0')
+
+
+# Keep `poll_tally` in sync with `poll_answers` inside the statement which changes
+# answers, including `INSERT ... ON CONFLICT DO UPDATE` and cascade deletes.
+POLL_TALLY_TRIGGERS: 'Mapping[str, str]' = {
+    'poll_tally_after_insert': """
+        CREATE TRIGGER poll_tally_after_insert AFTER INSERT ON poll_answers
+        BEGIN
+            INSERT INTO poll_tally (poll_id, answer, count) VALUES (NEW.poll_id, NEW.answer, 1)
+            ON CONFLICT (poll_id, answer) DO UPDATE SET count = count + 1;
+        END
+    """,
+    'poll_tally_after_update': """
+        CREATE TRIGGER poll_tally_after_update AFTER UPDATE OF answer ON poll_answers
+        WHEN OLD.answer IS NOT NEW.answer
+        BEGIN
+            UPDATE poll_tally SET count = count - 1
+            WHERE poll_id = OLD.poll_id AND answer = OLD.answer;
+            INSERT INTO poll_tally (poll_id, answer, count) VALUES (NEW.poll_id, NEW.answer, 1)
+            ON CONFLICT (poll_id, answer) DO UPDATE SET count = count + 1;
+        END
+    """,
+    'poll_tally_after_delete': """
+        CREATE TRIGGER poll_tally_after_delete AFTER DELETE ON poll_answers
+        BEGIN
+            UPDATE poll_tally SET count = count - 1
+            WHERE poll_id = OLD.poll_id AND answer = OLD.answer;
+        END
+    """,
+}
+for _ddl in POLL_TALLY_TRIGGERS.values():  # created with `poll_answers`
+    sa.event.listen(PollAnswers.__table__, 'after_create', sa.DDL(_ddl))
@@ -1,30 +1,50 @@
 import datetime
+import enum
 import logging
-from typing import TYPE_CHECKING, NotRequired, TypedDict, Unpack
+from contextlib import asynccontextmanager
+from typing import TYPE_CHECKING, Final, NotRequired, TypedDict, Unpack
 
 import sqlalchemy as sa
+from sqlalchemy.dialects import sqlite
 
-from isacbot.config import BOT_TIMEZONE
-from isacbot.database.models import Poll, PollAnswers, User
+from isacbot.cache import MISSING, TTLCache
+from isacbot.config import DB_USER_CACHE_SIZE, DB_USER_CACHE_TTL
+from isacbot.database.instrumentation import instrumented, operation
+from isacbot.database.models import Poll, PollAnswers, PollTally, User
 from isacbot.database.utils import (
     BigIntpk,
     Datestamp,
+    PollOptions,
     PollOptionsType,
     PollStatus,
-    get_timezone_aware_date,
+    get_local_date,
     str_255,
 )
-from isacbot.errors import IntegrityError, NoResultFound, SQLAlchemyError
+from isacbot.errors import IntegrityError, SQLAlchemyError
 from isacbot.extensions import db
+from isacbot.metrics import METRICS
 
 
 if TYPE_CHECKING:
-    from collections.abc import Sequence
+    from collections.abc import AsyncGenerator, Collection, Sequence
+
+    from sqlalchemy.ext.asyncio import AsyncResult
+
+    class UserRegisterMapping(TypedDict):
+        id: int
+        username: str | None
+        full_name: str | None
 
     class UserUpdateMapping(TypedDict):
         displayname: NotRequired[str | None]
         email: NotRequired[str | None]
 
+    class PollAnswerMapping(TypedDict):
+        user_id: BigIntpk
+        poll_id: BigIntpk
+        answer: PollOptionsType
+        answered_local_date: datetime.date
+
     type PollAnswerType = tuple[
         Datestamp,
         str_255,
@@ -39,28 +59,129 @@ if TYPE_CHECKING:
 logger = logging.getLogger(__name__)
 
 
-async def add_user(user_id: int, username: str | None, full_name: str | None) -> None:
+# Hot statements are built once with bound parameters, so every execution is a
+# hit in the compiled cache without building the statement and its cache key.
+_SELECT_USER: Final = sa.select(User).where(User.id == sa.bindparam('user_id'))
+_SELECT_POLL_EXIST: Final = (
+    sa.select(Poll.id)
+    .where(Poll.chat_id == sa.bindparam('chat_id'), Poll.date == sa.bindparam('date'))
+    .limit(1)
+)
+_UPDATE_POLL_STATUS: Final = (
+    sa.update(Poll).where(Poll.id == sa.bindparam('poll_id')).values(status=sa.bindparam('status'))
+)
+_insert_answer = sqlite.insert(PollAnswers)
+# Executed with a list of parameters for many answers, as `executemany` of a
+# single prepared statement, unlike the multi-row VALUES compiled for each size.
+_UPSERT_ANSWER: Final = _insert_answer.on_conflict_do_update(
+    index_elements=[PollAnswers.user_id, PollAnswers.poll_id],
+    set_={
+        PollAnswers.answer: _insert_answer.excluded.answer,
+        PollAnswers.updated_at: sa.func.now(),
+    },  # if we don't define this key it will not trigger onupdate function for `updated_at` column
+)
+
+# Registered users without an answer to the poll, by keyset pages of user ids.
+# Users who have never answered any poll, e.g. new members, are included.
+_SELECT_NON_RESPONDERS: Final = (
+    sa.select(User.id)
+    .where(
+        User.displayname.is_not(None),
+        User.id > sa.bindparam('after'),
+        ~sa.exists().where(
+            PollAnswers.user_id == User.id, PollAnswers.poll_id == sa.bindparam('poll_id')
+        ),
+    )
+    .order_by(User.id)
+    .limit(sa.bindparam('limit'))
+)
+
+
+# Read-through cache of users rows, including users which are not registered yet.
+_USER_CACHE: TTLCache[int, User | None] = TTLCache(
+    name='user_cache', maxsize=DB_USER_CACHE_SIZE, ttl=DB_USER_CACHE_TTL
+)
+
+
+@instrumented
+async def ensure_user(
+    user_id: int, username: str | None, full_name: str | None
+) -> tuple[User | None, bool]:
+    """Register the user or refresh `username` and `full_name` of the registered one.
+
+    Return the user row and `True` if the user was registered by this call. Nothing
+    is written when the cached row is up to date.
+    """
+    if (
+        isinstance(user := _USER_CACHE.get(user_id), User)
+        and user.username == username
+        and user.full_name == full_name
+    ):
+        return user, False
+    if not (
+        users := await ensure_users(
+            users=[{'id': user_id, 'username': username, 'full_name': full_name}]
+        )
+    ):
+        return None, False
+    return users[0]
+
+
+@instrumented
+async def ensure_users(
+    users: 'Collection[UserRegisterMapping]',
+) -> list[tuple[User, bool]]:
+    """Bulk variant of `ensure_user`, return rows of all provided users with `True`
+    for users registered by this call.
+
+    Missing users are inserted by `INSERT ... ON CONFLICT DO NOTHING RETURNING`,
+    so the returned rows are exactly the registered ones, then the names of the
+    other users are refreshed by `INSERT ... ON CONFLICT DO UPDATE RETURNING`.
+    """
+    if not users:
+        return []
     async with db.session.begin() as session:
         try:
-            session.add(User(id=user_id, username=username, full_name=full_name))
-            await session.commit()
+            created = (
+                await session.scalars(
+                    User.insert_missing(values=list(users)).returning(User),
+                    execution_options={'populate_existing': True},
+                )
+            ).all()
+            created_ids = {user.id for user in created}
+            refreshed = (
+                (
+                    await session.scalars(
+                        User.upsert_many(values=existing).returning(User),
+                        execution_options={'populate_existing': True},
+                    )
+                ).all()
+                if (existing := [user for user in users if user['id'] not in created_ids])
+                else []
+            )
         except SQLAlchemyError:
             await session.rollback()
-            logger.exception('Error while trying to add user_id=%d' % user_id)
-        else:
-            logger.info('user_id=%d created.' % user_id)
+            logger.exception('Error while trying to register %d users.' % len(users))
+            return []
+    result = [(user, True) for user in created] + [(user, False) for user in refreshed]
+    for user, _ in result:
+        _USER_CACHE.set(user.id, user)
+    logger.debug('%d users registered, %d refreshed.' % (len(created), len(refreshed)))
+    return result
 
 
+@instrumented
 async def get_user(user_id: int) -> User | None:
+    if (cached := _USER_CACHE.get(user_id)) is not MISSING:
+        return cached
     async with db.session.begin() as session:
-        try:
-            return await session.get_one(User, user_id)
-        except NoResultFound:
-            await session.rollback()
+        if not (user := await session.scalar(_SELECT_USER, {'user_id': user_id})):
             logger.debug('User not found in database. user_id=%d' % user_id)
-        return None
+    _USER_CACHE.set(user_id, user)
+    return user
 
 
+@instrumented
 async def update_user(user_id: int, **kawrgs: Unpack['UserUpdateMapping']) -> bool:
     """Async update event in database return `True` if update was succsessfull."""
     async with db.session.begin() as session:
@@ -70,34 +191,79 @@ async def update_user(user_id: int, **kawrgs: Unpack['UserUpdateMapping']) -> bo
             await session.rollback()
             logger.exception('Error while trying to update user_id=%d, data=%s' % (user_id, kawrgs))
             return False
+    _USER_CACHE.pop(user_id)  # after commit, so the old row can't be cached again
     logger.info('user_id=%d updated.' % user_id)
     return True
 
 
-async def user_already_exist(user_id: int) -> bool:
-    async with db.session.begin() as session:
-        if await session.scalar(sa.select(User).where(User.id == user_id)):
-            logger.debug('user_id=%d already exist.' % user_id)
-            return True
+class _PollDay(enum.Enum):
+    CREATING = enum.auto()
+    CREATED = enum.auto()
+
+
+# Today's poll of every chat. An entry of a previous local date is stale, so the
+# state of a chat is reset at local midnight in `BOT_TIMEZONE`.
+_POLL_DAYS: dict[int, tuple[datetime.date, _PollDay]] = {}
+
+
+async def reserve_poll(chat_id: int, date: datetime.date) -> bool:
+    """Reserve creation of the chat poll on the date, return `False` if the poll
+    exists or is being created. The reservation is taken before the database is
+    checked, so only one of concurrent calls can reach `create_poll`, and once the
+    poll is known to exist the calls are rejected in memory. Release the
+    reservation with `release_poll` if the poll isn't created.
+    """
+    known = (cached := _POLL_DAYS.get(chat_id)) is not None and cached[0] == date
+    if known:
+        METRICS.inc('poll_days.hits')
+        return False  # every known state of today rejects the creation
+    METRICS.inc('poll_days.misses')
+    _POLL_DAYS[chat_id] = (date, _PollDay.CREATING)
+    try:
+        exists = await poll_already_exist(chat_id=chat_id, date=date)
+    except BaseException:
+        release_poll(chat_id=chat_id, date=date)
+        raise
+    if exists:
+        _POLL_DAYS[chat_id] = (date, _PollDay.CREATED)
         return False
+    return True
 
 
-async def poll_already_exist(date: datetime.date) -> bool:
+def release_poll(chat_id: int, date: datetime.date) -> None:
+    """Release the reservation of `reserve_poll` if the poll is not created."""
+    if _POLL_DAYS.get(chat_id) == (date, _PollDay.CREATING):
+        del _POLL_DAYS[chat_id]
+
+
+@instrumented
+async def poll_already_exist(chat_id: int, date: datetime.date) -> bool:
     async with db.session.begin() as session:
-        if await session.scalar(sa.select(Poll).where(Poll.date == date)):
-            logger.debug('Poll already exist on the %s' % date.strftime('%d.%m.%Y.'))
+        if await session.scalar(_SELECT_POLL_EXIST, {'chat_id': chat_id, 'date': date}):
+            logger.debug(
+                'Poll already exist in chat_id=%d on the %s' % (chat_id, date.strftime('%d.%m.%Y.'))
+            )
             return True
         return False
 
 
-async def add_answer(user_id: BigIntpk, poll_id: BigIntpk, answer: PollOptionsType) -> None:
+@instrumented
+async def add_answer(
+    user_id: BigIntpk,
+    poll_id: BigIntpk,
+    answer: PollOptionsType,
+    answered_local_date: datetime.date | None = None,
+) -> None:
     async with db.session.begin() as session:
         try:
             await session.execute(
-                sa.text('PRAGMA foreign_keys = ON;')
-            )  # by default sqlite foreign keys dosen't work
-            await session.execute(
-                statement=PollAnswers.upsert(user_id=user_id, poll_id=poll_id, answer=answer)
+                statement=_UPSERT_ANSWER,
+                params={
+                    'user_id': user_id,
+                    'poll_id': poll_id,
+                    'answer': answer,
+                    'answered_local_date': answered_local_date or get_local_date(),
+                },
             )
             await session.commit()
         except SQLAlchemyError as e:
@@ -114,15 +280,47 @@ async def add_answer(user_id: BigIntpk, poll_id: BigIntpk, answer: PollOptionsTy
             logger.info('Answer saved. user_id=%d' % user_id)
 
 
+@instrumented
+async def add_answers(answers: 'Collection[PollAnswerMapping]') -> None:
+    """Save answers with a single `executemany` upsert.
+
+    If any row breaks a constraint the whole batch is rolled back, so answers
+    are saved one by one to keep all valid answers. Other errors are raised and
+    no answer of the batch is saved.
+    """
+    if not answers:
+        return
+    async with db.session.begin() as session:
+        try:
+            await session.execute(statement=_UPSERT_ANSWER, params=list(answers))
+            await session.commit()
+        except IntegrityError:
+            await session.rollback()
+            logger.warning('Batch of %d answers rejected, saving one by one.' % len(answers))
+        except SQLAlchemyError:
+            await session.rollback()
+            raise
+        else:
+            logger.info('%d answers saved.' % len(answers))
+            return
+    for answer in answers:
+        await add_answer(**answer)
+
+
+@instrumented
 async def create_poll(
-    poll_id: BigIntpk, question: str_255, date: Datestamp, status: PollStatus
+    poll_id: BigIntpk, chat_id: int, question: str_255, date: Datestamp, status: PollStatus
 ) -> bool:
-    poll = Poll(id=poll_id, question=question, date=date, status=status.name)
+    """Create the poll and mark it as today's poll of the chat, see `reserve_poll`."""
+    poll = Poll(id=poll_id, chat_id=chat_id, question=question, date=date, status=status.name)
     async with db.session.begin() as session:
         try:
             session.add(poll)
             await session.commit()
-            logger.info('poll_id=%d created on the %s.' % (poll_id, date.strftime('%d.%m.%Y')))
+            logger.info(
+                'poll_id=%d created in chat_id=%d on the %s.'
+                % (poll_id, chat_id, date.strftime('%d.%m.%Y'))
+            )
         except SQLAlchemyError:
             await session.rollback()
             logger.exception(
@@ -130,58 +328,130 @@ async def create_poll(
                 % (poll_id, date.strftime('%d.%m.%Y'))
             )
         else:
+            _POLL_DAYS[chat_id] = (date, _PollDay.CREATED)
             return True
+    release_poll(chat_id=chat_id, date=date)  # the next call checks the database again
     return False
 
 
+@instrumented
 async def update_poll_status(poll_id: BigIntpk, status: PollStatus) -> None:
     async with db.session.begin() as session:
-        await session.execute(sa.update(Poll).where(Poll.id == poll_id).values(status=status.name))
+        await session.execute(_UPDATE_POLL_STATUS, {'poll_id': poll_id, 'status': status.name})
 
 
-_PollAnswersLabel_created_at = sa.Label(
-    name='aswered_at',
-    element=get_timezone_aware_date(attribute=PollAnswers.created_at, tz=BOT_TIMEZONE),
-)  # there is no cast() funcion for sqlite [see](https://github.com/sqlalchemy/sqlalchemy/issues/5104).
+@asynccontextmanager
+async def get_poll_answers(
+    chat_id: int, poll_id: int, date: datetime.date, chunk_size: int = 1000
+) -> 'AsyncGenerator[AsyncResult[PollAnswerType]]':
+    """Stream answers of the chat poll. Rows are fetched in chunks of `chunk_size`
+    while the result is consumed inside the context, so the whole result is never
+    loaded. Polls of other chats have no answers.
+    """
+    with operation('get_poll_answers'):
+        async with db.session.begin() as session:
+            yield await session.stream(
+                sa.select(
+                    Poll.date,
+                    Poll.question,
+                    User.username,
+                    User.full_name,
+                    User.displayname,
+                    PollAnswers.answer,
+                    PollAnswers.answered_local_date.label('aswered_at'),
+                )
+                .distinct()
+                .select_from(PollAnswers)
+                .where(
+                    sa.and_(
+                        PollAnswers.poll_id == poll_id,
+                        PollAnswers.answered_local_date == date,
+                    )
+                )
+                .join(User, User.id == PollAnswers.user_id)
+                .join(Poll, sa.and_(Poll.id == PollAnswers.poll_id, Poll.chat_id == chat_id))
+                .order_by(User.username, User.full_name)
+                .execution_options(yield_per=chunk_size)
+            )
 
 
-async def get_poll_answers(poll_id: int, date: datetime.date) -> sa.Result['PollAnswerType']:
+@instrumented
+async def get_poll_tally(poll_id: int) -> dict[PollOptions, int]:
+    """Get the number of answers for every poll option from `PollTally`, so the
+    cost doesn't depend on the number of answers.
+    """
     async with db.session.begin() as session:
-        return await session.execute(
-            sa.select(
-                Poll.date,
-                Poll.question,
-                User.username,
-                User.full_name,
-                User.displayname,
-                PollAnswers.answer,
-                _PollAnswersLabel_created_at,
-            )
-            .distinct()
-            .select_from(PollAnswers)
-            .where(
-                sa.and_(
-                    PollAnswers.poll_id == poll_id,
-                    _PollAnswersLabel_created_at == date,
-                )
+        counts = (
+            await session.execute(
+                sa.select(PollTally.answer, PollTally.count).where(PollTally.poll_id == poll_id)
             )
-            .join(User, User.id == PollAnswers.user_id)
-            .join(Poll, Poll.id == PollAnswers.poll_id)
-            .order_by(User.username, User.full_name)
-        )
+        ).tuples()
+        return dict.fromkeys(PollOptions, 0) | dict(counts.all())
+
+
+@instrumented
+async def get_polls(status: PollStatus) -> 'Sequence[Poll]':
+    """Get polls of all chats with the `status`."""
+    async with db.session.begin() as session:
+        return (await session.scalars(sa.select(Poll).where(Poll.status == status.name))).all()
 
 
-async def get_poll_data(limit: int = 4) -> 'Sequence[sa.Row[tuple[Datestamp, BigIntpk]]]':
-    """Get poll's data. Default `limit = 4`."""
+@instrumented
+async def get_non_responders(poll_id: int, after: int = 0, limit: int = 500) -> 'Sequence[int]':
+    """Get ids of registered users who haven't answered the poll, ordered by id and
+    greater than `after`, so all users are read page by page without holding a
+    connection between pages.
+    """
     async with db.session.begin() as session:
         return (
-            await session.execute(
-                sa.select(
-                    Poll.date,
-                    Poll.id,
-                )
-                .select_from(Poll)
-                .order_by(Poll.date)
-                .limit(limit)
+            await session.scalars(
+                _SELECT_NON_RESPONDERS,
+                {'poll_id': poll_id, 'after': after, 'limit': limit},
             )
         ).all()
+
+
+@instrumented
+async def get_last_poll(chat_id: int) -> Poll | None:
+    async with db.session.begin() as session:
+        return await session.scalar(
+            sa.select(Poll)
+            .where(Poll.chat_id == chat_id)
+            .order_by(Poll.date.desc(), Poll.id.desc())
+            .limit(1)
+        )
+
+
+@instrumented
+async def get_poll_data(
+    chat_id: int,
+    limit: int = 4,
+    cursor: tuple[datetime.date, BigIntpk] | None = None,
+    *,
+    newer: bool = False,
+) -> tuple['Sequence[sa.Row[tuple[Datestamp, BigIntpk]]]', bool]:
+    """Get a page of chat poll's data ordered by `(date, id)`, newest first. Default
+    `limit = 4`.
+
+    The page starts after the `cursor` in the older direction, or before it when
+    `newer=True`. Every page is a range scan of the `(chat_id, date, id)` index, so
+    the cost doesn't depend on the page number and the number of chats. Return the
+    page and `True` if there are more polls beyond the page in the same direction.
+    """
+    key = sa.tuple_(Poll.date, Poll.id)
+    statement = sa.select(Poll.date, Poll.id).select_from(Poll).where(Poll.chat_id == chat_id)
+    if cursor:
+        date, poll_id = cursor
+        cursor_key = sa.tuple_(sa.literal(date, Poll.date.type), sa.literal(poll_id, Poll.id.type))
+        statement = statement.where(key > cursor_key if newer else key < cursor_key)
+    if newer:
+        statement = statement.order_by(Poll.date, Poll.id)
+    else:
+        statement = statement.order_by(Poll.date.desc(), Poll.id.desc())
+    async with db.session.begin() as session:
+        polls = list((await session.execute(statement.limit(limit + 1))).all())
+    has_more = len(polls) > limit
+    polls = polls[:limit]
+    if newer:
+        polls.reverse()
+    return polls, has_more
@@ -5,6 +5,7 @@ from typing import TYPE_CHECKING, Annotated, Any, ParamSpec, TypeVar
 import sqlalchemy as sa
 from sqlalchemy.orm import mapped_column
 
+from isacbot.config import BOT_TIMEZONE
 from isacbot.utils import N_
 
 
@@ -13,7 +14,6 @@ if TYPE_CHECKING:
     from zoneinfo import ZoneInfo
 
     from sqlalchemy import Connection
-    from sqlalchemy.orm.attributes import InstrumentedAttribute
 
     _P = ParamSpec('_P')
     _T = TypeVar('_T', bound=Any)
@@ -35,6 +35,11 @@ class PollStatus(enum.Enum):
     COMPLETED = enum.auto()
 
 
+def get_local_date(*, tz: 'ZoneInfo' = BOT_TIMEZONE) -> datetime.date:
+    """Get current date in the provided timezone, bot timezone by default."""
+    return datetime.datetime.now(tz=tz).date()
+
+
 Timestamp = Annotated[
     datetime.datetime,
     mapped_column(
@@ -48,6 +53,10 @@ Datestamp = Annotated[
     datetime.date,
     mapped_column(sa.Date, nullable=False, server_default=sa.func.current_date()),
 ]
+LocalDatestamp = Annotated[
+    datetime.date,
+    mapped_column(sa.Date, nullable=False, default=get_local_date),
+]  # date in the bot timezone, unlike `Datestamp` which is the server (UTC) date
 PollOptionsType = Annotated[
     PollOptions,
     mapped_column(
@@ -88,16 +97,3 @@ def sync_call(
     and make a synchronous call to the target `function` with the provided arguments.
     """
     return function(*args, **kwargs)
-
-
-def get_timezone_aware_date(
-    attribute: 'InstrumentedAttribute[Any]', tz: 'ZoneInfo'
-) -> sa.Function[Any]:
-    """Get`sa.DATE` function with timezone aware localtime string for sqlite.
-
-    Emulate server side arithmetic in sqlite. Use offset calculation
-    to create and define localtime offset and exclude dst hour.
-    """
-    localtime = datetime.datetime.now(tz=tz)
-    offset = int((localtime.utcoffset() - localtime.dst()).total_seconds())  # type: ignore
-    return sa.func.DATE(attribute, f'+{offset:d} seconds' if offset > 0 else f'{offset:d} seconds')
@@ -1,4 +1,8 @@
-from aiogram.exceptions import TelegramBadRequest, TelegramForbiddenError  # noqa: F401
+from aiogram.exceptions import (  # noqa: F401
+    TelegramBadRequest,
+    TelegramForbiddenError,
+    TelegramRetryAfter,
+)
 from sqlalchemy.exc import IntegrityError, NoResultFound, SQLAlchemyError  # noqa: F401
 
 
@@ -8,4 +12,10 @@ class BotSendMessageError(Exception): ...
 class ForeignKeyConstraintError(SQLAlchemyError): ...
 
 
-class PollContextAlreadyExistError(Exception): ...
+class PollSessionAlreadyExistError(Exception): ...
+
+
+class PollTransitionError(Exception): ...
+
+
+class PollAlreadyExistError(Exception): ...
@@ -7,6 +7,7 @@ from aiogram.utils.i18n import I18n
 from apscheduler.jobstores.sqlalchemy import SQLAlchemyJobStore
 from apscheduler.schedulers.asyncio import AsyncIOScheduler
 from apscheduler.triggers.cron import CronTrigger  # noqa: F401
+from apscheduler.triggers.date import DateTrigger  # noqa: F401
 from redis.asyncio.client import Redis
 
 from isacbot.config import (
@@ -14,8 +15,12 @@ from isacbot.config import (
     BOT_LANG_LOCALES_PATH,
     BOT_TIMEZONE,
     BOT_TOKEN,
+    DB_INSTRUMENTATION,
+    DB_NULL_POOL,
     DB_PATH,
+    DB_POOL_SIZE,
     DB_SCHEDULER_PATH,
+    DB_SLOW_QUERY_THRESHOLD,
     REDIS_PASSWORD,
     SMTP_HOSTNAME,
     SMTP_MAIL,
@@ -25,9 +30,16 @@ from isacbot.database.database import Database
 from isacbot.service.sendmail import SMTPClient
 
 
-db = Database(path=DB_PATH)
+db = Database(
+    path=DB_PATH,
+    pool_size=DB_POOL_SIZE,
+    null_pool=DB_NULL_POOL,
+    instrumentation=DB_INSTRUMENTATION,
+    slow_query_threshold=DB_SLOW_QUERY_THRESHOLD,
+)
+redis = Redis(host='valkey', port=6379, db=0, password=REDIS_PASSWORD)
 dp = Dispatcher(
-    storage=RedisStorage(redis=Redis(host='valkey', port=6379, db=0, password=REDIS_PASSWORD)),
+    storage=RedisStorage(redis=redis),
     fsm_strategy=FSMStrategy.USER_IN_CHAT,
 )
 bot = Bot(token=BOT_TOKEN, default=DefaultBotProperties(parse_mode=ParseMode.HTML))
@@ -1,5 +1,6 @@
+import asyncio
 import logging
-from typing import TYPE_CHECKING, Literal
+from typing import TYPE_CHECKING, Final, Literal
 
 from aiogram.enums import ChatType
 from aiogram.filters import BaseFilter, Command, StateFilter
@@ -15,7 +16,10 @@ from aiogram.types import CallbackQuery, ChatMemberUpdated, Message
 from aiogram.utils.chat_member import ADMINS, MEMBERS
 from email_validator import EmailNotValidError, validate_email
 
+from isacbot.cache import MISSING, TTLCache
 from isacbot.commands import ISACBotCommand
+from isacbot.config import CHAT_MEMBER_CACHE_SIZE, CHAT_MEMBER_CACHE_TTL
+from isacbot.metrics import METRICS
 from isacbot.states import UserState
 
 
@@ -24,6 +28,7 @@ if TYPE_CHECKING:
 
     from aiogram import Bot
     from aiogram.types import Chat
+    from aiogram.utils.chat_member import ChatMemberUnion
 
     from isacbot._typing import AdminsSetType
 
@@ -36,6 +41,45 @@ IS_NOT_ADMIN = KICKED | LEFT | RESTRICTED | MEMBER  # there is no this type in a
 PROMOTED_TRANSITION = IS_NOT_ADMIN >> IS_ADMIN
 DEMOTED_TRANSITION = IS_NOT_ADMIN << IS_ADMIN
 
+# Members of chats by `(chat_id, user_id)`, changes of members are forgotten by
+# `ForgetChatMemberOuterMiddleware` of `chat_member` and `my_chat_member` updates.
+_CHAT_MEMBERS: Final['TTLCache[tuple[int, int], ChatMemberUnion]'] = TTLCache(
+    name='chat_members', maxsize=CHAT_MEMBER_CACHE_SIZE, ttl=CHAT_MEMBER_CACHE_TTL
+)
+_CHAT_MEMBER_LOOKUPS: Final[dict[tuple[int, int], 'asyncio.Task[ChatMemberUnion]']] = {}
+
+
+async def get_chat_member(bot: 'Bot', chat_id: int, user_id: int) -> 'ChatMemberUnion':
+    """Get the member of the chat from the cache or from Telegram. Concurrent
+    lookups of the same member share one `getChatMember` call, such calls are
+    counted in `METRICS` as `chat_members.shared`.
+    """
+    key = (chat_id, user_id)
+    if (member := _CHAT_MEMBERS.get(key)) is not MISSING:
+        return member
+    if lookup := _CHAT_MEMBER_LOOKUPS.get(key):
+        METRICS.inc('chat_members.shared')
+    else:
+        lookup = _CHAT_MEMBER_LOOKUPS[key] = asyncio.create_task(
+            bot.get_chat_member(chat_id=chat_id, user_id=user_id)
+        )
+        lookup.add_done_callback(lambda task: _remember_chat_member(key, task))
+    return await asyncio.shield(lookup)  # a cancelled caller doesn't cancel the others
+
+
+def _remember_chat_member(key: tuple[int, int], lookup: 'asyncio.Task[ChatMemberUnion]') -> None:
+    if _CHAT_MEMBER_LOOKUPS.get(key) is not lookup:
+        return  # the member was forgotten while it was looked up
+    del _CHAT_MEMBER_LOOKUPS[key]
+    if not lookup.cancelled() and lookup.exception() is None:
+        _CHAT_MEMBERS.set(key, lookup.result())
+
+
+def forget_chat_member(chat_id: int, user_id: int) -> None:
+    """Drop the cached member, the next lookup asks Telegram."""
+    _CHAT_MEMBERS.pop((chat_id, user_id))
+    _CHAT_MEMBER_LOOKUPS.pop((chat_id, user_id), None)
+
 
 class ChatTypeFilter(BaseFilter):
     """Filter for specific chat type."""
@@ -65,7 +109,7 @@ class IsAdminFilter(BaseFilter):
         bot: 'Bot', chat_id: int, user_id: int, admins: 'AdminsSetType'
     ) -> bool:
         return user_id in admins[chat_id] or isinstance(
-            (await bot.get_chat_member(chat_id=chat_id, user_id=user_id)), ADMINS
+            (await get_chat_member(bot=bot, chat_id=chat_id, user_id=user_id)), ADMINS
         )
 
     async def __call__(  # type: ignore[override]
@@ -92,7 +136,9 @@ class ChatMemberFilter(BaseFilter):
     """Filter for members only."""
 
     async def __call__(self, message: 'Message', bot: 'Bot', user_id: int) -> bool:
-        return isinstance((await bot.get_chat_member(message.chat.id, user_id)), MEMBERS)
+        return isinstance(
+            (await get_chat_member(bot=bot, chat_id=message.chat.id, user_id=user_id)), MEMBERS
+        )
 
 
 def validate_email_filter(message: 'Message') -> dict[Literal['email'], str] | None:
@@ -115,7 +161,9 @@ class IsMemberFilter(BaseFilter):
             chat = event.message.chat
         else:
             return False
-        return isinstance((await bot.get_chat_member(chat.id, user_id)), MEMBERS)
+        return isinstance(
+            (await get_chat_member(bot=bot, chat_id=chat.id, user_id=user_id)), MEMBERS
+        )
 
 
 ChatTypeIsGroupFilter = ChatTypeFilter(chat_type=(ChatType.GROUP, ChatType.SUPERGROUP))
@@ -1,19 +1,20 @@
-import asyncio
 import logging
-from typing import TYPE_CHECKING, Final
+from typing import TYPE_CHECKING
 
 from aiogram import F, Router
-from aiogram.enums import ContentType
-from aiogram.filters import StateFilter
+from aiogram.enums import ChatType, ContentType
+from aiogram.filters import Command
 from aiogram.types import Message
-
-from isacbot.background.utils import create_delayed_background_task
-from isacbot.database.operations import (
-    add_answer,
-    create_poll,
-    update_poll_status,
-)
+from aiogram.utils.i18n import gettext as _
+
+from isacbot.background.answer_queue import answer_queue
+from isacbot.background.live_results import live_results
+from isacbot.commands import ISACBotCommand
+from isacbot.config import BOT_REPORT_CHAT_IDS
+from isacbot.database.buffer import answer_buffer
+from isacbot.database.operations import get_last_poll, get_poll_tally, update_poll_status
 from isacbot.database.utils import PollOptions, PollStatus
+from isacbot.errors import PollAlreadyExistError, TelegramBadRequest
 from isacbot.extensions import i18n
 from isacbot.filters import CreatePollCommandFilter, IsAdminFilter
 from isacbot.middlewares import (
@@ -21,8 +22,9 @@ from isacbot.middlewares import (
     PollCreationMessageInnerMiddleware,
     SwapUserStateFromPrivateChatOuterMiddleware,
 )
-from isacbot.states import PollState
-from isacbot.utils import N_, stop_poll, unpin_poll
+from isacbot.service.poll import PollService
+from isacbot.states import PollState, poll_sessions
+from isacbot.utils import N_, format_poll_tally, stop_poll, unpin_poll
 
 
 if TYPE_CHECKING:
@@ -30,10 +32,10 @@ if TYPE_CHECKING:
     from collections.abc import Mapping
 
     from aiogram import Bot
-    from aiogram.types import PollAnswer
+    from aiogram.types import PollAnswer, User
 
     from isacbot._typing import UserContext
-    from isacbot.states import PollContext
+    from isacbot.states import PollSession
 
 
 logger = logging.getLogger(name=__name__)
@@ -48,16 +50,6 @@ router.message.middleware(PollCreationMessageInnerMiddleware())
 _POLL_OPTIONS: 'Mapping[int, PollOptions]' = dict(enumerate(PollOptions))
 
 
-# The following events represent the poll end and poll unpinned status when set:
-_POLL_END = asyncio.Event()
-_POLL_UNPINNED = asyncio.Event()
-
-
-async def _SET_POLL_END() -> None:  # noqa: N802
-    """Async function to provide `_POLL_END.set` as the callabale coroutine."""
-    _POLL_END.set()
-
-
 @router.message(
     CreatePollCommandFilter,
     IsAdminFilter(),
@@ -66,103 +58,105 @@ async def crete_poll_handler(
     message: Message,
     bot: 'Bot',
     state: 'UserContext',
-    poll_context: 'PollContext',
     poll_date: 'datetime.date',
     poll_close_delay: int,
 ) -> None:
     """Unregistered users can create a poll by calling this handler, but these
     users are always verified using `IsAdminFilter`, so it doesn't matter.
-    """
-    await poll_context.clear()
-    question: Final[str] = i18n.gettext(N_('💻 Где Вы сегодня {poll_date}?')).format(
-        poll_date=f'{poll_date:%d.%m.%Y}'
-    )
-    message = await bot.send_poll(
-        chat_id=message.chat.id,
-        question=question,
-        options=[i18n.gettext(option.value) for option in _POLL_OPTIONS.values()],
-        type='regular',
-        is_anonymous=False,
-        allows_multiple_answers=False,
-        disable_notification=False,
-        protect_content=True,
-        reply_markup=None,
-    )
-    if not message.poll:
-        return
 
-    await poll_context.set(
-        storage=state.storage,
-        bot_id=bot.id,
-        chat_id=message.chat.id,
-    )
-    poll_id = int(message.poll.id)
-
-    # Create poll in database and check if it was created.
-    if not (
-        await create_poll(
-            poll_id=poll_id, question=question, date=poll_date, status=PollStatus.STARTED
+    Every poll runs in its own `PollSession`, so polls in several chats can be
+    running at the same time.
+    """
+    try:
+        await PollService(bot=bot, storage=state.storage).open_poll(
+            chat_id=message.chat.id, date=poll_date, close_delay=poll_close_delay
         )
-    ):
-        await bot.delete_message(
-            chat_id=message.chat.id,
-            message_id=message.message_id,
+    except PollAlreadyExistError:
+        logger.debug('Poll already exist.')
+        await message.answer(
+            text=i18n.gettext(N_('⚠️ Опрос на дату {poll_date} уже сформирован.')).format(
+                poll_date=f'{poll_date:%d.%m.%Y}'
+            )
         )
-        logger.debug('Poll has not been created in the database.')
+
+
+@router.message(F.content_type == ContentType.PINNED_MESSAGE, F.pinned_message.poll)
+async def pin_handler(message: Message) -> None:
+    """Pin handler of the service message sent by the `message.pin()` call in
+    `PollService.open_poll`. The poll message is unpinned by `close_poll`, so the
+    service message is only logged.
+    """
+    if not isinstance(message.pinned_message, Message) or not message.pinned_message.poll:
         return
+    logger.info('Poll %s pinned in chat %d.' % (message.pinned_message.poll.id, message.chat.id))
 
-    await poll_context.set_state(PollState.STARTED)
-    # Pin message and context for the poll.
-    if await message.pin(disable_notification=False):
-        # There is an issue: the pinned message after the `message.pin()` method
-        # does not receive any FSM states from the poll message because the user
-        # ID of the poll creator is not equal to the user ID of the pinned message.
-        # In the first case it is a user, in the second it is a bot. That's why we
-        # need to manually create a `StorageKey` and provide some filters to intercept
-        # the pinned message with the corresponding FSM state. This manually created
-        # `StorageKey` placed inside `poll_context` variable and initialized before handler.
-        await poll_context.set_state(PollState.STARTED_AND_PINNED)
-    await poll_context.update_data(poll_message=message.model_dump_json())
-
-    await create_delayed_background_task(task=_SET_POLL_END, delay=poll_close_delay)
-    logger.info('Poll started.')
-
-    # Wait until the end of the poll.
-    await _POLL_END.wait()
-    await stop_poll(pinned_message=message, bot=bot)
-    logger.info('Poll finished.')
-    await update_poll_status(poll_id=poll_id, status=PollStatus.COMPLETED)
-    # Wait until the poll is unpinned, then clear both events.
-    await _POLL_UNPINNED.wait()
-    _POLL_END.clear()
-    _POLL_UNPINNED.clear()
-
-    await poll_context.clear()
 
+async def close_poll(bot: 'Bot', session: 'PollSession') -> None:
+    """Stop the poll, save its answers, unpin its message and close the session.
 
-@router.message(
-    F.content_type == ContentType.PINNED_MESSAGE,
-    StateFilter(PollState.STARTED, PollState.STARTED_AND_PINNED),
-)
-async def pin_handler(message: Message, bot: 'Bot') -> None:
-    """Pin handler user state from poll_message_context evaluated above in
-    crete_poll_handler. The initialization of this handler is the point where
-    `message.pin()` called. This handler use bot context, cause the message
-    provided by function call is a service message.
-    Only here we can get pinned message and perform operations on it.
+    The poll message may be already stopped or unpinned, if the bot was stopped
+    while closing the poll, so Telegram errors don't prevent closing. Until the
+    poll is completed in the database the session is kept, so the poll is closed
+    again after a restart.
     """
-    if not isinstance(message.pinned_message, Message):
-        return
-    await _POLL_END.wait()  # wait until end of the poll
-    await unpin_poll(pinned_message=message.pinned_message, bot=bot)
-    logger.info('Poll unpinned.')
-    _POLL_UNPINNED.set()
+    # No answers are accepted after the end of the poll, a restored poll may be
+    # closing already.
+    if session.accepts_answers:
+        await session.transition(PollState.CLOSING)
+    if message := session.message:
+        try:
+            await stop_poll(pinned_message=message, bot=bot)
+        except TelegramBadRequest as e:
+            logger.warning('Poll in chat %d is not stopped: %s' % (session.chat_id, e))
+    await answer_queue.wait(session)  # answers accepted before the end are saved
+    await answer_buffer.flush()
+    await update_poll_status(poll_id=session.poll_id, status=PollStatus.COMPLETED)
+    try:
+        await session.transition(PollState.CLOSED)
+        logger.info('Poll finished in chat %d.' % session.chat_id)
+        await live_results.close(session)
+        if message and session.pinned:
+            try:
+                await unpin_poll(pinned_message=message, bot=bot)
+            except TelegramBadRequest as e:
+                logger.warning('Poll in chat %d is not unpinned: %s' % (session.chat_id, e))
+            else:
+                await session.transition(PollState.UNPINNED)
+                logger.info('Poll unpinned in chat %d.' % session.chat_id)
+    finally:
+        await poll_sessions.close(session)
 
 
 @router.poll_answer()
-async def poll_answer_handler(poll_answer: 'PollAnswer', user_id: int) -> None:
-    """Gandler start after user choosed any answer."""
-    if _POLL_END.is_set():
+async def poll_answer_handler(
+    poll_answer: 'PollAnswer', bot: 'Bot', event_from_user: 'User', poll_session: 'PollSession'
+) -> None:
+    """Gandler start after user choosed any answer. The answer is processed by
+    `answer_queue` workers.
+    """
+    if not poll_session.accepts_answers:
         return
     option = _POLL_OPTIONS[poll_answer.option_ids[0]]  # no multiple answers, return first
-    await add_answer(user_id=user_id, poll_id=int(poll_answer.poll_id), answer=option)
+    await answer_queue.put(bot=bot, session=poll_session, user=event_from_user, answer=option)
+
+
+@router.message(Command(ISACBotCommand.POLL_TALLY), IsAdminFilter())
+async def poll_tally_handler(message: Message) -> None:
+    """Show live number of answers for every option of the last poll of the chat,
+    or of every chat with polls in the private chat.
+    """
+    chat_ids = BOT_REPORT_CHAT_IDS if message.chat.type == ChatType.PRIVATE else (message.chat.id,)
+    polls = [poll for chat_id in chat_ids if (poll := await get_last_poll(chat_id=chat_id))]
+    if not polls:
+        await message.answer(text=_('Опросы не найдены.'))
+        return
+    await answer_buffer.flush()  # include answers which are not saved yet
+    await message.answer(
+        text='\n\n'.join(
+            [
+                f'{poll.question}\n\n{format_poll_tally(await get_poll_tally(poll_id=poll.id))}'
+                for poll in polls
+            ]
+        ),
+        parse_mode=None,
+    )
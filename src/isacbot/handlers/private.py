@@ -4,11 +4,14 @@ from typing import TYPE_CHECKING
 
 from aiogram import F, Router
 from aiogram.enums import ChatType
-from aiogram.filters import Command
+from aiogram.filters import Command, CommandObject
 from aiogram.filters.chat_member_updated import IS_MEMBER, IS_NOT_MEMBER, ChatMemberUpdatedFilter
+from aiogram.types import FSInputFile
+from aiogram.utils.i18n import gettext as _
 
 from isacbot.commands import ISACBotCommand
-from isacbot.config import BOT_OWNER_ID
+from isacbot.config import BOT_OWNER_ID, METRICS_DUMP_PATH
+from isacbot.metrics import METRICS
 
 
 if TYPE_CHECKING:
@@ -49,3 +52,22 @@ async def admins_handler(message: 'Message', admins: 'AdminsSetType') -> None:
             for chat_id, admins_id in admins.items()
         ),
     )
+
+
+@router.message(Command(ISACBotCommand.METRICS), F.from_user.id == BOT_OWNER_ID)
+async def metrics_handler(message: 'Message', command: CommandObject) -> None:
+    """Show application metrics, optional command argument filters metrics by name prefix."""
+    await message.answer(
+        text=METRICS.render(prefix=command.args or '') or _('Метрики отсутствуют.'),
+        parse_mode=None,
+    )
+
+
+@router.message(Command(ISACBotCommand.METRICS_DUMP), F.from_user.id == BOT_OWNER_ID)
+async def metrics_dump_handler(message: 'Message', command: CommandObject) -> None:
+    """Dump application metrics into a json file and send it, optional command argument
+    filters metrics by name prefix.
+    """
+    METRICS.dump(path=METRICS_DUMP_PATH, prefix=command.args or '')
+    logger.info('Metrics dumped into %s.' % METRICS_DUMP_PATH)
+    await message.answer_document(document=FSInputFile(path=METRICS_DUMP_PATH))
@@ -38,6 +38,10 @@ router.message.middleware(
 )  # all messages after filter will be delted in chat
 
 
+# Users waiting for the road map, the waits don't hold the update lanes of the users.
+_WAITING_TASKS: set[asyncio.Task[None]] = set()
+
+
 class _RMLState(enum.Enum):
     LOCKED = enum.auto()
     RELEASED = enum.auto()
@@ -177,13 +181,28 @@ async def wait_road_map_released_message_handler(
                     full_name=html.bold(user.full_name)
                 )
             )
-            # Here is the implicit wait operation in the second `__anext__`. The
-            # generator will not exit until the coroutine is notified if and only
-            # if _RML is in the `_RMLState.RELEASED` state.
-            await anext(wait_generator)
-            await acquire_road_map_message_handler(
-                message=message, state=state, language_code=language_code
+            task = asyncio.create_task(
+                _acquire_when_released(
+                    wait_generator, message=message, state=state, language_code=language_code
+                )
             )
+            _WAITING_TASKS.add(task)
+            task.add_done_callback(_WAITING_TASKS.discard)
+
+
+async def _acquire_when_released(
+    wait_generator: AsyncGenerator[_RMLState | None],
+    message: 'Message',
+    state: 'UserContext',
+    language_code: str,
+) -> None:
+    # Here is the implicit wait operation in the second `__anext__`. The
+    # generator will not exit until the coroutine is notified if and only
+    # if _RML is in the `_RMLState.RELEASED` state.
+    await anext(wait_generator)
+    await acquire_road_map_message_handler(
+        message=message, state=state, language_code=language_code
+    )
 
 
 @router.message(F.text.in_((__(RoadMapAction.RELEASE), RoadMapAction.RELEASE)))
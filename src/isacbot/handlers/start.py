@@ -1,8 +1,9 @@
 import datetime
 import logging
+from pathlib import Path
 from typing import TYPE_CHECKING
 
-import pandas as pd
+import aiofiles
 from aiogram import F, Router, html
 from aiogram.enums import ChatType
 from aiogram.filters import CommandStart
@@ -12,27 +13,34 @@ from aiogram.utils.i18n import gettext as _
 from isacbot.callbacks import (
     BackButtonCallback,
     DefaultAction,
+    SendPollAction,
     SendPollCallback,
+    SendPollChatCallback,
     SettingsAction,
     StartAction,
     StartCallback,
 )
 from isacbot.commands import ISACBotCommand
+from isacbot.config import BOT_REPORT_CHAT_IDS
+from isacbot.database.buffer import answer_buffer
 from isacbot.database.operations import (
-    add_user,
+    ensure_user,
     get_poll_answers,
     get_poll_data,
+    get_poll_tally,
     get_user,
-    user_already_exist,
 )
+from isacbot.errors import TelegramBadRequest
 from isacbot.extensions import mail_client
 from isacbot.filters import (
     ChatMemberFilter,
     IsAdminFilter,
 )
-from isacbot.keyboards import send_poll_kb, start_kb
+from isacbot.keyboards import send_poll_chat_kb, send_poll_kb, start_kb
 from isacbot.middlewares import CallbackMessageProviderMiddleware
+from isacbot.service.export import write_xlsx
 from isacbot.states import UserState
+from isacbot.utils import format_poll_tally
 
 
 if TYPE_CHECKING:
@@ -64,16 +72,21 @@ async def start_handler(
         return
 
     logger.info('Command /%s from user_id=%s.' % (ISACBotCommand.START, user_id))
-    if not (await user_already_exist(user_id=user_id)):
-        await add_user(
+    if message_user.is_bot:
+        # The menu is opened again after a callback with the message of the bot,
+        # the names of the bot aren't names of the user.
+        user, created = await get_user(user_id=user_id), False
+    else:
+        user, created = await ensure_user(
             user_id=user_id,
             username=message_user.username,
             full_name=message_user.full_name,
         )
+    if created or not user:
         text = _('Добрый день, пользователь! Выберите необходимое действие:')
     else:
         text = _('Добрый день, {full_name}! Выберите необходимое действие:').format(
-            full_name=html.bold(message_user.full_name)
+            full_name=html.bold(user.full_name or '')
         )
 
     await state.update_data(
@@ -110,32 +123,117 @@ async def create_poll_callback_handler(callback: 'CallbackQuery') -> None:
     IsAdminFilter(),
 )
 async def send_poll_result_callback_handler(
-    callback: 'CallbackQuery', state: 'UserContext', callback_message: 'Message'
+    callback: 'CallbackQuery', bot: 'Bot', state: 'UserContext', callback_message: 'Message'
 ) -> None:
-    polls = await get_poll_data()
-    if not polls:
-        await callback.answer(
-            text=_('Опросы не найдены.'),
-            show_alert=True,
+    """Choose the chat of the poll, the step is skipped if polls are in a single chat."""
+    if len(BOT_REPORT_CHAT_IDS) == 1:
+        await _choose_poll(
+            callback=callback,
+            state=state,
+            callback_message=callback_message,
+            chat_id=BOT_REPORT_CHAT_IDS[0],
         )
         return
 
+    if not await _push_message_queue(state=state, callback_message=callback_message):
+        return
+
+    chats: list[tuple[int, str]] = []
+    for chat_id in BOT_REPORT_CHAT_IDS:
+        try:
+            chats.append((chat_id, (await bot.get_chat(chat_id=chat_id)).full_name))
+        except TelegramBadRequest:  # e.g. the bot was removed from the chat
+            chats.append((chat_id, str(chat_id)))
+    await callback_message.edit_text(
+        text=_('💬 Выберите чат:'),
+        reply_markup=send_poll_chat_kb(chats=chats),
+    )
+
+
+@router.callback_query(SendPollChatCallback.filter(), IsAdminFilter())
+async def send_poll_chat_chosen_callback_handler(
+    callback: 'CallbackQuery',
+    callback_data: SendPollChatCallback,
+    state: 'UserContext',
+    callback_message: 'Message',
+) -> None:
+    await _choose_poll(
+        callback=callback,
+        state=state,
+        callback_message=callback_message,
+        chat_id=callback_data.chat_id,
+    )
+
+
+async def _push_message_queue(state: 'UserContext', callback_message: 'Message') -> bool:
+    """Save the message to return to it by the back button."""
     if (
         message_queue := await state.get_value('message_queue')
     ) is None:  # Value can be None or list, the first case isn't acceptable.
-        return
+        return False
 
     message_queue.append(callback_message.model_dump_json())
     await state.update_data(message_queue=message_queue)
+    return True
+
+
+async def _choose_poll(
+    callback: 'CallbackQuery', state: 'UserContext', callback_message: 'Message', chat_id: int
+) -> None:
+    polls, has_older = await get_poll_data(chat_id=chat_id)
+    if not polls:
+        await callback.answer(
+            text=_('Опросы не найдены.'),
+            show_alert=True,
+        )
+        return
+
+    if not await _push_message_queue(state=state, callback_message=callback_message):
+        return
 
     await callback_message.edit_text(
         text=_('📆 Выберите дату опроса:'),
-        reply_markup=send_poll_kb(polls=polls),
+        reply_markup=send_poll_kb(polls=polls, chat_id=chat_id, has_older=has_older),
+    )
+
+
+@router.callback_query(
+    SendPollCallback.filter(F.action.in_({SendPollAction.NEWER, SendPollAction.OLDER})),
+    IsAdminFilter(),
+)
+async def send_poll_page_callback_handler(
+    callback: 'CallbackQuery', callback_data: SendPollCallback, callback_message: 'Message'
+) -> None:
+    newer = callback_data.action == SendPollAction.NEWER
+    polls, has_more = await get_poll_data(
+        chat_id=callback_data.chat_id,
+        cursor=(
+            datetime.datetime.strptime(callback_data.date, '%d.%m.%Y').date(),  # noqa: DTZ007
+            callback_data.poll_id,
+        ),
+        newer=newer,
+    )
+    if not polls:
+        await callback.answer(
+            text=_('Опросы не найдены.'),
+            show_alert=True,
+        )
+        return
+
+    await callback_message.edit_reply_markup(
+        reply_markup=send_poll_kb(
+            polls=polls,
+            chat_id=callback_data.chat_id,
+            has_newer=has_more if newer else True,
+            has_older=True if newer else has_more,
+        ),
     )
 
 
 @router.callback_query(
-    SendPollCallback.filter(F.date.regexp(pattern=r'^\d{1,2}\.\d{1,2}\.\d{2,4}$')),
+    SendPollCallback.filter(
+        (F.action == SendPollAction.CHOOSE) & F.date.regexp(pattern=r'^\d{1,2}\.\d{1,2}\.\d{2,4}$')
+    ),
     IsAdminFilter(),
 )
 async def send_poll_date_chosen_callback_handler(
@@ -166,24 +264,28 @@ async def send_poll_date_chosen_callback_handler(
         )
         return
 
-    answers = await get_poll_answers(
-        poll_id=callback_data.poll_id,
-        date=datetime.datetime.strptime(callback_data.date, '%d.%m.%Y').date(),  # noqa: DTZ007
-    )
-
-    attachment = pd.DataFrame(answers.all(), columns=[*answers.keys()])
-    if attachment.empty:
-        await callback.answer(
-            text=_('⚠️ Ответы на опрос отсутствуют в базе данных.'),
-            show_alert=True,
+    await answer_buffer.flush()  # include answers which are not saved yet
+    async with aiofiles.tempfile.TemporaryDirectory() as tmp_dir:
+        attachment = Path(tmp_dir) / f'poll_{callback_data.date}.xlsx'
+        async with get_poll_answers(
+            chat_id=callback_data.chat_id,
+            poll_id=callback_data.poll_id,
+            date=datetime.datetime.strptime(callback_data.date, '%d.%m.%Y').date(),  # noqa: DTZ007
+        ) as answers:
+            rows = await write_xlsx(path=attachment, result=answers)
+        if not rows:
+            await callback.answer(
+                text=_('⚠️ Ответы на опрос отсутствуют в базе данных.'),
+                show_alert=True,
+            )
+            return
+
+        message = await mail_client.create_message(
+            to_=user.email,
+            subject_=_('Результат опроса на дату {date}').format(date=callback_data.date),
+            content_=format_poll_tally(await get_poll_tally(poll_id=callback_data.poll_id)),
+            attachments_=(attachment,),
         )
-        return
-
-    message = await mail_client.create_message(
-        to_=user.email,
-        subject_=_('Результат опроса на дату {date}').format(date=callback_data.date),
-        attachments_=(attachment,),
-    )
     if not message:
         await callback.answer(
             text=_('❌ Ошибка при создании сообщения.'),
@@ -12,7 +12,9 @@ from aiogram.utils.i18n import gettext as _
 from isacbot.callbacks import (
     BackButtonCallback,
     RoadMapAction,
+    SendPollAction,
     SendPollCallback,
+    SendPollChatCallback,
     SettingsAction,
     SettingsCallback,
     StartAction,
@@ -149,16 +151,79 @@ def road_map_kb(*, is_acquired: bool = True, language_code: str) -> ReplyKeyboar
     )
 
 
-def send_poll_kb(polls: 'Sequence[Row[tuple[Datestamp, BigIntpk]]]') -> InlineKeyboardMarkup:
+def send_poll_chat_kb(chats: 'Sequence[tuple[int, str]]') -> InlineKeyboardMarkup:
+    """Chats which polls can be sent, `chats` are pairs of chat id and title."""
+    back_callback_data = BackButtonCallback()
+    return InlineKeyboardMarkup(
+        inline_keyboard=[
+            *(
+                [
+                    InlineKeyboardButton(
+                        text=title, callback_data=SendPollChatCallback(chat_id=chat_id).pack()
+                    )
+                ]
+                for chat_id, title in chats
+            ),
+            [
+                InlineKeyboardButton(
+                    text=_(back_callback_data.action), callback_data=back_callback_data.pack()
+                )
+            ],
+        ],
+        resize_keyboard=True,
+    )
+
+
+def send_poll_kb(
+    polls: 'Sequence[Row[tuple[Datestamp, BigIntpk]]]',
+    *,
+    chat_id: int,
+    has_newer: bool = False,
+    has_older: bool = False,
+) -> InlineKeyboardMarkup:
+    """Page of polls of the chat, newest first. Page buttons carry the first or the
+    last poll of the page as the cursor.
+    """
     kb: list[list[InlineKeyboardButton]] = [
         [
             InlineKeyboardButton(
                 text=f'{date:%d.%m.%Y}',
-                callback_data=SendPollCallback(poll_id=poll_id, date=f'{date:%d.%m.%Y}').pack(),
+                callback_data=SendPollCallback(
+                    poll_id=poll_id, date=f'{date:%d.%m.%Y}', chat_id=chat_id
+                ).pack(),
             )
         ]
         for date, poll_id in polls
     ]
+    page_buttons: list[InlineKeyboardButton] = []
+    if has_newer:
+        date, poll_id = polls[0]
+        page_buttons.append(
+            InlineKeyboardButton(
+                text=_('⬅️ Новее'),
+                callback_data=SendPollCallback(
+                    action=SendPollAction.NEWER,
+                    poll_id=poll_id,
+                    date=f'{date:%d.%m.%Y}',
+                    chat_id=chat_id,
+                ).pack(),
+            )
+        )
+    if has_older:
+        date, poll_id = polls[-1]
+        page_buttons.append(
+            InlineKeyboardButton(
+                text=_('Старше ➡️'),
+                callback_data=SendPollCallback(
+                    action=SendPollAction.OLDER,
+                    poll_id=poll_id,
+                    date=f'{date:%d.%m.%Y}',
+                    chat_id=chat_id,
+                ).pack(),
+            )
+        )
+    if page_buttons:
+        kb.append(page_buttons)
     back_callback_data = BackButtonCallback()
     kb.append(
         [
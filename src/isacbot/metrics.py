@@ -0,0 +1,109 @@
+"""In-process metrics of the application. All metrics are stored in the
+`METRICS` registry and can be requested by the bot owner.
+"""
+
+import bisect
+import json
+from collections import defaultdict
+from typing import TYPE_CHECKING, Any, Final
+
+
+if TYPE_CHECKING:
+    from collections.abc import Sequence
+    from pathlib import Path
+
+
+LATENCY_BUCKETS: Final = (0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0)  # in seconds
+SIZE_BUCKETS: Final = (1, 5, 10, 50, 100, 500, 1000)
+
+
+class Histogram:
+    """Non-cumulative histogram: `counts[i]` is the number of observations
+    in `(buckets[i - 1], buckets[i]]`, the last item counts everything above.
+    """
+
+    __slots__ = ('buckets', 'count', 'counts', 'max', 'total')
+
+    def __init__(self, buckets: 'Sequence[float]') -> None:
+        self.buckets: tuple[float, ...] = tuple(buckets)
+        self.counts: list[int] = [0] * (len(self.buckets) + 1)
+        self.count: int = 0
+        self.total: float = 0
+        self.max: float = 0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.count += 1
+        self.total += value
+        self.max = max(self.max, value)
+
+    @property
+    def mean(self) -> float:
+        return self.total / self.count if self.count else 0
+
+    def as_dict(self) -> dict[str, Any]:
+        return {
+            'count': self.count,
+            'mean': self.mean,
+            'max': self.max,
+            'buckets': {
+                **{
+                    f'<={bucket:g}': count
+                    for bucket, count in zip(self.buckets, self.counts, strict=False)
+                },
+                '+inf': self.counts[-1],
+            },
+        }
+
+
+class Metrics:
+    __slots__ = ('_counters', '_histograms')
+
+    def __init__(self) -> None:
+        self._counters: defaultdict[str, int] = defaultdict(int)
+        self._histograms: dict[str, Histogram] = {}
+
+    def inc(self, name: str, value: int = 1) -> None:
+        self._counters[name] += value
+
+    def observe(
+        self, name: str, value: float, buckets: 'Sequence[float]' = LATENCY_BUCKETS
+    ) -> None:
+        """Observe the value in the histogram, `buckets` are used only when
+        the histogram is created for the first time.
+        """
+        if not (histogram := self._histograms.get(name)):
+            histogram = self._histograms[name] = Histogram(buckets=buckets)
+        histogram.observe(value)
+
+    def snapshot(self, prefix: str = '') -> dict[str, Any]:
+        return {
+            **{name: value for name, value in self._counters.items() if name.startswith(prefix)},
+            **{
+                name: histogram.as_dict()
+                for name, histogram in self._histograms.items()
+                if name.startswith(prefix)
+            },
+        }
+
+    def dump(self, path: 'Path', prefix: str = '') -> None:
+        """Write the snapshot of metrics into a json file."""
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(json.dumps(self.snapshot(prefix=prefix), indent=2))
+
+    def render(self, prefix: str = '') -> str:
+        """Human readable metrics, one metric per line."""
+        lines = [
+            f'{name}: {value}'
+            for name, value in sorted(self._counters.items())
+            if name.startswith(prefix)
+        ]
+        lines.extend(
+            f'{name}: count={histogram.count} mean={histogram.mean:.4g} max={histogram.max:.4g}'
+            for name, histogram in sorted(self._histograms.items())
+            if name.startswith(prefix)
+        )
+        return '\n'.join(lines)
+
+
+METRICS = Metrics()
@@ -2,9 +2,12 @@ from .base import (
     BlockCallbackFromOldMessageMiddleware,
     DelayMiddleware,
     EventFromUserMiddleware,
+    ForgetChatMemberOuterMiddleware,
     SwapUserStateFromPrivateChatOuterMiddleware,
     UnhandledUpdatesLoggerMiddleware,
 )
+from .lanes import UpdateLanesMiddleware
+from .outbound import OutboundScheduler
 from .poll import (
     PollAnswerOuterMiddleware,
     PollCreationMessageInnerMiddleware,
@@ -12,6 +15,7 @@ from .poll import (
 from .road_map import RoadMapInputMessageDeleteInnerMiddleware
 from .settings import SettingsCallbackQueryMiddleware
 from .start import CallbackMessageProviderMiddleware
+from .throttling import ThrottlingMiddleware
 
 
 __all__ = (
@@ -19,10 +23,14 @@ __all__ = (
     'CallbackMessageProviderMiddleware',
     'DelayMiddleware',
     'EventFromUserMiddleware',
+    'ForgetChatMemberOuterMiddleware',
+    'OutboundScheduler',
     'PollAnswerOuterMiddleware',
     'PollCreationMessageInnerMiddleware',
     'RoadMapInputMessageDeleteInnerMiddleware',
     'SettingsCallbackQueryMiddleware',
     'SwapUserStateFromPrivateChatOuterMiddleware',
+    'ThrottlingMiddleware',
     'UnhandledUpdatesLoggerMiddleware',
+    'UpdateLanesMiddleware',
 )
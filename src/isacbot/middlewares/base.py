@@ -6,16 +6,17 @@ from typing import TYPE_CHECKING, Any
 
 from aiogram import BaseMiddleware
 from aiogram.dispatcher.event.bases import UNHANDLED
+from aiogram.enums import ChatType
 from aiogram.types import CallbackQuery, Message, PollAnswer
 
-from isacbot.filters import ChatTypeIsGroupFilter
+from isacbot.filters import ChatTypeIsGroupFilter, forget_chat_member
 from isacbot.states import get_fsm_context
 
 
 if TYPE_CHECKING:
     from collections.abc import Awaitable, Callable
 
-    from aiogram.types import TelegramObject
+    from aiogram.types import ChatMemberUpdated, TelegramObject
 
     from isacbot._typing import UserContext
 
@@ -111,6 +112,25 @@ class UnhandledUpdatesLoggerMiddleware(BaseMiddleware):
             logger.warning(msg='Unhandled update `%s`' % type(event))
 
 
+class ForgetChatMemberOuterMiddleware(BaseMiddleware):
+    """Forget the cached chat member who joined, left, was promoted, restricted
+    or banned before the `chat_member` or `my_chat_member` update reaches the
+    handlers. In private chats the member is the bot, so the user who blocked
+    or unblocked the bot is forgotten too.
+    """
+
+    async def __call__(  # type: ignore[override]
+        self,
+        handler: 'Callable[[ChatMemberUpdated, dict[str, Any]], Awaitable[Any]]',
+        event: 'ChatMemberUpdated',
+        data: dict[str, Any],
+    ) -> Any:
+        forget_chat_member(chat_id=event.chat.id, user_id=event.new_chat_member.user.id)
+        if event.chat.type == ChatType.PRIVATE:
+            forget_chat_member(chat_id=event.chat.id, user_id=event.from_user.id)
+        return await handler(event, data)
+
+
 class SwapUserStateFromPrivateChatOuterMiddleware(BaseMiddleware):
     """Allow to swap state from user private chats into handlers."""
 
@@ -0,0 +1,79 @@
+"""Serial lanes of updates: updates of the same user are handled one by one in
+order of arrival, updates of different users run in parallel.
+"""
+
+import asyncio
+from typing import TYPE_CHECKING, Any
+
+from aiogram import BaseMiddleware
+
+from isacbot.config import UPDATES_CONCURRENCY
+from isacbot.metrics import METRICS, SIZE_BUCKETS
+
+
+if TYPE_CHECKING:
+    from collections.abc import Awaitable, Callable
+
+    from aiogram.types import Chat, TelegramObject, User
+
+
+class _Lane:
+    __slots__ = ('lock', 'pending')
+
+    def __init__(self) -> None:
+        self.lock = asyncio.Lock()  # waiters acquire it in order of arrival
+        self.pending = 0
+
+
+class UpdateLanesMiddleware(BaseMiddleware):
+    """Outer middleware of updates which handles the updates of a user, or of a
+    chat when there is no user, in a serial lane, so their FSM reads and writes
+    don't interleave. At most `concurrency` updates of all lanes are handled at
+    once, updates without user and chat take only a slot of `concurrency`.
+
+    A handler holds its lane and a slot until it returns, so long waits of
+    handlers belong to background tasks.
+    """
+
+    def __init__(self, concurrency: int) -> None:
+        self._slots = asyncio.Semaphore(concurrency)
+        self._lanes: dict[int, _Lane] = {}
+
+    async def __call__(
+        self,
+        handler: 'Callable[[TelegramObject, dict[str, Any]], Awaitable[Any]]',
+        event: 'TelegramObject',
+        data: dict[str, Any],
+    ) -> Any:
+        arrived = asyncio.get_running_loop().time()
+        user: User | None = data.get('event_from_user')
+        chat: Chat | None = data.get('event_chat')
+        if (key := user.id if user else chat.id if chat else None) is None:
+            return await self._handle(handler, event, data, arrived=arrived)
+
+        if not (lane := self._lanes.get(key)):
+            lane = self._lanes[key] = _Lane()
+        lane.pending += 1
+        METRICS.observe('update_lanes.pending', lane.pending, buckets=SIZE_BUCKETS)
+        try:
+            async with lane.lock:
+                return await self._handle(handler, event, data, arrived=arrived)
+        finally:
+            lane.pending -= 1
+            if not lane.pending:
+                del self._lanes[key]
+
+    async def _handle(
+        self,
+        handler: 'Callable[[TelegramObject, dict[str, Any]], Awaitable[Any]]',
+        event: 'TelegramObject',
+        data: dict[str, Any],
+        *,
+        arrived: float,
+    ) -> Any:
+        async with self._slots:
+            METRICS.observe('update_lanes.wait', asyncio.get_running_loop().time() - arrived)
+            return await handler(event, data)
+
+
+update_lanes = UpdateLanesMiddleware(concurrency=UPDATES_CONCURRENCY)
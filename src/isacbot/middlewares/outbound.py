@@ -0,0 +1,198 @@
+"""Scheduler of outbound requests to Telegram API.
+
+Telegram allows about 30 messages per second in total, 1 message per second to
+the same private chat and 20 messages per minute to the same group, see
+https://core.telegram.org/bots/faq#my-bot-is-hitting-limits-how-do-i-avoid-this.
+"""
+
+import asyncio
+import enum
+import heapq
+import itertools
+import logging
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import TYPE_CHECKING, Final
+
+from aiogram.client.session.middlewares.base import BaseRequestMiddleware
+
+from isacbot.config import (
+    TELEGRAM_CHAT_BURST,
+    TELEGRAM_CHAT_RATE,
+    TELEGRAM_GROUP_RATE,
+    TELEGRAM_RATE,
+)
+from isacbot.errors import TelegramRetryAfter
+from isacbot.metrics import METRICS, SIZE_BUCKETS
+from isacbot.utils import TokenBucket
+
+
+if TYPE_CHECKING:
+    from collections.abc import Generator
+
+    from aiogram import Bot
+    from aiogram.client.session.middlewares.base import NextRequestMiddlewareType
+    from aiogram.methods import Response, TelegramMethod
+    from aiogram.methods.base import TelegramType
+
+
+logger = logging.getLogger(__name__)
+
+
+class RequestPriority(enum.IntEnum):
+    INTERACTIVE = enum.auto()
+    BACKGROUND = enum.auto()
+
+
+_request_priority: ContextVar[RequestPriority] = ContextVar(
+    'request_priority', default=RequestPriority.INTERACTIVE
+)
+# Methods which send or change messages are limited per chat.
+_MESSAGE_METHODS: Final = ('send', 'edit', 'copy', 'forward')
+
+
+@contextmanager
+def background_requests() -> 'Generator[None]':
+    """Make requests of the context, and of tasks created in it, yield to the
+    interactive requests, e.g. replies of handlers.
+    """
+    token = _request_priority.set(RequestPriority.BACKGROUND)
+    try:
+        yield
+    finally:
+        _request_priority.reset(token)
+
+
+class _PriorityGate:
+    """Token bucket whose waiting requests are released at the rate of the
+    bucket, in order of `RequestPriority`. Tokens are taken only for the request
+    to release, so a request never takes a future token ahead of requests of a
+    higher priority.
+    """
+
+    __slots__ = ('_dispatcher', '_order', '_waiters', 'bucket', 'name')
+
+    def __init__(self, bucket: TokenBucket, *, name: str) -> None:
+        self.bucket = bucket
+        self.name = name
+        self._waiters: list[tuple[RequestPriority, int, asyncio.Future[None]]] = []
+        self._order = itertools.count()
+        self._dispatcher: asyncio.Task[None] | None = None
+
+    def is_idle(self, now: float) -> bool:
+        return not self._waiters and self.bucket.is_full(now)
+
+    async def acquire(self, priority: RequestPriority) -> None:
+        loop = asyncio.get_running_loop()
+        if not self._waiters and self.bucket.try_take(loop.time()):
+            return
+        future = loop.create_future()
+        heapq.heappush(self._waiters, (priority, next(self._order), future))
+        METRICS.observe(f'outbound.queue.{self.name}', len(self._waiters), buckets=SIZE_BUCKETS)
+        if self._dispatcher is None or self._dispatcher.done():
+            self._dispatcher = asyncio.create_task(self._dispatch())
+        await future
+
+    async def _dispatch(self) -> None:
+        """Release waiting requests at the rate of the bucket, in order of priority."""
+        loop = asyncio.get_running_loop()
+        while self._waiters:
+            if delay := self.bucket.reserve(loop.time()):
+                await asyncio.sleep(delay)
+            while self._waiters:
+                *_, future = heapq.heappop(self._waiters)
+                if not future.done():  # cancelled requests are skipped
+                    future.set_result(None)
+                    break
+            else:
+                self.bucket.refund()
+
+
+class OutboundScheduler(BaseRequestMiddleware):
+    """Session middleware which keeps requests to chats within Telegram limits.
+
+    A request of a blocked chat waits until the chat is free, a message waits
+    for a token of its chat, then every request waits for a token of the
+    global bucket. Requests waiting for a bucket, of a chat or the global one,
+    are released in order of `RequestPriority`. `TelegramRetryAfter` blocks only
+    its chat for `retry_after` seconds and the request is repeated. Requests
+    without a chat, like `getUpdates`, are not limited.
+    """
+
+    _MAX_CHATS: Final = 1024  # idle chats are forgotten above this size
+    _MAX_RETRIES: Final = 3
+
+    def __init__(self, *, rate: float, chat_rate: float, group_rate: float, burst: int) -> None:
+        # Requests are spread evenly, without bursts.
+        self._global = _PriorityGate(TokenBucket(rate=rate, capacity=1), name='global')
+        self._chat_rate = chat_rate
+        self._group_rate = group_rate / 60
+        self._burst = burst
+        self._chats: dict[int | str, _PriorityGate] = {}
+        self._blocked: dict[int | str, float] = {}
+
+    async def __call__(
+        self,
+        make_request: 'NextRequestMiddlewareType[TelegramType]',
+        bot: 'Bot',
+        method: 'TelegramMethod[TelegramType]',
+    ) -> 'Response[TelegramType]':
+        chat_id: int | str | None = getattr(method, 'chat_id', None)
+        if chat_id is None:
+            return await make_request(bot, method)
+        is_message = method.__api_method__.startswith(_MESSAGE_METHODS)
+        retries = 0
+        while True:
+            await self._acquire(chat_id=chat_id, is_message=is_message)
+            try:
+                return await make_request(bot, method)
+            except TelegramRetryAfter as e:
+                METRICS.inc('outbound.retry_after')
+                if retries == self._MAX_RETRIES:
+                    raise
+                retries += 1
+                logger.warning(
+                    'Chat %s is limited, %s retried after %ds.'
+                    % (chat_id, method.__api_method__, e.retry_after)
+                )
+                self._block(chat_id=chat_id, seconds=e.retry_after)
+
+    def _chat(self, chat_id: int | str, now: float) -> _PriorityGate:
+        if not (gate := self._chats.get(chat_id)):
+            if len(self._chats) >= self._MAX_CHATS:
+                self._chats = {
+                    chat: gate for chat, gate in self._chats.items() if not gate.is_idle(now)
+                }
+            private = isinstance(chat_id, int) and chat_id > 0
+            gate = self._chats[chat_id] = _PriorityGate(
+                TokenBucket(
+                    rate=self._chat_rate if private else self._group_rate, capacity=self._burst
+                ),
+                name='chat',
+            )
+        return gate
+
+    def _block(self, chat_id: int | str, seconds: float) -> None:
+        now = asyncio.get_running_loop().time()
+        if len(self._blocked) >= self._MAX_CHATS:
+            self._blocked = {chat: until for chat, until in self._blocked.items() if until > now}
+        self._blocked[chat_id] = max(self._blocked.get(chat_id, now), now + seconds)
+
+    async def _acquire(self, chat_id: int | str, *, is_message: bool) -> None:
+        loop = asyncio.get_running_loop()
+        start = loop.time()
+        if (blocked := self._blocked.get(chat_id, start) - start) > 0:
+            await asyncio.sleep(blocked)
+        priority = _request_priority.get()
+        if is_message:
+            await self._chat(chat_id, loop.time()).acquire(priority)
+        await self._global.acquire(priority)
+        METRICS.observe(f'outbound.wait.{priority.name.lower()}', loop.time() - start)
+
+
+outbound_scheduler = OutboundScheduler(
+    rate=TELEGRAM_RATE,
+    chat_rate=TELEGRAM_CHAT_RATE,
+    group_rate=TELEGRAM_GROUP_RATE,
+    burst=TELEGRAM_CHAT_BURST,
+)
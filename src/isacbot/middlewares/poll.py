@@ -2,20 +2,14 @@ import datetime
 import logging
 from typing import TYPE_CHECKING, Any, Final
 
-from aiogram import BaseMiddleware, html
+from aiogram import BaseMiddleware
 from aiogram.types import Message, PollAnswer
-from aiogram.utils.i18n import gettext as _
 
 from isacbot.commands import ISACBotCommand
 from isacbot.config import BOT_TIMEZONE, POLL_DEFAULT_CLOSE_DELAY
-from isacbot.database.operations import (
-    add_user,
-    get_user,
-    poll_already_exist,
-)
 from isacbot.extensions import i18n
 from isacbot.filters import CreatePollCommandFilter
-from isacbot.states import PollContext, PollState
+from isacbot.states import poll_sessions
 from isacbot.utils import N_, Weekday
 
 
@@ -24,15 +18,13 @@ if TYPE_CHECKING:
 
     from aiogram.types import User
 
-    from isacbot._typing import JSONSerializable
-
 
 logger = logging.getLogger(__name__)
 
 
 class PollCreationMessageInnerMiddleware(BaseMiddleware):
     """Inner middleware for all messages allows to verify it's a poll
-    day or not and check if the poll exists in the database.
+    day or not and provide the date and the close delay of the poll.
 
     Since this middleware is bound to a "Message", it affects all such
     events. This means that all communications will go through this
@@ -98,22 +90,13 @@ class PollCreationMessageInnerMiddleware(BaseMiddleware):
             # All messages will pass through this tiny bottleneck.
             return await handler(event, data)
 
-        poll_date: Final[datetime.date] = event.date.astimezone(tz=BOT_TIMEZONE).date()
-        if await poll_already_exist(date=poll_date):
-            logger.debug('Poll already exist.')
-            await event.answer(
-                text=i18n.gettext(N_('⚠️ Опрос на дату {poll_date} уже сформирован.')).format(
-                    poll_date=f'{poll_date:%d.%m.%Y}'
-                )
-            )
-            return None
-
         if not self.is_pool_day:
             await event.answer(
                 i18n.gettext(N_('⚠️ Опрос выполняется только по понедельникам.')), show_alert=True
             )
             return None
 
+        poll_date: Final[datetime.date] = event.date.astimezone(tz=BOT_TIMEZONE).date()
         data['poll_close_delay'] = await self.get_poll_close_delay_for_event(event=event)
         data['poll_date'] = poll_date
         return await handler(event, data)
@@ -133,31 +116,11 @@ class PollAnswerOuterMiddleware(BaseMiddleware):
                 'Incorrect event type called: %s. Expected type %s.' % (type(event), PollAnswer)
             )
             return await handler(event, data)
-        # Poll verification has begun. This state is also created in the filter,
-        # but I leave it here in case we miss it later or there are some state
-        # errors.
-        poll_context: PollContext = data['poll_context']
-        if (await poll_context.get_state()) not in (
-            PollState.STARTED,
-            PollState.STARTED_AND_PINNED,
+        # Find the running poll the answer belongs to, answers to old polls
+        # have no active session.
+        if not (session := poll_sessions.active(poll_id=int(event.poll_id))) or not (
+            poll_message := session.message
         ):
-            logger.debug('Poll context has incorrect state: %s' % poll_context)
-            return None
-
-        # Check the poll context data provided.
-        if not (poll_context_data := await poll_context.get_data()):
-            logger.debug("Poll context doesn't contain data.")
-            return None
-
-        # Check the poll message provided.
-        poll_message_json: JSONSerializable | None = poll_context_data.get('poll_message')
-        if not poll_message_json:
-            logger.debug("Poll isn't created.")
-            return None
-
-        poll_message: Message = Message.model_validate_json(poll_message_json)
-        # Check user response to an old poll.
-        if not poll_message.poll or event.poll_id != poll_message.poll.id:
             logger.debug('User tried to answer an old poll.')
             return None
 
@@ -177,34 +140,10 @@ class PollAnswerOuterMiddleware(BaseMiddleware):
         if not event.bot:
             return None
 
-        # Check for user existence in database.
-        if not (db_user := await get_user(user_id=user.id)):
-            logger.debug('User is not registered in the database.')
-            # Register the user even though the user is anonymous.
-            await add_user(
-                user_id=user.id,
-                username=user.username,
-                full_name=user.full_name,
-            )
-        if not db_user or not db_user.displayname:
-            await event.bot.send_message(
-                chat_id=poll_message.chat.id,
-                message_thread_id=poll_message.message_thread_id,
-                message_effect_id=poll_message.effect_id,
-                text=_(
-                    '⚠️ Уважаемый(ая) {full_name}, для регистрации воспользуйтесь командой {command} в приватном чате со мной.'
-                ).format(
-                    full_name=html.bold(user.full_name),
-                    command=html.link(
-                        value='/start',
-                        link=f'https://t.me/{(await event.bot.get_me()).username}?start=start',
-                    ),
-                ),
-            )
-
         logger.debug('Provided correct poll answer to handler.')
 
         data['chat_id'] = (
             poll_message.chat.id
         )  # The PollAnswer update does not include a chat variable in the response data by default.
+        data['poll_session'] = session
         return await handler(event, data)
@@ -0,0 +1,148 @@
+"""Throttling of incoming messages by token buckets of users and group chats.
+
+Messages within the rates are handled without delay, messages above them are
+dropped. The buckets are kept in memory of the process or, with
+`THROTTLING_REDIS`, in Redis to share the limits between replicas of the bot.
+"""
+
+import asyncio
+import logging
+from typing import TYPE_CHECKING, Any, Final
+
+from aiogram import BaseMiddleware
+from redis.exceptions import RedisError
+
+from isacbot.config import (
+    THROTTLING_CHAT_BURST,
+    THROTTLING_CHAT_RATE,
+    THROTTLING_REDIS,
+    THROTTLING_USER_BURST,
+    THROTTLING_USER_RATE,
+)
+from isacbot.extensions import redis
+from isacbot.metrics import METRICS
+from isacbot.utils import TokenBucket
+
+
+if TYPE_CHECKING:
+    from collections.abc import Awaitable, Callable
+
+    from aiogram.types import Chat, TelegramObject, User
+    from redis.asyncio.client import Redis
+
+
+logger = logging.getLogger(__name__)
+
+
+# Refill the bucket by the time of Redis, take a token if there is one and
+# return 1, otherwise 0. The bucket expires when it would be full again.
+_TAKE_SCRIPT: Final = """
+local rate = tonumber(ARGV[1])
+local capacity = tonumber(ARGV[2])
+local time = redis.call('TIME')
+local now = tonumber(time[1]) + tonumber(time[2]) / 1000000
+local bucket = redis.call('HMGET', KEYS[1], 'tokens', 'updated')
+local tokens = math.min(capacity, (tonumber(bucket[1]) or capacity) + (now - (tonumber(bucket[2]) or now)) * rate)
+local taken = 0
+if tokens >= 1 then
+    tokens = tokens - 1
+    taken = 1
+end
+redis.call('HSET', KEYS[1], 'tokens', tostring(tokens), 'updated', tostring(now))
+redis.call('PEXPIRE', KEYS[1], math.ceil((capacity - tokens) / rate * 1000))
+return taken
+"""
+
+
+class MemoryThrottlingBackend:
+    """Token buckets in memory of the process."""
+
+    _MAX_BUCKETS: Final = 4096  # full buckets are forgotten above this size
+
+    def __init__(self) -> None:
+        self._buckets: dict[str, TokenBucket] = {}
+
+    async def take(self, key: str, *, rate: float, capacity: int) -> bool:
+        now = asyncio.get_running_loop().time()
+        if not (bucket := self._buckets.get(key)):
+            if len(self._buckets) >= self._MAX_BUCKETS:
+                self._buckets = {
+                    key: bucket for key, bucket in self._buckets.items() if not bucket.is_full(now)
+                }
+            bucket = self._buckets[key] = TokenBucket(rate=rate, capacity=capacity)
+        return bucket.try_take(now)
+
+
+class RedisThrottlingBackend:
+    """Token buckets in Redis, shared between replicas of the bot. Messages are
+    not throttled while Redis is unavailable.
+    """
+
+    _PREFIX: Final = 'throttling'
+
+    def __init__(self, redis: 'Redis') -> None:
+        self._take = redis.register_script(_TAKE_SCRIPT)
+
+    async def take(self, key: str, *, rate: float, capacity: int) -> bool:
+        try:
+            return bool(await self._take(keys=[f'{self._PREFIX}:{key}'], args=[rate, capacity]))
+        except RedisError as e:
+            logger.warning('Message is not throttled, Redis is unavailable: %s' % e)
+            return True
+
+
+class ThrottlingMiddleware(BaseMiddleware):
+    """Drop messages of a user above `user_rate` messages per second and
+    messages of a group above `chat_rate`. Up to `user_burst` and `chat_burst`
+    messages are handled at once before the rates apply.
+    """
+
+    def __init__(
+        self,
+        *,
+        backend: MemoryThrottlingBackend | RedisThrottlingBackend,
+        user_rate: float,
+        user_burst: int,
+        chat_rate: float,
+        chat_burst: int,
+    ) -> None:
+        self.backend = backend
+        self.user_rate = user_rate
+        self.user_burst = user_burst
+        self.chat_rate = chat_rate
+        self.chat_burst = chat_burst
+
+    async def __call__(
+        self,
+        handler: 'Callable[[TelegramObject, dict[str, Any]], Awaitable[Any]]',
+        event: 'TelegramObject',
+        data: dict[str, Any],
+    ) -> Any:
+        user: User | None = data.get('event_from_user')
+        chat: Chat | None = data.get('event_chat')
+        if user and not await self.backend.take(
+            f'user:{user.id}', rate=self.user_rate, capacity=self.user_burst
+        ):
+            METRICS.inc('throttling.dropped.user')
+            logger.debug('Message of user %d is dropped.' % user.id)
+            return None
+        if (
+            chat
+            and (not user or chat.id != user.id)  # a private chat is limited by its user
+            and not await self.backend.take(
+                f'chat:{chat.id}', rate=self.chat_rate, capacity=self.chat_burst
+            )
+        ):
+            METRICS.inc('throttling.dropped.chat')
+            logger.debug('Message in chat %d is dropped.' % chat.id)
+            return None
+        return await handler(event, data)
+
+
+throttling_middleware = ThrottlingMiddleware(
+    backend=RedisThrottlingBackend(redis=redis) if THROTTLING_REDIS else MemoryThrottlingBackend(),
+    user_rate=THROTTLING_USER_RATE,
+    user_burst=THROTTLING_USER_BURST,
+    chat_rate=THROTTLING_CHAT_RATE,
+    chat_burst=THROTTLING_CHAT_BURST,
+)
@@ -0,0 +1,59 @@
+"""Incremental writers of query results.
+
+Rows are written partition by partition while the result is streamed from the
+database, so memory usage doesn't depend on the number of rows: the writers keep
+one partition at a time and SQLite caches pages and sorts rows within the
+`cache_size` of the connection.
+"""
+
+import asyncio
+import csv
+import io
+import logging
+from typing import TYPE_CHECKING, Any
+
+import aiofiles
+from openpyxl import Workbook
+
+
+if TYPE_CHECKING:
+    from pathlib import Path
+
+    from sqlalchemy.ext.asyncio import AsyncResult
+
+
+logger = logging.getLogger(__name__)
+
+
+async def write_xlsx(path: 'Path', result: 'AsyncResult[Any]') -> int:
+    """Write result into a xlsx file, return number of written rows."""
+    workbook = Workbook(write_only=True)  # rows are flushed into a temporary file on append
+    sheet = workbook.create_sheet()
+    sheet.append(list(result.keys()))
+    rows = 0
+    async for partition in result.partitions():
+        for row in partition:
+            sheet.append(tuple(row))
+        rows += len(partition)
+    await asyncio.to_thread(workbook.save, path)  # compression of the whole file
+    logger.debug('%d rows written into %s.' % (rows, path))
+    return rows
+
+
+async def write_csv(path: 'Path', result: 'AsyncResult[Any]') -> int:
+    """Write result into a csv file, return number of written rows."""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(result.keys())
+    rows = 0
+    # `utf-8-sig` allows Excel to detect the encoding.
+    async with aiofiles.open(path, mode='w', encoding='utf-8-sig', newline='') as file:
+        async for partition in result.partitions():
+            writer.writerows(partition)
+            rows += len(partition)
+            await file.write(buffer.getvalue())
+            buffer.seek(0)
+            buffer.truncate()
+        await file.write(buffer.getvalue())  # header of the empty result
+    logger.debug('%d rows written into %s.' % (rows, path))
+    return rows
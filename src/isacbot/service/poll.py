@@ -0,0 +1,148 @@
+"""Opening of polls, shared by the `/create_poll` command and the scheduled job."""
+
+import datetime
+import logging
+from typing import TYPE_CHECKING, Final
+
+from isacbot.background.live_results import live_results
+from isacbot.config import POLL_LIVE_RESULTS, POLL_REMINDER_BEFORE
+from isacbot.database.operations import create_poll, release_poll, reserve_poll
+from isacbot.database.utils import PollOptions, PollStatus
+from isacbot.errors import PollAlreadyExistError
+from isacbot.extensions import DateTrigger, bot, dp, i18n, scheduler
+from isacbot.states import PollState, poll_sessions
+from isacbot.utils import N_
+
+
+if TYPE_CHECKING:
+    from aiogram import Bot
+    from aiogram.fsm.storage.base import BaseStorage
+
+    from isacbot.states import PollSession
+
+
+logger = logging.getLogger(__name__)
+
+
+# Textual references, the jobs are stored in the persistent job store.
+_CLOSE_POLL_JOB: Final = 'isacbot.background.tasks:close_poll_in_chat'
+_REMIND_POLL_JOB: Final = 'isacbot.background.tasks:remind_poll_in_chat'
+
+
+def schedule_poll_close(session: 'PollSession', close_at: datetime.datetime) -> None:
+    """Schedule `close_poll` at `close_at` in the persistent job store. A poll which
+    should have been closed in the past is closed as soon as the scheduler runs.
+    Reminders to users who haven't answered are scheduled `POLL_REMINDER_BEFORE`
+    seconds before the close, unless this time has passed.
+    """
+    remind_at = close_at - datetime.timedelta(seconds=POLL_REMINDER_BEFORE)
+    if POLL_REMINDER_BEFORE and remind_at > datetime.datetime.now(tz=datetime.UTC):
+        scheduler.add_job(
+            id=session.remind_job_id,
+            name=session.remind_job_id,
+            replace_existing=True,
+            misfire_grace_time=None,
+            func=_REMIND_POLL_JOB,
+            kwargs={'chat_id': session.chat_id, 'poll_id': session.poll_id},
+            trigger=DateTrigger(run_date=remind_at),
+        )
+    scheduler.add_job(
+        id=session.close_job_id,
+        name=session.close_job_id,
+        replace_existing=True,
+        misfire_grace_time=None,
+        func=_CLOSE_POLL_JOB,
+        kwargs={'chat_id': session.chat_id, 'poll_id': session.poll_id},
+        trigger=DateTrigger(run_date=close_at),
+    )
+    logger.debug('%r closes at %s.' % (session, close_at.isoformat()))
+
+
+class PollService:
+    """Open polls of the bot, the FSM contexts of the polls are kept in `storage`."""
+
+    def __init__(self, bot: 'Bot', storage: 'BaseStorage') -> None:
+        self.bot = bot
+        self.storage = storage
+
+    async def open_poll(
+        self, chat_id: int, date: datetime.date, close_delay: int
+    ) -> 'PollSession | None':
+        """Send the poll of the date to the chat, save it, schedule its close in
+        `close_delay` seconds and pin it. Return the session of the running poll
+        or `None` if the poll is not created.
+
+        Raise `PollAlreadyExistError` if the poll of the chat on the date exists
+        or is being opened, see `reserve_poll`.
+        """
+        if not await reserve_poll(chat_id=chat_id, date=date):
+            raise PollAlreadyExistError(chat_id, date)
+        try:
+            return await self._open_poll(chat_id=chat_id, date=date, close_delay=close_delay)
+        finally:
+            release_poll(chat_id=chat_id, date=date)  # the created poll is kept
+
+    async def _open_poll(
+        self, chat_id: int, date: datetime.date, close_delay: int
+    ) -> 'PollSession | None':
+        question: Final[str] = i18n.gettext(N_('💻 Где Вы сегодня {poll_date}?')).format(
+            poll_date=f'{date:%d.%m.%Y}'
+        )
+        message = await self.bot.send_poll(
+            chat_id=chat_id,
+            question=question,
+            options=[i18n.gettext(option.value) for option in PollOptions],
+            type='regular',
+            is_anonymous=False,
+            allows_multiple_answers=False,
+            disable_notification=False,
+            protect_content=True,
+            reply_markup=None,
+        )
+        if not message.poll:
+            return None
+
+        poll_id = int(message.poll.id)
+        session = poll_sessions.open(
+            storage=self.storage,
+            bot_id=self.bot.id,
+            chat_id=message.chat.id,
+            poll_id=poll_id,
+        )
+        # Create poll in database and check if it was created.
+        if not (
+            await create_poll(
+                poll_id=poll_id,
+                chat_id=session.chat_id,
+                question=question,
+                date=date,
+                status=PollStatus.STARTED,
+            )
+        ):
+            await self.bot.delete_message(
+                chat_id=message.chat.id,
+                message_id=message.message_id,
+            )
+            await poll_sessions.close(session)
+            logger.debug('Poll has not been created in the database.')
+            return None
+
+        close_at = datetime.datetime.now(tz=datetime.UTC) + datetime.timedelta(seconds=close_delay)
+        await session.transition(
+            PollState.CREATED, poll_message=message.model_dump_json(), close_at=close_at.isoformat()
+        )
+        poll_sessions.activate(session, message=message)
+        # The poll is closed by the job even if the bot is restarted in the meantime,
+        # so nobody waits for the end of the poll.
+        schedule_poll_close(session=session, close_at=close_at)
+        logger.info('Poll started in chat %d.' % session.chat_id)
+
+        # Pin message and context for the poll, unless the poll is closed already.
+        if await message.pin(disable_notification=False) and session.accepts_answers:
+            await session.transition(PollState.PINNED, pinned=True)
+        if POLL_LIVE_RESULTS:
+            await live_results.open(session)
+        return session
+
+
+poll_service = PollService(bot=bot, storage=dp.storage)
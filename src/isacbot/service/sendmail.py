@@ -1,22 +1,21 @@
 import logging
+import mimetypes
 from email.message import EmailMessage
 from email.utils import formatdate
-from pathlib import Path
 from ssl import Purpose, create_default_context
 from typing import TYPE_CHECKING
 
 import aiofiles
 import aiosmtplib
-import pandas as pd
 from aiosmtplib.smtp import SMTP_TLS_PORT
 
 
 if TYPE_CHECKING:
     from collections.abc import Iterable
+    from pathlib import Path
     from ssl import SSLContext
 
     from aiosmtplib import SMTPResponse
-    from pandas import DataFrame
 
 
 logger = logging.getLogger(__name__)
@@ -56,12 +55,12 @@ class SMTPClient:
         to_: str,
         subject_: str,
         content_: str = '',
-        attachments_: 'Iterable[DataFrame] | None' = None,
+        attachments_: 'Iterable[Path] | None' = None,
     ) -> EmailMessage | None:
-        """Create email message with optional attachments as `Iterable[DataFrame]`.
+        """Create email message with optional attachments as `Iterable[Path]` of files.
 
-        If there are attachments, create a corresponding Excel file for each attachment
-        and add them to the message.
+        Files are expected to be written beforehand, e.g. by `service.export` writers.
+        Every file is read whole, so the message takes as much memory as its files.
         Return `EmailMessage` if the message was successfully created, otherwise if any error
         occurs, return `None`.
         """
@@ -75,24 +74,18 @@ class SMTPClient:
         if not attachments_:
             return message
 
-        for data in attachments_:
-            async with aiofiles.tempfile.NamedTemporaryFile(
-                mode='wb', delete=False, suffix='.xlsx'
-            ) as tmp_file:
-                tmp_file_path = Path(tmp_file.name)  # type: ignore
+        for path in attachments_:
+            mimetype, _ = mimetypes.guess_type(path.name)
+            maintype, subtype = (mimetype or 'application/octet-stream').split('/', maxsplit=1)
             try:
-                with pd.ExcelWriter(path=tmp_file_path, mode='w') as writer:
-                    data.to_excel(excel_writer=writer, index=False)
-                async with aiofiles.open(file=tmp_file_path, mode='rb') as file:
+                async with aiofiles.open(file=path, mode='rb') as file:
                     message.add_attachment(
                         await file.read(),
-                        maintype='application',
-                        subtype='vnd.openxmlformats-officedocument.spreadsheetml.sheet',
-                        filename=tmp_file_path.name,
+                        maintype=maintype,
+                        subtype=subtype,
+                        filename=path.name,
                     )
             except Exception:
-                logger.exception('Error while saving data into xlsx file.')
+                logger.exception('Error while attaching %s file.' % path)
                 return None
-            finally:
-                tmp_file_path.unlink()
         return message
@@ -1,10 +1,7 @@
-import asyncio
+import dataclasses
 import enum
-from typing import (
-    TYPE_CHECKING,
-    Any,
-    ClassVar,
-)
+import logging
+from typing import TYPE_CHECKING, Any, Final
 
 from aiogram.fsm.context import FSMContext
 from aiogram.fsm.state import (
@@ -14,12 +11,13 @@ from aiogram.fsm.state import (
     default_state,  # noqa: F401
 )
 from aiogram.fsm.storage.base import StorageKey
+from aiogram.types import Message
 
-from isacbot.errors import PollContextAlreadyExistError
+from isacbot.errors import PollSessionAlreadyExistError, PollTransitionError
 
 
 if TYPE_CHECKING:
-    from asyncio import Lock
+    from collections.abc import Iterator, Mapping
 
     from aiogram.fsm.storage.base import BaseStorage
 
@@ -28,11 +26,28 @@ else:
     from functools import cache
 
 
-class PollState(StatesGroup):
-    NOT_STARTED = State()
-    STARTED = State()
-    STARTED_AND_PINNED = State()
-    COMPLETED = State()
+logger = logging.getLogger(__name__)
+
+
+class PollState(enum.Enum):
+    """Lifecycle of a poll, see `PollSession.transition`."""
+
+    CREATED = enum.auto()
+    PINNED = enum.auto()
+    CLOSING = enum.auto()
+    CLOSED = enum.auto()
+    UNPINNED = enum.auto()
+
+
+# Allowed transitions, `None` is the state of a session which poll isn't created yet.
+_POLL_TRANSITIONS: Final['Mapping[PollState | None, frozenset[PollState]]'] = {
+    None: frozenset({PollState.CREATED}),
+    PollState.CREATED: frozenset({PollState.PINNED, PollState.CLOSING}),
+    PollState.PINNED: frozenset({PollState.CLOSING}),
+    PollState.CLOSING: frozenset({PollState.CLOSED}),
+    PollState.CLOSED: frozenset({PollState.UNPINNED}),
+    PollState.UNPINNED: frozenset(),
+}
 
 
 class UserState(StatesGroup):
@@ -46,83 +61,169 @@ class UserThreadID(enum.IntEnum):
     ROAD_MAP = enum.auto()
 
 
-class PollContext:
-    """Poll context conatin states where `user_id == bot_id` for
-    provided `chat_id`. Context of such poll unique for every bot
-    in chat.
+class PollSession:
+    """Context of a single poll in a chat.
+
+    Every session has its own FSM context with key where `user_id == bot_id`
+    and `thread_id == poll_id`, like `UserThreadID` for user contexts, so polls
+    in different chats, or successive polls in the same chat, never share a
+    state. The context keeps the state of the poll, the poll message and the
+    close time, which allows to restore the session after a restart. The poll is
+    closed by the job `close_job_id` of the persistent job store. `message` is
+    the parsed poll message of the active poll and `results_message` is its live
+    results message, if any.
 
-    Storage is getting from actual storage of any event.
-    All implementation is like `FSMContext`.
-    This class work only for single poll.
+    `state` is the in-process snapshot of the poll state, it's read without
+    locks and without the storage. Every change of the state is written to the
+    context once, with `data`, so the storage mirrors the snapshot for restarts
+    and other processes.
     """
 
-    key: ClassVar[StorageKey | None] = None
-    storage: ClassVar['BaseStorage | None'] = None
-    _value: ClassVar['FSMContext | None'] = None
-    _lock: ClassVar['Lock'] = asyncio.Lock()
-
-    @classmethod
-    async def get_state(cls) -> str | None:
-        async with cls._lock:
-            if cls._value:
-                return await cls._value.get_state()
-            return None
-
-    @classmethod
-    async def get_data(cls) -> dict[str, Any] | None:
-        async with cls._lock:
-            if cls._value:
-                return await cls._value.get_data()
-            return None
-
-    @classmethod
-    async def set_state(cls, state: str | State | None = None) -> None:
-        async with cls._lock:
-            if cls._value:
-                await cls._value.set_state(state)
-
-    @classmethod
-    async def set_data(cls, data: dict[str, Any]) -> None:
-        async with cls._lock:
-            if cls._value:
-                await cls._value.set_data(data)
-
-    @classmethod
-    async def set(cls, storage: 'BaseStorage', bot_id: int, chat_id: int) -> None:
-        if cls._value:
-            raise PollContextAlreadyExistError
-        async with cls._lock:
-            cls.key = StorageKey(
+    __slots__ = (
+        'chat_id',
+        'context',
+        'data',
+        'message',
+        'poll_id',
+        'results_message',
+        'state',
+    )
+
+    def __init__(self, storage: 'BaseStorage', bot_id: int, chat_id: int, poll_id: int) -> None:
+        self.chat_id = chat_id
+        self.poll_id = poll_id
+        self.context = FSMContext(
+            storage=storage,
+            key=StorageKey(
                 bot_id=bot_id,
                 chat_id=chat_id,
                 user_id=bot_id,
-            )
-            cls.storage = storage
-            cls._value = FSMContext(storage=storage, key=cls.key)
-
-    @classmethod
-    async def update_data(
-        cls, data: dict[str, Any] | None = None, **kwargs: Any
-    ) -> dict[str, Any] | None:
-        if data:
-            kwargs.update(data)
-        async with cls._lock:
-            if cls.storage and cls.key:
-                return await cls.storage.update_data(key=cls.key, data=kwargs)
-            return None
-
-    @classmethod
-    async def get(cls) -> 'FSMContext | None':
-        return cls._value
-
-    @classmethod
-    async def clear(cls) -> None:
-        async with cls._lock:
-            if cls._value:
-                await cls._value.clear()
-                cls._value = None
-                cls.key = None
-                cls.storage = None
+                thread_id=poll_id,
+            ),
+        )
+        self.state: PollState | None = None
+        self.data: dict[str, Any] = {}
+        self.message: Message | None = None
+        self.results_message: Message | None = None
+
+    def __repr__(self) -> str:
+        return f'{type(self).__name__}(chat_id={self.chat_id}, poll_id={self.poll_id})'
+
+    @property
+    def accepts_answers(self) -> bool:
+        return self.state in {PollState.CREATED, PollState.PINNED}
+
+    @property
+    def pinned(self) -> bool:
+        return bool(self.data.get('pinned'))
+
+    async def save(self, **data: Any) -> None:
+        """Update the data of the context with a single write."""
+        self.data.update(data)
+        await self.context.set_data(self.data)
+
+    async def transition(self, state: PollState, **data: Any) -> None:
+        """Change the state of the poll and save it with `data`, raise
+        `PollTransitionError` if the poll can't get to the state from the current one.
+        """
+        if state not in _POLL_TRANSITIONS[self.state]:
+            raise PollTransitionError(self, self.state, state)
+        self.state = state
+        await self.save(state=state.name, **data)
+        logger.debug('%r is %s.' % (self, state.name))
+
+    async def load(self) -> dict[str, Any]:
+        """Read the data of the context. A poll started before every poll had its
+        own context is read from the former context of its chat, the key without
+        `thread_id`, and moved to the context of the poll.
+        """
+        if data := await self.context.get_data():
+            return data
+        legacy = FSMContext(
+            storage=self.context.storage,
+            key=dataclasses.replace(self.context.key, thread_id=None),
+        )
+        data = await legacy.get_data()
+        if not (poll_message_json := data.get('poll_message')):
+            return data
+        poll = Message.model_validate_json(poll_message_json).poll
+        if not poll or poll.id != str(self.poll_id):  # the context of another poll
+            return {}
+        pinned = await legacy.get_state() == 'PollState:STARTED_AND_PINNED'
+        data['state'] = (PollState.PINNED if pinned else PollState.CREATED).name
+        data['pinned'] = pinned
+        await self.context.set_data(data)
+        await legacy.clear()
+        logger.info('Context of %r is moved from the context of its chat.' % self)
+        return data
+
+    def restore(self, data: 'Mapping[str, Any]') -> None:
+        """Restore the snapshot from the data of the context. Contexts saved before
+        the state was kept in the data are of pinned polls.
+        """
+        self.data = dict(data)
+        self.state = PollState[self.data.setdefault('state', PollState.PINNED.name)]
+        self.data.setdefault('pinned', self.state is PollState.PINNED)
+
+    @property
+    def close_job_id(self) -> str:
+        return f'close_poll_{self.chat_id}_{self.poll_id}'
+
+    @property
+    def remind_job_id(self) -> str:
+        return f'remind_poll_{self.chat_id}_{self.poll_id}'
+
+
+class PollSessionRegistry:
+    """Sessions of all running polls keyed by `(chat_id, poll_id)`.
+
+    Sessions which accept answers are also indexed by the Telegram poll id, so
+    a `PollAnswer`, which has no chat, is matched to its poll with a single dict
+    lookup. The FSM context stays the source of truth for recovery, the index
+    is never read from the storage.
+
+    The registry is used only from the event loop, so it doesn't need locks.
+    """
+
+    def __init__(self) -> None:
+        self._sessions: dict[tuple[int, int], PollSession] = {}
+        self._active: dict[int, PollSession] = {}
+
+    def __len__(self) -> int:
+        return len(self._sessions)
+
+    def __iter__(self) -> 'Iterator[PollSession]':
+        return iter(tuple(self._sessions.values()))
+
+    def open(self, storage: 'BaseStorage', bot_id: int, chat_id: int, poll_id: int) -> PollSession:
+        if (chat_id, poll_id) in self._sessions:
+            raise PollSessionAlreadyExistError(chat_id, poll_id)
+        session = PollSession(storage=storage, bot_id=bot_id, chat_id=chat_id, poll_id=poll_id)
+        self._sessions[chat_id, poll_id] = session
+        logger.debug('%r opened, %d polls running.' % (session, len(self._sessions)))
+        return session
+
+    def get(self, chat_id: int, poll_id: int) -> PollSession | None:
+        return self._sessions.get((chat_id, poll_id))
+
+    def activate(self, session: PollSession, message: 'Message') -> None:
+        """Accept answers of the session poll, `message` is the stored poll message."""
+        session.message = message
+        self._active[session.poll_id] = session
+
+    def active(self, poll_id: int) -> PollSession | None:
+        """Get session which accepts answers by poll id only."""
+        return self._active.get(poll_id)
+
+    async def close(self, session: PollSession) -> None:
+        """Clear the FSM context and forget the session."""
+        self._active.pop(session.poll_id, None)
+        await session.context.clear()
+        self._sessions.pop((session.chat_id, session.poll_id), None)
+        logger.debug('%r closed, %d polls running.' % (session, len(self._sessions)))
+
+
+poll_sessions = PollSessionRegistry()
 
 
 @cache
@@ -4,14 +4,20 @@ import enum
 import logging
 from typing import TYPE_CHECKING
 
+from aiogram.utils.i18n import gettext as _
+
 from isacbot.config import BOT_TIMEZONE
 from isacbot.errors import TelegramForbiddenError
 
 
 if TYPE_CHECKING:
+    from collections.abc import Mapping
+
     from aiogram import Bot
     from aiogram.types import Message
 
+    from isacbot.database.utils import PollOptions
+
 
 logger = logging.getLogger(__name__)
 
@@ -44,6 +50,13 @@ async def stop_poll(pinned_message: 'Message', bot: 'Bot') -> None:
     await bot.stop_poll(pinned_message.chat.id, pinned_message.message_id)
 
 
+def format_poll_tally(tally: 'Mapping[PollOptions, int]') -> str:
+    """Format the number of answers for every poll option and the total one."""
+    lines = [f'{_(option)}: {count}' for option, count in tally.items()]
+    lines.append(_('Всего: {total}').format(total=sum(tally.values())))
+    return '\n'.join(lines)
+
+
 class AsyncSet:
     __slots__ = ('_lock', '_set')
 
@@ -68,6 +81,46 @@ class AsyncSet:
             return bool(self._set)
 
 
+class TokenBucket:
+    """Bucket of `capacity` tokens refilled at `rate` tokens per second. Tokens
+    are reserved in advance, so the bucket may go into debt, and `reserve`
+    returns the time to wait for the reserved token. `now` is the time of the
+    event loop.
+    """
+
+    __slots__ = ('_updated', 'capacity', 'rate', 'tokens')
+
+    def __init__(self, *, rate: float, capacity: float) -> None:
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self._updated: float = 0
+
+    def _refill(self, now: float) -> None:
+        self.tokens = min(self.capacity, self.tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def reserve(self, now: float) -> float:
+        self._refill(now)
+        self.tokens -= 1
+        return max(0, -self.tokens / self.rate)
+
+    def try_take(self, now: float) -> bool:
+        """Take a token if there is one without waiting."""
+        self._refill(now)
+        if self.tokens < 1:
+            return False
+        self.tokens -= 1
+        return True
+
+    def refund(self) -> None:
+        self.tokens = min(self.capacity, self.tokens + 1)
+
+    def is_full(self, now: float) -> bool:
+        self._refill(now)
+        return self.tokens >= self.capacity
+
+
 class Weekday(enum.IntEnum):
     MONDAY = 1
     TUESDAY = 2
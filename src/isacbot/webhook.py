@@ -0,0 +1,196 @@
+"""Webhook delivery of updates, an alternative to long polling selected by
+`BOT_WEBHOOK_URL`, see https://core.telegram.org/bots/api#setwebhook.
+
+Telegram expects a fast answer to every webhook request, so updates are
+handled in background tasks and the request is answered right away.
+"""
+
+import asyncio
+import contextlib
+import logging
+import secrets
+import signal
+from typing import TYPE_CHECKING, Any, Final
+from urllib.parse import urlsplit
+
+from aiogram.webhook.aiohttp_server import SimpleRequestHandler
+from aiohttp import web
+
+from isacbot.config import (
+    BOT_WEBHOOK_HOST,
+    BOT_WEBHOOK_MAX_IN_FLIGHT,
+    BOT_WEBHOOK_PORT,
+    BOT_WEBHOOK_SECRET,
+    BOT_WEBHOOK_URL,
+)
+from isacbot.metrics import METRICS, SIZE_BUCKETS
+
+
+if TYPE_CHECKING:
+    from aiogram import Bot, Dispatcher
+
+
+logger = logging.getLogger(__name__)
+
+
+_HEALTH_PATH: Final = '/health'
+_READY_PATH: Final = '/ready'
+_STOP_SIGNALS: Final = (signal.SIGINT, signal.SIGTERM)
+
+
+class WebhookRequestHandler(SimpleRequestHandler):
+    """Handle updates of webhook requests in background, at most `max_in_flight`
+    at a time. Above it a request waits for a free slot before it is answered,
+    so Telegram, which keeps a limited number of open requests, slows down.
+    Requests without the `secret_token` header are answered 401.
+    """
+
+    def __init__(
+        self,
+        dispatcher: 'Dispatcher',
+        bot: 'Bot',
+        *,
+        secret_token: str,
+        max_in_flight: int,
+        **data: Any,
+    ) -> None:
+        super().__init__(
+            dispatcher=dispatcher,
+            bot=bot,
+            handle_in_background=True,
+            secret_token=secret_token,
+            **data,
+        )
+        self.max_in_flight = max_in_flight
+        self._slots = asyncio.Semaphore(max_in_flight)
+
+    @property
+    def in_flight(self) -> int:
+        return len(self._background_feed_update_tasks)
+
+    def verify_secret(self, telegram_secret_token: str, bot: 'Bot') -> bool:
+        if not (verified := super().verify_secret(telegram_secret_token, bot)):
+            METRICS.inc('webhook.unauthorized')
+        return verified
+
+    async def _background_feed_update(self, bot: 'Bot', update: dict[str, Any]) -> None:
+        try:
+            await super()._background_feed_update(bot=bot, update=update)
+        except Exception:
+            logger.exception('Update %s is not handled.' % update.get('update_id'))
+
+    async def _handle_request_background(self, bot: 'Bot', request: web.Request) -> web.Response:
+        update = await request.json(loads=bot.session.json_loads)
+        loop = asyncio.get_running_loop()
+        start = loop.time()
+        await self._slots.acquire()
+        METRICS.observe('webhook.slot_wait', loop.time() - start)
+        METRICS.observe('webhook.in_flight', self.in_flight + 1, buckets=SIZE_BUCKETS)
+        task = asyncio.create_task(self._background_feed_update(bot=bot, update=update))
+        self._background_feed_update_tasks.add(task)
+        task.add_done_callback(self._release)
+        return web.json_response({}, dumps=bot.session.json_dumps)
+
+    def _release(self, task: 'asyncio.Task[None]') -> None:
+        self._background_feed_update_tasks.discard(task)
+        self._slots.release()
+
+    async def drain(self) -> None:
+        """Wait until the updates in flight are handled."""
+        if tasks := tuple(self._background_feed_update_tasks):
+            logger.info('Waiting for %d updates in flight.' % len(tasks))
+            await asyncio.gather(*tasks, return_exceptions=True)
+
+    async def close(self) -> None:
+        """Keep the session of the bot, it is closed by the owner of the bot."""
+
+
+def create_app(
+    dispatcher: 'Dispatcher',
+    bot: 'Bot',
+    *,
+    path: str,
+    secret_token: str,
+    max_in_flight: int,
+    **data: Any,
+) -> web.Application:
+    """Application which feeds updates posted to `path` into the dispatcher.
+
+    `/health` answers while the process is alive, `/ready` answers 503 until the
+    startup of the dispatcher is over, during shutdown and while `max_in_flight`
+    updates are handled.
+    """
+    app = web.Application()
+    handler = WebhookRequestHandler(
+        dispatcher=dispatcher,
+        bot=bot,
+        secret_token=secret_token,
+        max_in_flight=max_in_flight,
+        **data,
+    )
+    ready = asyncio.Event()
+    workflow_data = {'dispatcher': dispatcher, 'bots': [bot], **dispatcher.workflow_data, **data}
+
+    async def on_startup(_: web.Application) -> None:
+        await dispatcher.emit_startup(bot=bot, **workflow_data)
+        ready.set()
+
+    async def on_shutdown(_: web.Application) -> None:
+        ready.clear()
+        await handler.drain()
+        await dispatcher.emit_shutdown(bot=bot, **workflow_data)
+
+    async def health(_: web.Request) -> web.Response:
+        return web.Response(text='ok')
+
+    async def readiness(_: web.Request) -> web.Response:
+        if not ready.is_set() or handler.in_flight >= handler.max_in_flight:
+            return web.Response(text='not ready', status=503)
+        return web.Response(text='ready')
+
+    app.router.add_post(path, handler.handle)
+    app.router.add_get(_HEALTH_PATH, health)
+    app.router.add_get(_READY_PATH, readiness)
+    # The signals of aiohttp are typed with the `ParamSpec` of newer `aiosignal`.
+    app.on_startup.append(on_startup)  # type: ignore[arg-type]
+    app.on_shutdown.append(on_shutdown)  # type: ignore[arg-type]
+    return app
+
+
+async def run_webhook(dispatcher: 'Dispatcher', bot: 'Bot', **data: Any) -> None:
+    """Serve the webhook on `BOT_WEBHOOK_HOST:BOT_WEBHOOK_PORT` behind the HTTPS
+    `BOT_WEBHOOK_URL` until SIGINT or SIGTERM, like `Dispatcher.start_polling`.
+    """
+    secret_token = BOT_WEBHOOK_SECRET or secrets.token_urlsafe(32)
+    runner = web.AppRunner(
+        create_app(
+            dispatcher,
+            bot,
+            path=urlsplit(BOT_WEBHOOK_URL).path or '/',
+            secret_token=secret_token,
+            max_in_flight=BOT_WEBHOOK_MAX_IN_FLIGHT,
+            **data,
+        ),
+        handle_signals=False,
+    )
+    stopped = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for stop_signal in _STOP_SIGNALS:
+        with contextlib.suppress(NotImplementedError):  # signals are not supported on Windows
+            loop.add_signal_handler(stop_signal, stopped.set)
+    await runner.setup()  # runs the startup of the dispatcher
+    try:
+        await web.TCPSite(runner, host=BOT_WEBHOOK_HOST, port=BOT_WEBHOOK_PORT).start()
+        await bot.set_webhook(
+            url=BOT_WEBHOOK_URL,
+            secret_token=secret_token,
+            allowed_updates=dispatcher.resolve_used_update_types(),
+            drop_pending_updates=True,
+        )
+        logger.info('Webhook is served on %s:%d.' % (BOT_WEBHOOK_HOST, BOT_WEBHOOK_PORT))
+        await stopped.wait()
+    finally:
+        await runner.cleanup()  # runs the shutdown of the dispatcher
+        for stop_signal in _STOP_SIGNALS:
+            with contextlib.suppress(NotImplementedError):
+                loop.remove_signal_handler(stop_signal)